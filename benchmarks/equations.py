@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Benchmark of the normalization of reaction equation strings.
+
+The iSyn731, iCce806 and Shewanella importers normalize the operators in
+the equations with :class:`psamm_import.normalize.EquationNormalizer`.
+Before, each equation was normalized by a chain of ``re.sub`` calls. This
+measures the time per equation of the chains and of the normalizers on a
+typical equation of each importer, and checks that the output is the same
+as the output of the chain on random equation strings (for iCce806, the
+output may differ in the whitespace between adjacent operators which the
+reaction parser ignores).
+
+The benchmark fails if the output of a normalizer differs from the chain.
+"""
+
+from __future__ import print_function
+
+import re
+import sys
+import random
+import timeit
+import argparse
+
+from psamm_import import excel
+
+
+def _isyn731_chain(equation):
+    equation = re.sub(r'\s*\+\s*', ' + ', equation)
+    equation = re.sub(r'\|\[(\w)\]', r'[\1]|', equation)
+    return equation.replace('||', '|')
+
+
+def _icce806_chain(equation):
+    equation = re.sub(r'\s*\+\s*', ' + ', equation)
+    equation = re.sub(r'\s*-->\s*', ' --> ', equation)
+    return re.sub(r'\s*<==>\s*', ' <==> ', equation)
+
+
+def _shewanella_chain(equation):
+    return re.sub(r'\s*\+\s*', ' + ', equation)
+
+
+def _collapse_whitespace(equation):
+    return ' '.join(equation.split())
+
+
+# Name, importer, chain, typical equation and comparison of the outputs
+CASES = [
+    ('iSyn731', excel.ImportiSyn731, _isyn731_chain,
+     '|2-Oxoglutarate|[c]+|L-Glutamine|[c] +  |NADPH|[c] + |H+|[c] => '
+     '|NADP|[c]+2 |L-Glutamate|[c]', None),
+    ('iCce806', excel.ImportiCce806, _icce806_chain,
+     '[c] : atp+h2o  -->adp + pi+h', _collapse_whitespace),
+    ('Shewanella', excel.ImportShewanellaOng, _shewanella_chain,
+     'atp[c] +h2o[c]  <==> adp[c]+ pi[c] + h[c]', None),
+]
+
+_TOKENS = ['a', 'b[c]', ' ', '  ', '\t', '+', '-->', '<==>', '=>', '-',
+           '|', '||', '|[c]', '[e]', '(2)', '>']
+
+
+def random_equations(count, seed=0):
+    """Return list of random strings of equation tokens."""
+    rand = random.Random(seed)
+    return [''.join(rand.choice(_TOKENS) for _ in range(rand.randint(0, 12)))
+            for _ in range(count)]
+
+
+def differences(normalize, chain, equations, compare=None):
+    """Return list of the equations where normalizer and chain differ."""
+    if compare is None:
+        def compare(equation):
+            return equation
+    return [equation for equation in equations
+            if compare(normalize(equation)) != compare(chain(equation))]
+
+
+def _time(function, equation, number):
+    return min(timeit.repeat(
+        lambda: function(equation), number=number, repeat=5)) / number
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark normalization of equation strings')
+    parser.add_argument('--number', type=int, default=50000,
+                        help='Number of calls of each function to measure')
+    parser.add_argument('--fuzz', type=int, default=50000,
+                        help='Number of random equations to compare')
+    args = parser.parse_args(args)
+
+    failed = False
+    equations = random_equations(args.fuzz)
+    for name, importer, chain, equation, compare in CASES:
+        normalize = importer.normalize_equation
+        chain_time = _time(chain, equation, args.number)
+        normalize_time = _time(normalize, equation, args.number)
+        print('{:<12} chain {:6.2f} us  normalizer {:6.2f} us'.format(
+            name, 1e6 * chain_time, 1e6 * normalize_time))
+
+        differ = differences(normalize, chain, equations, compare)
+        if len(differ) > 0:
+            print('{}: output differs from the chain for {!r}'.format(
+                name, differ[0]))
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
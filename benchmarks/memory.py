@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Benchmark of the memory used by an imported ModelSEED model.
+
+The model is imported with dict entries and with compact entries (see
+:mod:`psamm_import.compact`) and the memory allocated for the model is
+measured with :mod:`tracemalloc` (Python 3.4 or later). The workbook is
+imported once before the measurements so the workbook cache is warm and
+only the memory of the model is measured.
+
+If no source directory is given, a ModelSEED source with ``--reactions``
+reactions is generated in a temporary directory (this requires xlwt). The
+benchmark fails if the model with compact entries cannot be written as a
+YAML model.
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from psamm.importer import write_yaml_model
+
+from psamm_import import excel
+
+
+def write_source(dirpath, reactions):
+    """Write ModelSEED source with the number of reactions to directory."""
+    from psamm_import.tests.workbooks import write_modelseed_source
+
+    compounds = reactions // 2 + 2
+    genes = [('fig|1.peg.{}'.format(i), 1000 * i, 1000 * i + 900, 'for')
+             for i in range(1, reactions // 4 + 2)]
+    write_modelseed_source(dirpath, genes, [
+        ('cpd{:05d}'.format(i), 'Compound {}'.format(i),
+         'C{}H{}O{}'.format(i % 20 + 1, i % 30 + 2, i % 7 + 1), i % 3 - 1)
+        for i in range(compounds)
+    ], [
+        ('rxn{:05d}'.format(i), 'Reaction {}'.format(i),
+         '(1) cpd{:05d}[c] + (2) cpd{:05d}[c] <=> (1) cpd{:05d}[e]'.format(
+             i % compounds, (i + 1) % compounds, (i + 2) % compounds),
+         'peg.{} or peg.{}'.format(i % len(genes) + 1,
+                                   (i + 7) % len(genes) + 1))
+        for i in range(reactions)
+    ], [(start, stop, '+', 'GENE{}'.format(i))
+        for i, (_, start, stop, _) in enumerate(genes)])
+
+
+def measure(importer, source, compact):
+    """Return model, allocated memory and time of an import."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        start_time = time.time()
+        model = importer.import_model(source, compact=compact)
+        elapsed = time.time() - start_time
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+    return model, allocated, elapsed
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark memory of imported ModelSEED models')
+    parser.add_argument('source', nargs='?',
+                        help='ModelSEED source directory (default: generate)')
+    parser.add_argument('--reactions', type=int, default=30000,
+                        help='Number of reactions in the generated source')
+    args = parser.parse_args(args)
+
+    logging.disable(logging.CRITICAL)
+    temp_dir = None
+    source = args.source
+    if source is None:
+        temp_dir = tempfile.mkdtemp()
+        source = os.path.join(temp_dir, 'source')
+        os.mkdir(source)
+        write_source(source, args.reactions)
+
+    try:
+        importer = excel.ImportModelSEED()
+        importer.import_model(source)
+
+        results = {}
+        for name, compact in (('dict', False), ('compact', True)):
+            model, allocated, elapsed = measure(importer, source, compact)
+            entries = len(model.compounds) + len(model.reactions)
+            print('{:<8} {:6} entries  {:7.1f} MB  {:5.2f} s'.format(
+                name, entries, allocated / 1e6, elapsed))
+            results[name] = model, allocated, entries
+            del model
+
+        model, allocated, entries = results['compact']
+        saved = results['dict'][1] - allocated
+        print('Saved {:.0f} bytes per entry'.format(saved / float(entries)))
+
+        dest = tempfile.mkdtemp()
+        try:
+            write_yaml_model(model, dest)
+        except Exception as e:
+            print('Unable to write compact model: {}: {}'.format(
+                type(e).__name__, e))
+            return 1
+        finally:
+            shutil.rmtree(dest)
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
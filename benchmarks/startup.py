@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Benchmark of the time it takes to list the importers.
+
+``psamm-import list`` loads every ``psamm.importer`` entry point and reads
+the name and title of the importer. Each run is a fresh interpreter that
+imports :mod:`psamm.importer` first (as ``psamm-import`` does) and then
+measures loading the entry points of this package. The entry points are
+resolved without checking the requirements of the distribution, which
+takes the same time for any entry point. For comparison, the time to import
+:mod:`psamm_import.excel` (which every entry point loaded before the
+importers were registered through proxies) is measured in the same way.
+
+The benchmark fails if listing the importers imports xlrd or
+:mod:`psamm_import.excel`.
+"""
+
+from __future__ import print_function
+
+import sys
+import json
+import argparse
+import subprocess
+
+_LIST_IMPORTERS = '''
+import json, sys, time
+import psamm.importer
+from psamm_import.registry import iter_importer_entries
+start = time.time()
+names = [(name, entry.resolve()().title) for name, entry in
+         iter_importer_entries()
+         if entry.module_name.startswith('psamm_import.')]
+elapsed = time.time() - start
+print(json.dumps({
+    'elapsed': elapsed, 'importers': len(names),
+    'loaded': [m for m in ('xlrd', 'psamm_import.excel')
+               if m in sys.modules]}))
+'''
+
+_IMPORT_EXCEL = '''
+import json, time
+import psamm.importer
+start = time.time()
+import psamm_import.excel
+print(json.dumps({'elapsed': time.time() - start}))
+'''
+
+
+def _run(code):
+    output = subprocess.check_output([sys.executable, '-c', code])
+    return json.loads(output.decode('utf-8'))
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark listing of the importers')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Number of interpreters to measure')
+    args = parser.parse_args(args)
+
+    listing = [_run(_LIST_IMPORTERS) for _ in range(args.runs)]
+    excel = [_run(_IMPORT_EXCEL) for _ in range(args.runs)]
+
+    print('List {} importers:      {:7.1f} ms (median of {})'.format(
+        listing[0]['importers'],
+        1000 * _median([r['elapsed'] for r in listing]), args.runs))
+    print('Import psamm_import.excel: {:7.1f} ms (median of {})'.format(
+        1000 * _median([r['elapsed'] for r in excel]), args.runs))
+
+    loaded = sorted(set(m for r in listing for m in r['loaded']))
+    if len(loaded) > 0:
+        print('Listing the importers loaded {}'.format(', '.join(loaded)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
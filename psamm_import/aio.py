@@ -0,0 +1,135 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Asyncio interface to the Excel importers (Python 3 only).
+
+Decoding the workbooks and parsing the rows is done in an executor so the
+event loop is not blocked. Rows are parsed in chunks and control is returned
+to the event loop between chunks, so an import can be cancelled between any
+two chunks.
+
+Example::
+
+    model = await import_model_async(ImportiJO1366(), 'path/to/source')
+"""
+
+import asyncio
+import functools
+import itertools
+
+#: Default number of entries parsed between returning to the event loop
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _take(entries, n):
+    return list(itertools.islice(entries, n))
+
+
+async def _read_chunked(loop, executor, entries, entry_set, chunk_size):
+    while True:
+        chunk = await loop.run_in_executor(
+            executor, _take, entries, chunk_size)
+        entry_set.update(chunk)
+        if len(chunk) < chunk_size:
+            break
+
+
+async def _import(importer, open_source, executor, chunk_size):
+    """Import model from the state returned by ``open_source()``.
+
+    The source is opened in the executor and the entries are read in
+    chunks using the same steps as the synchronous import.
+    """
+    loop = asyncio.get_event_loop()
+    state = await loop.run_in_executor(executor, open_source)
+    model = importer._create_model(state)
+    for entries, entry_set in importer._iter_entry_sets(state, model):
+        await _read_chunked(loop, executor, entries, entry_set, chunk_size)
+    return model
+
+
+async def _import_limited(importer, open_source, executor, chunk_size,
+                          semaphore):
+    if semaphore is None:
+        return await _import(importer, open_source, executor, chunk_size)
+
+    async with semaphore:
+        return await _import(importer, open_source, executor, chunk_size)
+
+
+async def import_model_async(importer, source, executor=None,
+                             chunk_size=DEFAULT_CHUNK_SIZE, semaphore=None,
+                             **options):
+    """Import model from source using the importer without blocking.
+
+    Args:
+        importer: :class:`psamm_import.excel.ExcelImporter` instance.
+        source: Source directory or file.
+        executor: :class:`concurrent.futures.Executor` to run the blocking
+            parts of the import in (the default executor of the event loop
+            if None).
+        chunk_size: Number of entries to parse between returning control to
+            the event loop.
+        semaphore: :class:`asyncio.Semaphore` used to limit the number of
+            imports running at the same time (optional).
+
+    Other keyword arguments are import options as for ``import_model()`` of
+    the importer (e.g. ``observers`` or ``report``). With ``lazy=True``, the
+    model is returned when the source has been opened, and the entries are
+    read (blocking) when they are accessed as for a lazy synchronous import.
+    """
+    return await _import_limited(
+        importer, functools.partial(importer._open, source, **options),
+        executor, chunk_size, semaphore)
+
+
+async def import_model_named_async(importer, name, *args, executor=None,
+                                   chunk_size=DEFAULT_CHUNK_SIZE,
+                                   semaphore=None, **options):
+    """Import named model using the importer without blocking.
+
+    This is the asyncio version of ``import_model_named()`` of the importers
+    that import one of several models from a source (e.g. the Shewanella
+    importers). The positional arguments after the name are those of
+    ``import_model_named()``. The keyword arguments are as for
+    :func:`import_model_async`.
+    """
+    return await _import_limited(
+        importer, functools.partial(
+            importer._open_named, name, *args, **options),
+        executor, chunk_size, semaphore)
+
+
+async def import_models_async(jobs, concurrency=4, executor=None,
+                              chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import multiple models concurrently.
+
+    The jobs are given as an iterable of ``(importer, source)`` or
+    ``(importer, source, options)`` tuples where options is a dict of import
+    options for the job (e.g. ``{'report': report}``). At most
+    ``concurrency`` imports are running at the same time. Returns the list
+    of models in the order of the jobs.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    imports = []
+    for job in jobs:
+        importer, source = job[:2]
+        options = job[2] if len(job) > 2 else {}
+        imports.append(import_model_async(
+            importer, source, executor=executor, chunk_size=chunk_size,
+            semaphore=semaphore, **options))
+    return await asyncio.gather(*imports)
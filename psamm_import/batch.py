@@ -0,0 +1,538 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Batch import of many source directories.
+
+:func:`find_modelseed_sources` walks a directory tree for ModelSEED source
+directories (a ``Seed*.xls`` and a ``*.ptt`` file) and checks each
+directory using only the file names, so invalid directories are found
+before any workbook is opened. :func:`import_sources` imports the sources in
+a pool of worker processes and returns a :class:`BatchResult` for each
+source. Results are kept in a :class:`ResultCache` keyed by the
+fingerprints of the source files, so sources that did not change since the
+last batch are not imported again. An :class:`ImportJournal` keeps the
+results in a file instead, so a batch that was interrupted can be resumed
+by running it again. :func:`check_sources` only checks the structure of
+the workbooks (see :mod:`psamm_import.validate`) which takes a fraction of
+the time of an import.
+
+Running imports in parallel requires :mod:`concurrent.futures` (the
+``futures`` package on Python 2).
+"""
+
+from __future__ import print_function
+
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from six import itervalues
+
+from .registry import load_importer
+from .workbook import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+#: Status of a source that was imported
+STATUS_OK = 'ok'
+
+#: Status of a source that was unchanged since the cached import
+STATUS_CACHED = 'cached'
+
+#: Status of a source directory that does not have the expected files
+STATUS_INVALID = 'invalid'
+
+#: Status of a source that failed to import
+STATUS_ERROR = 'error'
+
+#: File name of the journal in the destination of a batch
+DEFAULT_JOURNAL = 'import-journal.jsonl'
+
+
+class BatchResult(object):
+    """Result of importing one source in a batch.
+
+    The ``model`` attribute is a dict with the name and the number of
+    compounds, reactions and genes of the imported model (or None if the
+    import did not succeed).
+    """
+
+    def __init__(self, source, status, dest=None, model=None, message=None,
+                 elapsed=None):
+        """Create result of a source."""
+        self.source = source
+        self.status = status
+        self.dest = dest
+        self.model = model
+        self.message = message
+        self.elapsed = elapsed
+
+
+def check_modelseed_source(source):
+    """Return the problem with a ModelSEED source directory or None.
+
+    Only the file names are checked; the files are not opened.
+    """
+    excel_sources = glob.glob(os.path.join(source, 'Seed*.xls'))
+    ptt_sources = glob.glob(os.path.join(source, '*.ptt'))
+    if len(excel_sources) == 0:
+        return 'No .xls file found in source directory'
+    elif len(excel_sources) > 1:
+        return 'More than one .xls file found in source directory'
+    elif len(ptt_sources) == 0:
+        return 'No .ptt file found in source directory'
+    elif len(ptt_sources) > 1:
+        return 'More than one .ptt file found in source directory'
+    return None
+
+
+def find_modelseed_sources(root):
+    """Return sorted list of ``(source, problem)`` under the root directory.
+
+    Each directory with a ``Seed*.xls`` or a ``*.ptt`` file is a candidate
+    source. The problem is None for valid sources (see
+    :func:`check_modelseed_source`).
+    """
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if any(f.startswith('Seed') and f.endswith('.xls') or
+               f.endswith('.ptt') for f in filenames):
+            sources.append((dirpath, check_modelseed_source(dirpath)))
+    return sorted(sources)
+
+
+def source_fingerprint(importer, source):
+    """Return fingerprint of the files that a model is imported from."""
+    return tuple((os.path.basename(path),) + file_fingerprint(path)
+                 for path in importer.source_files(source))
+
+
+class ResultCache(object):
+    """Cache of batch results keyed by format, source and destination.
+
+    A cached result is used if the fingerprint of the source files is
+    unchanged and the destination still exists. The cache can be shared
+    between threads.
+    """
+
+    def __init__(self):
+        """Create empty cache."""
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of cached results."""
+        return len(self._entries)
+
+    def get(self, key, fingerprint):
+        """Return cached result for key if fingerprint matches, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] != fingerprint:
+            return None
+        result = entry[1]
+        if result.dest is not None and not os.path.isdir(result.dest):
+            return None
+        return result
+
+    def put(self, key, fingerprint, result):
+        """Add result of key to the cache."""
+        with self._lock:
+            self._entries[key] = fingerprint, result
+
+    def clear(self):
+        """Remove all results from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+#: Result cache shared by the batch imports in the process
+result_cache = ResultCache()
+
+
+def _replace(src, dst):
+    """Rename src to dst, replacing dst if it exists."""
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        os.rename(src, dst)
+
+
+def _to_tuple(value):
+    if isinstance(value, list):
+        return tuple(_to_tuple(v) for v in value)
+    return value
+
+
+class ImportJournal(ResultCache):
+    """Result cache that is kept in a journal file.
+
+    Each completed import is appended to the journal as a line of JSON and
+    the file is synced to disk, so the journal survives if the batch is
+    interrupted. Running the batch again with the same journal only imports
+    the sources that are not in the journal or changed since they were
+    imported. A partially written last line is ignored.
+
+    A result is only appended if the status or the fingerprint of the
+    source changed since the last line of the source. When the journal is
+    opened, it is compacted to the last line of each source if it has
+    lines that were superseded by later lines or that are invalid, so the
+    journal does not grow when the same sources are imported repeatedly.
+
+    Args:
+        path: Path of the journal file.
+        restart: Whether to discard the results in an existing journal.
+    """
+
+    def __init__(self, path, restart=False):
+        """Open journal file at path."""
+        super(ImportJournal, self).__init__()
+        self._path = path
+        if os.path.exists(path) and not restart:
+            lines, obsolete = self._read()
+            if obsolete:
+                self._compact(lines)
+        self._file = open(path, 'w' if restart else 'a')
+
+    def _read(self):
+        """Read journal and return the last line of each key.
+
+        Also returns True if the journal has lines that are superseded,
+        invalid or incomplete.
+        """
+        lines = OrderedDict()
+        obsolete = False
+        with open(self._path, 'r') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    # Partially written last line
+                    obsolete = True
+                    continue
+                try:
+                    item = json.loads(line)
+                    key = _to_tuple(item['key'])
+                    fingerprint = _to_tuple(item['fingerprint'])
+                    result = BatchResult(
+                        item['source'], item['status'], dest=item['dest'],
+                        model=item['model'], elapsed=item['elapsed'])
+                except (ValueError, KeyError, TypeError):
+                    logger.warning('Ignoring invalid line in journal {}'
+                                   .format(self._path))
+                    obsolete = True
+                    continue
+                if key in lines:
+                    del lines[key]
+                    obsolete = True
+                lines[key] = line
+                self._entries[key] = fingerprint, result
+        return list(itervalues(lines)), obsolete
+
+    def _compact(self, lines):
+        """Replace the journal file by a file of the lines."""
+        logger.info('Compacting journal {}'.format(self._path))
+        temp_path = self._path + '.tmp'
+        with open(temp_path, 'w') as f:
+            for line in lines:
+                f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(temp_path, self._path)
+
+    @property
+    def path(self):
+        """Path of the journal file."""
+        return self._path
+
+    def put(self, key, fingerprint, result):
+        """Add result of key to the journal."""
+        line = json.dumps({
+            'key': key,
+            'fingerprint': fingerprint,
+            'source': result.source,
+            'status': result.status,
+            'dest': result.dest,
+            'model': result.model,
+            'elapsed': result.elapsed
+        }, sort_keys=True)
+        with self._lock:
+            entry = self._entries.get(key)
+            self._entries[key] = fingerprint, result
+            if (entry is not None and entry[0] == fingerprint and
+                    entry[1].status == result.status):
+                return
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def clear(self):
+        """Remove all results from the journal."""
+        with self._lock:
+            self._entries.clear()
+            self._file.seek(0)
+            self._file.truncate()
+
+    def close(self):
+        """Close the journal file."""
+        self._file.close()
+
+    def __enter__(self):
+        """Return the journal."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the journal file."""
+        self.close()
+
+
+# Importer instances of the worker process
+_importers = {}
+
+
+def _get_importer(format):
+    importer = _importers.get(format)
+    if importer is None:
+        importer = load_importer(format)()
+        _importers[format] = importer
+    return importer
+
+
+def _import_job(format, source, dest, options):
+    """Import source and write the model to dest (runs in a worker)."""
+    from psamm.importer import write_yaml_model, count_genes
+
+    start_time = time.time()
+    try:
+        model = _get_importer(format).import_model(source)
+        if dest is not None:
+            if not os.path.isdir(dest):
+                os.makedirs(dest)
+            write_yaml_model(
+                model, dest,
+                convert_exchange=not options.get('no_exchange', False),
+                split_subsystem=options.get('split_subsystem', False))
+    except Exception as e:
+        return STATUS_ERROR, None, '{}: {}'.format(
+            type(e).__name__, e), time.time() - start_time
+
+    summary = {
+        'name': model.name,
+        'compounds': len(model.compounds),
+        'reactions': len(model.reactions),
+        'genes': count_genes(model)
+    }
+    return STATUS_OK, summary, None, time.time() - start_time
+
+
+def import_sources(format, jobs, workers=1, cache=result_cache, **options):
+    """Import each ``(source, dest)`` job and return list of results.
+
+    The results are in the order of the jobs. With more than one worker,
+    the imports run in a pool of worker processes. Jobs with a result in the
+    cache (and unchanged source files) are not imported again; pass None as
+    cache to import all jobs. Each result is added to the cache as soon as
+    the import completes, so an :class:`ImportJournal` given as cache
+    records every completed import even if the batch is interrupted. The
+    options ``no_exchange`` and ``split_subsystem`` are used when writing
+    the models.
+    """
+    importer = _get_importer(format)
+    results = [None] * len(jobs)
+    pending = []
+    for i, (source, dest) in enumerate(jobs):
+        key = (format, os.path.abspath(source),
+               None if dest is None else os.path.abspath(dest))
+        try:
+            fingerprint = source_fingerprint(importer, source)
+        except OSError as e:
+            results[i] = BatchResult(source, STATUS_ERROR, dest=dest,
+                                     message=str(e))
+            continue
+
+        cached = cache.get(key, fingerprint) if cache is not None else None
+        if cached is not None:
+            results[i] = BatchResult(
+                source, STATUS_CACHED, dest=cached.dest, model=cached.model,
+                elapsed=cached.elapsed)
+        else:
+            pending.append((i, key, fingerprint))
+
+    def store(i, key, fingerprint, outcome):
+        status, model, message, elapsed = outcome
+        source, dest = jobs[i]
+        result = BatchResult(source, status, dest=dest, model=model,
+                             message=message, elapsed=elapsed)
+        if cache is not None and status == STATUS_OK:
+            cache.put(key, fingerprint, result)
+        results[i] = result
+
+    if workers > 1 and len(pending) > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for i, key, fingerprint in pending:
+                future = executor.submit(
+                    _import_job, format, jobs[i][0], jobs[i][1], options)
+                futures[future] = i, key, fingerprint
+            for future in as_completed(futures):
+                i, key, fingerprint = futures[future]
+                store(i, key, fingerprint, future.result())
+    else:
+        for i, key, fingerprint in pending:
+            source, dest = jobs[i]
+            store(i, key, fingerprint,
+                  _import_job(format, source, dest, options))
+
+    return results
+
+
+def check_sources(format, sources):
+    """Return list of :class:`BatchResult` of checking the sources.
+
+    The structure of each source is checked with ``validate()`` of the
+    importer instead of importing the model. Sources with issues are
+    invalid and the message gives the number of issues in each category (or
+    the error if the source could not be opened).
+    """
+    importer = _get_importer(format)
+    results = []
+    for source in sources:
+        start_time = time.time()
+        report = importer.validate(source)
+        status, message = STATUS_OK, None
+        if report.count('invalid_source') > 0:
+            status = STATUS_INVALID
+            message = report.items('invalid_source')[0][1]
+        elif len(report) > 0:
+            status = STATUS_INVALID
+            message = ', '.join('{}: {}'.format(category, count)
+                                for category, count in report.counts().items())
+        results.append(BatchResult(source, status, message=message,
+                                   elapsed=time.time() - start_time))
+    return results
+
+
+def format_status_table(results, root=None):
+    """Return list of lines of a table with the status of each result.
+
+    Sources are shown relative to root if given.
+    """
+    rows = [('Source', 'Status', 'Compounds', 'Reactions', 'Genes',
+             'Time', 'Message')]
+    for result in results:
+        source = result.source
+        if root is not None:
+            source = os.path.relpath(source, root)
+        model = result.model or {}
+        rows.append((
+            source, result.status,
+            str(model.get('compounds', '')), str(model.get('reactions', '')),
+            str(model.get('genes', '')),
+            '' if result.elapsed is None else '{:.2f}'.format(result.elapsed),
+            result.message or ''))
+
+    # The message is not padded since it is the last column
+    widths = [max(len(row[i]) for row in rows) for i in range(6)] + [0]
+    return ['  '.join(value.ljust(width) for value, width in zip(row, widths))
+            .rstrip() for row in rows]
+
+
+def _import_with_journal(jobs, journal_path, args):
+    """Import the jobs of the batch command using the journal (if any)."""
+    journal = None
+    if journal_path is not None:
+        journal_dir = os.path.dirname(os.path.abspath(journal_path))
+        if not os.path.isdir(journal_dir):
+            os.makedirs(journal_dir)
+        journal = ImportJournal(journal_path, restart=args.restart)
+
+    try:
+        return import_sources(
+            'ModelSEED', jobs, workers=args.workers, cache=journal,
+            no_exchange=args.no_exchange,
+            split_subsystem=args.split_subsystem)
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+def main(args=None):
+    """Entry point of the batch command."""
+    parser = argparse.ArgumentParser(
+        description='Import all ModelSEED models in a directory tree')
+    parser.add_argument('root', help='Directory to search for sources')
+    parser.add_argument('--dest', metavar='path',
+                        help=('Destination directory; each model is'
+                              ' written to the relative path of its'
+                              ' source'))
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of imports to run in parallel')
+    parser.add_argument('--journal', metavar='path',
+                        help=('Journal of completed imports (default: {}'
+                              ' in destination)'.format(DEFAULT_JOURNAL)))
+    parser.add_argument('--restart', action='store_true',
+                        help=('Import all sources instead of resuming from'
+                              ' the journal'))
+    parser.add_argument('--no-exchange', action='store_true',
+                        help=('Disable importing exchange reactions as'
+                              ' exchange compound file.'))
+    parser.add_argument('--split-subsystem', action='store_true',
+                        help='Enable splitting reaction files by subsystem')
+    parser.add_argument('--check', action='store_true',
+                        help=('Only check the structure of the sources'
+                              ' without importing the models'))
+    args = parser.parse_args(args)
+
+    logging.basicConfig(
+        level=logging.ERROR, format='%(levelname)s: %(message)s')
+
+    journal_path = args.journal
+    if journal_path is None and args.dest is not None:
+        journal_path = os.path.join(args.dest, DEFAULT_JOURNAL)
+
+    sources = find_modelseed_sources(args.root)
+    jobs = []
+    results = []
+    for source, problem in sources:
+        if problem is not None:
+            results.append(BatchResult(source, STATUS_INVALID,
+                                       message=problem))
+            continue
+        dest = None
+        if args.dest is not None:
+            dest = os.path.join(
+                args.dest, os.path.relpath(source, args.root))
+        jobs.append((source, dest))
+
+    if args.check:
+        results.extend(check_sources(
+            'ModelSEED', [source for source, _ in jobs]))
+    else:
+        results.extend(_import_with_journal(jobs, journal_path, args))
+    results.sort(key=lambda r: r.source)
+
+    for line in format_status_table(results, root=args.root):
+        print(line)
+
+    if any(r.status in (STATUS_ERROR, STATUS_INVALID) for r in results):
+        return 1
+    return 0
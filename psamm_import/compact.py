@@ -0,0 +1,177 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Compact representation of imported entries.
+
+The importers create a dict of properties and a
+:class:`psamm.datasource.context.FileMark` for every entry. When many large
+models are kept in memory (e.g. by a batch process), the entries can be
+converted to compact entries with ``import_model(source, compact=True)``.
+A compact entry keeps the property values in a tuple next to a key layout
+that is shared by all entries with the same keys, and creates the file
+mark when it is accessed. Repeated values of some properties (e.g. the
+subsystem) are interned.
+
+Compact entries implement the entry interface of
+:mod:`psamm.datasource.entry` but their properties are read-only.
+"""
+
+import threading
+
+from six.moves import intern
+
+from psamm.datasource.context import FileMark
+from psamm.datasource.entry import CompoundEntry, ReactionEntry
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+#: Properties with text values that are interned
+INTERNED_PROPERTIES = frozenset(['subsystem', 'compartment', 'ec'])
+
+
+class _KeyLayout(object):
+    """Property keys shared by the entries that have the same keys."""
+
+    __slots__ = ('keys', 'index')
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.index = dict((key, i) for i, key in enumerate(keys))
+
+
+_layouts = {}
+_layouts_lock = threading.Lock()
+
+
+def _get_layout(keys):
+    layout = _layouts.get(keys)
+    if layout is None:
+        with _layouts_lock:
+            layout = _layouts.setdefault(keys, _KeyLayout(keys))
+    return layout
+
+
+class EntryProperties(Mapping):
+    """Read-only mapping view of the properties of a compact entry."""
+
+    __slots__ = ('_layout', '_values')
+
+    def __init__(self, layout, values):
+        """Create view of the values with the key layout."""
+        self._layout = layout
+        self._values = values
+
+    def __getitem__(self, key):
+        """Return value of property."""
+        return self._values[self._layout.index[key]]
+
+    def __iter__(self):
+        """Iterate over the property keys."""
+        return iter(self._layout.keys)
+
+    def __len__(self):
+        """Return the number of properties."""
+        return len(self._values)
+
+
+class _CompactEntry(object):
+    """Implementation of the entry interface for the compact entries."""
+
+    __slots__ = ()
+
+    def __init__(self, properties, filemark=None):
+        keys = tuple(properties)
+        values = []
+        for key in keys:
+            value = properties[key]
+            if key in INTERNED_PROPERTIES and isinstance(value, str):
+                value = intern(value)
+            values.append(value)
+
+        self._id = properties['id']
+        self._layout = _get_layout(keys)
+        self._values = tuple(values)
+        if filemark is None:
+            self._filecontext = self._line = self._column = None
+        else:
+            self._filecontext = filemark.filecontext
+            self._line = filemark.line
+            self._column = filemark.column
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Return compact copy of the entry."""
+        return cls(entry.properties, entry.filemark)
+
+    @property
+    def id(self):
+        """Identifier of entry."""
+        return self._id
+
+    @property
+    def properties(self):
+        """Properties of entry as a read-only mapping."""
+        return EntryProperties(self._layout, self._values)
+
+    @property
+    def filemark(self):
+        """Position of entry in the source file (or None)."""
+        if self._filecontext is None and self._line is None:
+            return None
+        return FileMark(self._filecontext, self._line, self._column)
+
+
+class CompactCompoundEntry(_CompactEntry, CompoundEntry):
+    """Compound entry with compact properties.
+
+    Args:
+        properties: Mapping of the properties (including ``id``).
+        filemark: Where the entry was parsed from (optional).
+    """
+
+    __slots__ = ('_id', '_layout', '_values', '_filecontext', '_line',
+                 '_column')
+
+
+class CompactReactionEntry(_CompactEntry, ReactionEntry):
+    """Reaction entry with compact properties.
+
+    Args:
+        properties: Mapping of the properties (including ``id``).
+        filemark: Where the entry was parsed from (optional).
+    """
+
+    __slots__ = ('_id', '_layout', '_values', '_filecontext', '_line',
+                 '_column')
+
+
+def compact_entry(entry):
+    """Return compact copy of the compound or reaction entry."""
+    if isinstance(entry, _CompactEntry):
+        return entry
+    if isinstance(entry, ReactionEntry):
+        return CompactReactionEntry.from_entry(entry)
+    return CompactCompoundEntry.from_entry(entry)
+
+
+def compact_entries(entries):
+    """Yield compact copies of the entries."""
+    for entry in entries:
+        yield compact_entry(entry)
@@ -0,0 +1,467 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Long-running import daemon and client.
+
+The daemon listens on a Unix socket and serves import requests. It keeps the
+importer registry, the importer instances and the decoded workbooks (see
+:mod:`psamm_import.workbook`) in memory between requests so repeated imports
+do not pay for interpreter startup, module imports, entry point discovery or
+workbook decoding.
+
+Requests and responses are JSON objects sent as single lines. A request has
+a ``command`` (``import``, ``list``, ``ping`` or ``shutdown``). Import
+requests give the importer ``format`` and the ``source`` path, and
+optionally a ``dest`` directory to write the model to. With ``matrix`` set,
+the stoichiometric matrix is built during the import and saved as
+``stoichiometry.npz`` in ``dest``, and with ``snapshot`` set, a binary
+snapshot of the model (see :mod:`psamm_import.snapshot`) is saved as
+``model.snapshot``. With ``gene_index`` set, the index of the reactions of
+each gene is built during the import and saved as ``genes.tsv.gz`` (see
+:mod:`psamm_import.geneindex`). ``row_limit`` and ``row_step`` limit the rows
+read for a quick preview of the model. With ``compression`` set to ``gzip`` or
+``zstd``, the model is written as a single compressed file (see
+:mod:`psamm_import.output`) instead of YAML files. The response has a
+``status`` of ``ok`` or ``error``.
+
+The other importers of ``psamm-import`` (e.g. the SBML importer) can also be
+used but they do not support the ``matrix``, ``gene_index``,
+``create_missing``, ``row_limit`` and ``row_step`` options.
+
+The client part of this module does not import PSAMM or xlrd (the importer
+registry is only imported by the daemon) so the client starts quickly.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import stat
+import json
+import errno
+import time
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+
+from six.moves import socketserver
+
+logger = logging.getLogger(__name__)
+
+# Request options that are only supported by the Excel importers and
+# their default values
+_EXCEL_OPTIONS = (
+    ('matrix', False),
+    ('gene_index', False),
+    ('create_missing', None),
+    ('row_limit', None),
+    ('row_step', 1)
+)
+
+_COMPRESSION_EXTENSIONS = {
+    'gzip': 'gz',
+    'zstd': 'zst'
+}
+
+
+def default_socket_path():
+    """Return default path of the daemon socket."""
+    path = os.environ.get('PSAMM_IMPORT_SOCKET')
+    if path is not None:
+        return path
+    return os.path.join(tempfile.gettempdir(), 'psamm-import-{}.sock'.format(
+        os.getuid()))
+
+
+def _send(sock, obj):
+    sock.sendall(json.dumps(obj).encode('utf-8') + b'\n')
+
+
+def _receive(f):
+    line = f.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+class ImportService(object):
+    """Serve import requests using warm importer instances.
+
+    Importer instances are created on first use and kept for the lifetime of
+    the service. Since the importers are reentrant, the same instance serves
+    concurrent requests.
+    """
+
+    def __init__(self):
+        """Discover the available importers."""
+        from .registry import iter_importer_entries
+
+        self._entries = dict(iter_importer_entries())
+        self._importers = {}
+        self._lock = threading.Lock()
+
+    def importer(self, name):
+        """Return importer instance for the given format name."""
+        name = name.lower()
+        with self._lock:
+            importer = self._importers.get(name)
+            if importer is None:
+                if name not in self._entries:
+                    raise ValueError('Importer {} not found'.format(name))
+                importer = self._entries[name].load()()
+                self._importers[name] = importer
+        return importer
+
+    def list(self):
+        """Return list of format names and importer titles."""
+        result = []
+        for name, entry in sorted(self._entries.items()):
+            title = getattr(entry.load(), 'title', None)
+            if title is not None:
+                result.append([name, title])
+        return result
+
+    def import_model(self, request):
+        """Import model according to request and return response."""
+        from psamm.importer import write_yaml_model, count_genes
+
+        from .excel import ExcelImporter
+        from .registry import LazyImporter
+
+        start_time = time.time()
+        importer = self.importer(request['format'])
+        dest = request.get('dest')
+
+        # Other importers (e.g. SBML from PSAMM) only take the source
+        is_excel = isinstance(importer, (ExcelImporter, LazyImporter))
+        if not is_excel:
+            options = [option for option, default in _EXCEL_OPTIONS
+                       if request.get(option, default) != default]
+            if len(options) > 0:
+                raise ValueError(
+                    'Not supported by the {} importer: {}'.format(
+                        request['format'], ', '.join(options)))
+
+        observers = []
+        if request.get('matrix', False):
+            if dest is None:
+                raise ValueError('Stoichiometric matrix requires dest')
+            from .matrix import StoichiometricMatrixBuilder
+            matrix_builder = StoichiometricMatrixBuilder()
+            observers.append(matrix_builder)
+        if request.get('gene_index', False):
+            if dest is None:
+                raise ValueError('Gene index requires dest')
+            from .geneindex import GeneIndexBuilder
+            gene_index_builder = GeneIndexBuilder()
+            observers.append(gene_index_builder)
+
+        from .report import ImportReport
+        report = ImportReport()
+        if is_excel:
+            model = importer.import_model(
+                request['source'], observers=observers, report=report,
+                create_missing=request.get('create_missing'),
+                row_limit=request.get('row_limit'),
+                row_step=request.get('row_step', 1))
+        else:
+            model = importer.import_model(request['source'])
+
+        response = {
+            'status': 'ok',
+            'model': {
+                'name': model.name,
+                'biomass': model.biomass_reaction,
+                'compounds': len(model.compounds),
+                'reactions': len(model.reactions),
+                'genes': count_genes(model)
+            },
+            'report': report.counts()
+        }
+
+        if dest is not None:
+            if (os.path.isdir(dest) and len(os.listdir(dest)) > 0 and
+                    not request.get('force', False)):
+                raise ValueError(
+                    'Destination directory is not empty: {}'.format(dest))
+            if not os.path.isdir(dest):
+                os.makedirs(dest)
+            compression = request.get('compression')
+            if compression is not None:
+                if compression not in _COMPRESSION_EXTENSIONS:
+                    raise ValueError(
+                        'Unknown compression: {}'.format(compression))
+                from .output import write_compressed_model
+                write_compressed_model(
+                    model, os.path.join(dest, 'model.yaml.{}'.format(
+                        _COMPRESSION_EXTENSIONS[compression])),
+                    compression=compression,
+                    convert_exchange=not request.get('no_exchange', False))
+            else:
+                write_yaml_model(
+                    model, dest,
+                    convert_exchange=not request.get('no_exchange', False),
+                    split_subsystem=request.get('split_subsystem', False))
+            if request.get('matrix', False):
+                matrix_builder.build().save(
+                    os.path.join(dest, 'stoichiometry.npz'))
+            if request.get('gene_index', False):
+                from .geneindex import DEFAULT_FILENAME
+                gene_index_builder.build().save(
+                    os.path.join(dest, DEFAULT_FILENAME))
+            if request.get('snapshot', False):
+                from .snapshot import save_snapshot
+                save_snapshot(model, os.path.join(dest, 'model.snapshot'))
+            response['dest'] = dest
+
+        response['elapsed'] = time.time() - start_time
+        return response
+
+    def handle(self, request):
+        """Handle request and return response object."""
+        command = request.get('command', 'import')
+        try:
+            if command == 'import':
+                return self.import_model(request)
+            elif command == 'list':
+                return {'status': 'ok', 'importers': self.list()}
+            elif command == 'ping':
+                return {'status': 'ok', 'pid': os.getpid()}
+            raise ValueError('Unknown command: {}'.format(command))
+        except Exception as e:
+            logger.warning('Request failed: {}'.format(request),
+                           exc_info=True)
+            return {'status': 'error', 'error': '{}: {}'.format(
+                type(e).__name__, e)}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            request = _receive(self.rfile)
+            if request is None:
+                break
+
+            if request.get('command') == 'shutdown':
+                _send(self.connection, {'status': 'ok'})
+                threading.Thread(target=self.server.shutdown).start()
+                break
+
+            _send(self.connection, self.server.service.handle(request))
+
+
+def _remove_stale_socket(path):
+    """Remove socket file at path unless a daemon is listening on it."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise IOError('Not a socket: {}'.format(path))
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error as e:
+        if e.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+            raise
+    else:
+        raise IOError('Import daemon already running on {}'.format(path))
+    finally:
+        sock.close()
+
+    logger.info('Removing stale socket {}'.format(path))
+    try:
+        os.unlink(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+class ImportServer(socketserver.ThreadingMixIn,
+                   socketserver.UnixStreamServer):
+    """Threaded Unix socket server for import requests."""
+
+    daemon_threads = True
+
+    def __init__(self, path, service=None):
+        """Listen on the Unix socket at path.
+
+        Raises :class:`IOError` if a daemon is already listening on the
+        socket. A stale socket file left by a daemon that is no longer
+        running is removed.
+        """
+        _remove_stale_socket(path)
+        socketserver.UnixStreamServer.__init__(self, path, _RequestHandler)
+        self.service = service if service is not None else ImportService()
+
+    def server_close(self):
+        """Close server and remove the socket file."""
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+class ImportClient(object):
+    """Client connection to the import daemon."""
+
+    def __init__(self, path=None, timeout=None):
+        """Connect to daemon listening on the Unix socket at path."""
+        if path is None:
+            path = default_socket_path()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(path)
+        self._file = self._sock.makefile('rb')
+
+    def request(self, **request):
+        """Send request and return the response object."""
+        _send(self._sock, request)
+        response = _receive(self._file)
+        if response is None:
+            raise IOError('Connection closed by import daemon')
+        return response
+
+    def import_model(self, format, source, dest=None, **kwargs):
+        """Request import of model and return the response object."""
+        return self.request(
+            command='import', format=format, source=os.path.abspath(source),
+            dest=None if dest is None else os.path.abspath(dest), **kwargs)
+
+    def close(self):
+        """Close the connection."""
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        """Return the client."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the connection."""
+        self.close()
+
+
+def main(args=None):
+    """Entry point of the import daemon and client."""
+    parser = argparse.ArgumentParser(
+        description='Import daemon keeping importers and workbooks loaded')
+    parser.add_argument('--socket', metavar='path',
+                        default=default_socket_path(),
+                        help='Path of Unix socket of the daemon')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    subparsers.add_parser('serve', help='Run import daemon')
+    subparsers.add_parser('ping', help='Check whether daemon is running')
+    subparsers.add_parser('list', help='List importers')
+    subparsers.add_parser('shutdown', help='Stop import daemon')
+
+    import_parser = subparsers.add_parser(
+        'import', help='Import model using the daemon')
+    import_parser.add_argument('format', help='Format to import')
+    import_parser.add_argument('--source', metavar='path', default='.',
+                               help='Source directory or file')
+    import_parser.add_argument('--dest', metavar='path',
+                               help='Destination directory')
+    import_parser.add_argument('--no-exchange', action='store_true',
+                               help=('Disable importing exchange reactions'
+                                     ' as exchange compound file.'))
+    import_parser.add_argument('--split-subsystem', action='store_true',
+                               help=('Enable splitting reaction files by'
+                                     ' subsystem'))
+    import_parser.add_argument('--force', action='store_true',
+                               help='Enable overwriting model files')
+    import_parser.add_argument('--matrix', action='store_true',
+                               help=('Save stoichiometric matrix as'
+                                     ' stoichiometry.npz in destination'))
+    import_parser.add_argument('--snapshot', action='store_true',
+                               help=('Save binary snapshot of model as'
+                                     ' model.snapshot in destination'))
+    import_parser.add_argument('--gene-index', action='store_true',
+                               help=('Save index of the reactions of each'
+                                     ' gene as genes.tsv.gz in destination'))
+    import_parser.add_argument('--create-missing', action='store_true',
+                               default=None,
+                               help=('Create placeholders for compounds'
+                                     ' that are used but not defined'))
+    import_parser.add_argument('--row-limit', type=int, metavar='n',
+                               help=('Preview: read only the first n rows of'
+                                     ' each sheet'))
+    import_parser.add_argument('--row-step', type=int, default=1,
+                               metavar='k',
+                               help='Preview: read only every k-th row')
+    import_parser.add_argument('--compress',
+                               choices=sorted(_COMPRESSION_EXTENSIONS),
+                               help=('Write model as single compressed file'
+                                     ' instead of YAML files'))
+
+    args = parser.parse_args(args)
+
+    if args.command == 'serve':
+        logging.basicConfig(
+            level=logging.INFO, format='%(levelname)s: %(message)s')
+        try:
+            server = ImportServer(args.socket)
+        except IOError as e:
+            print('Error: {}'.format(e), file=sys.stderr)
+            sys.exit(1)
+        logger.info('Listening on {}'.format(args.socket))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    with ImportClient(args.socket) as client:
+        if args.command == 'import':
+            response = client.import_model(
+                args.format, args.source, args.dest, force=args.force,
+                no_exchange=args.no_exchange,
+                split_subsystem=args.split_subsystem, matrix=args.matrix,
+                snapshot=args.snapshot, compression=args.compress,
+                create_missing=args.create_missing,
+                gene_index=args.gene_index, row_limit=args.row_limit,
+                row_step=args.row_step)
+        else:
+            response = client.request(command=args.command)
+
+    if response['status'] != 'ok':
+        print('Error: {}'.format(response['error']), file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'import':
+        model = response['model']
+        print('Model: {}'.format(model['name']))
+        print('- Biomass reaction: {}'.format(model['biomass']))
+        print('- Compounds: {}'.format(model['compounds']))
+        print('- Reactions: {}'.format(model['reactions']))
+        print('- Genes: {}'.format(model['genes']))
+        for category, count in sorted(response['report'].items()):
+            print('- Reported {}: {}'.format(category, count))
+        print('Imported in {:.3f} s'.format(response['elapsed']))
+    elif args.command == 'list':
+        for name, title in response['importers']:
+            print('{:<12}  {}'.format(name, title))
+    elif args.command == 'ping':
+        print('Import daemon running (pid {})'.format(response['pid']))
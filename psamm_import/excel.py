@@ -20,11 +20,11 @@
 
 import os
 import re
-import csv
 import glob
+import logging
+from collections import OrderedDict, Counter
 
-import xlrd
-from six import string_types
+from six import string_types, iteritems, itervalues
 
 from psamm.datasource import native
 from psamm.datasource.reaction import ReactionParser
@@ -35,42 +35,414 @@ from psamm.reaction import Reaction, Compound, Direction
 from psamm.expression import boolean
 from psamm.importer import Importer, ModelLoadError
 
+from .compact import compact_entries, compact_entry
+from .fixup import FixupTable, Split, Substitute
+from .lazy import LazyModel
+from .normalize import (CompoundIdIndex, CompoundTranslator,
+                        EquationNormalizer, merge_duplicate_entries)
+from .observer import observe
+from .ptt import open_gene_index
+from .report import ImportReport
+from .registry import (ImporterInfo, EColiTextbookImportInfo,
+                       ImportGSMN_TBInfo, ImportModelSEEDInfo,
+                       ImportSTMv1_0Info, ImportShewanellaOngInfo,
+                       ImportiCce806Info, ImportiJN746Info, ImportiJO1366Info,
+                       ImportiJP815Info, ImportiMA945Info, ImportiMR1_799Info,
+                       ImportiMR4_812Info, ImportiNJ661Info, ImportiNJ661mInfo,
+                       ImportiNJ661vInfo, ImportiOS217_672Info,
+                       ImportiRR1083Info, ImportiSyn731Info,
+                       ImportiW3181_789Info)
+from .validate import SheetLayout, check_sheet
+from .workbook import open_workbook
+
+logger = logging.getLogger(__name__)
+
+
+class ImportState(object):
+    """State of a single model import.
+
+    The importers do not keep any state of an import on the importer
+    instance. Instead, the file contexts and workbooks opened for an import
+    are stored as attributes of an instance of this class which is passed to
+    the methods reading the model entries.
+    """
 
-class ImportiMA945(Importer):
-    """Importer for iMA945 model."""
-
-    name = 'iMA945'
-    title = 'Salmonella enterica iMA945 (Excel format), AbuOun et al., 2009'
-
-    filename = 'jbc.M109.005868-5.xls'
+    def __init__(self, source):
+        """Create state for importing model from source."""
+        self.source = source
+        self.observers = ()
+        self.report = None
+        self.create_missing = False
+        self.row_limit = None
+        self.row_step = 1
+        self.reaction_filter = None
+        self.referenced_compounds = False
+        self.compact = False
+        self.lazy = False
+        self.model_name = None
+        self.compound_ids = None
+
+
+class ExcelImporter(ImporterInfo, Importer):
+    """Base class of importers reading models from Excel workbooks.
+
+    Subclasses open the workbooks of the source in :meth:`_open_workbooks`
+    and read the model entries in :meth:`_read_compounds` and
+    :meth:`_read_reactions`. The default :meth:`_open_workbooks` opens the
+    workbook ``filename`` in the source directory (or the source file
+    itself). Other files that are needed for the import are read in
+    :meth:`_open_source`.
+
+    All state of an import is kept in an :class:`ImportState` so
+    :meth:`import_model` is reentrant and a single importer instance can be
+    used to import models concurrently from multiple threads.
+
+    Observers (see :mod:`psamm_import.observer`) given to
+    :meth:`import_model` see each entry as it is read from the source.
+
+    Compound entries with the same ID (e.g. the same compound listed for
+    multiple compartments) are merged (see
+    :func:`psamm_import.normalize.merge_duplicate_entries`). The number of
+    rows of each compound ID is counted by :meth:`_count_compound_ids` so
+    the entries can be merged while the sheet is read.
+
+    For a quick preview, the rows read can be limited to the first
+    ``row_limit`` rows of each sheet and/or every ``row_step``-th row. The
+    remaining rows are not parsed.
+
+    A ``reaction_filter`` (see :mod:`psamm_import.filters`) selects the
+    reactions to import. It is applied to the raw cells of each reaction
+    row so the rows that are left out are not parsed. With
+    ``referenced_compounds``, the reactions are read first and only the
+    compounds used in the selected reactions are imported.
+
+    With ``compact``, the entries are converted to compact entries (see
+    :mod:`psamm_import.compact`) which use less memory. With ``lazy``, a
+    :class:`psamm_import.lazy.LazyModel` is returned which reads the
+    entries from the source when they are accessed.
+
+    :meth:`validate` checks the structure of a source against
+    :attr:`sheet_layouts` without importing the model.
+
+    Compounds that are used in reaction equations but not defined in the
+    source are found after the entries have been read. They are added to
+    the report and, if ``create_missing_compounds`` is enabled, placeholder
+    entries are added to the model. The name of a placeholder is looked up
+    in ``missing_compound_names`` and defaults to the compound ID.
+    """
 
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
+    biomass_reaction = None
+    extracellular_compartment = None
+
+    create_missing_compounds = False
+    missing_compound_names = {}
+
+    reaction_fixups = FixupTable()
+
+    # Layouts of the sheets read by the importer (for validate())
+    sheet_layouts = ()
+
+    def import_model(self, source, observers=(), report=None,
+                     create_missing=None, row_limit=None, row_step=1,
+                     reaction_filter=None, referenced_compounds=False,
+                     compact=False, lazy=False):
+        """Import and return model instance.
+
+        Args:
+            source: Source directory or file.
+            observers: Import observers (see :mod:`psamm_import.observer`).
+            report: :class:`psamm_import.report.ImportReport` to add issues
+                found during the import to (optional).
+            create_missing: Whether to create placeholders for undefined
+                compounds (defaults to ``create_missing_compounds``).
+            row_limit: Maximum number of rows to read from each sheet
+                (optional, for previews).
+            row_step: Read only every ``row_step``-th row (for previews).
+            reaction_filter: :class:`psamm_import.filters.ReactionFilter`
+                selecting the reactions to import (optional).
+            referenced_compounds: Only import the compounds used in the
+                imported reactions.
+            compact: Return the entries as compact read-only entries.
+            lazy: Return model that reads the entries on access.
+        """
+        return self._import(self._open(
+            source, observers, report, create_missing, row_limit, row_step,
+            reaction_filter, referenced_compounds, compact, lazy))
+
+    def _open(self, source, *args, **kwargs):
+        """Open source and return state with the import options set.
+
+        The arguments after the source are the options of
+        :meth:`import_model`.
+        """
+        state = self._open_source(source)
+        self._set_options(state, *args, **kwargs)
+        return state
+
+    def _set_options(self, state, observers=(), report=None,
+                     create_missing=None, row_limit=None, row_step=1,
+                     reaction_filter=None, referenced_compounds=False,
+                     compact=False, lazy=False):
+        state.observers = tuple(observers)
+        state.report = report
+        if create_missing is None:
+            create_missing = self.create_missing_compounds
+        state.create_missing = create_missing
+        if row_limit is not None and row_limit < 0:
+            raise ValueError('Invalid row limit: {}'.format(row_limit))
+        if row_step < 1:
+            raise ValueError('Invalid row step: {}'.format(row_step))
+        state.row_limit = row_limit
+        state.row_step = row_step
+        state.reaction_filter = reaction_filter
+        state.referenced_compounds = referenced_compounds
+        state.compact = compact
+        state.lazy = lazy
+
+    def _rows(self, state, sheet, start):
+        """Return range of the indices of the rows to read from sheet.
+
+        The rows from ``start`` are limited by the row limit and step of the
+        import.
+        """
+        stop = sheet.nrows
+        if state.row_limit is not None:
+            stop = min(stop, start + state.row_limit * state.row_step)
+        return range(start, stop, state.row_step)
+
+    def _skip_reaction(self, state, reaction_id, subsystem=None,
+                       equation=None):
+        """Return True if the reaction row is left out by the filter."""
+        return (state.reaction_filter is not None and
+                not state.reaction_filter.accepts(
+                    reaction_id, subsystem, equation))
+
+    def validate(self, source):
+        """Check the structure of the source without importing the model.
+
+        The source files, the sheets and the ID columns are checked against
+        :attr:`sheet_layouts`. Equations, formulas and gene associations are
+        not parsed. Returns a :class:`psamm_import.report.ImportReport` of
+        the issues found (see :mod:`psamm_import.validate`), which is empty
+        if no issues were found.
+        """
+        report = ImportReport()
+        missing = [path for path in self.source_files(source)
+                   if not os.path.exists(path)]
+        for path in missing:
+            report.add('missing_file', path)
+        if len(missing) > 0:
+            return report
+
+        try:
+            state = self._open_workbooks(source)
+        except Exception as e:
+            report.add('invalid_source', source, '{}: {}'.format(
+                type(e).__name__, e))
+            return report
+
+        for layout in self.sheet_layouts:
+            skip = None
+            if layout.kind == 'reactions':
+                skip = self.reaction_fixups.skip
+            check_sheet(
+                getattr(state, layout.book), layout, report, skip=skip)
+        return report
+
+    def import_model_async(self, source, **kwargs):
+        """Return coroutine importing the model without blocking.
+
+        See :func:`psamm_import.aio.import_model_async` for the keyword
+        arguments. Requires Python 3.
+        """
+        from .aio import import_model_async
+        return import_model_async(self, source, **kwargs)
+
+    def _import(self, state):
+        model = self._create_model(state)
+        for entries, entry_set in self._iter_entry_sets(state, model):
+            entry_set.update(entries)
+        return model
 
-    def import_model(self, source):
-        """Import and return model instance."""
+    def _iter_entry_sets(self, state, model):
+        """Yield the entries to read paired with the entry set of model.
+
+        These are the steps of an import after the model is created; they
+        are shared by :meth:`import_model` and the asyncio interface (see
+        :mod:`psamm_import.aio`). Each entry set must be updated with the
+        entries before the generator is resumed and the import is finished
+        when the generator is exhausted. If only the referenced compounds
+        are imported, the reactions are read first. For a lazy import,
+        nothing is yielded and the entries are read by the model on access.
+        """
+        if state.lazy:
+            compounds = self._iter_compounds(state)
+            if state.referenced_compounds:
+                compounds = self._iter_referenced_compounds(state, model)
+            model.defer(compounds, self._iter_reactions(state),
+                        lambda model: self._finish(state, model),
+                        compounds_need_reactions=state.create_missing)
+            return
+
+        if not state.referenced_compounds:
+            yield self._iter_compounds(state), model.compounds
+            yield self._iter_reactions(state), model.reactions
+        else:
+            yield self._iter_reactions(state), model.reactions
+            yield (self._iter_referenced_compounds(state, model),
+                   model.compounds)
+        self._finish(state, model)
+
+    def _iter_referenced_compounds(self, state, model):
+        """Yield the compounds used in the reactions of the model."""
+        referenced = set()
+        for reaction in model.reactions:
+            equation = reaction.properties.get('equation')
+            if equation is not None:
+                referenced.update(
+                    compound.name for compound, _ in equation.compounds)
+        for entry in self._iter_compounds(state):
+            if entry.id in referenced:
+                yield entry
+
+    def _iter_compounds(self, state):
+        entries = self._merge_compounds(state)
+        if state.compact:
+            entries = compact_entries(entries)
+        return observe(entries, [
+            observer.compound for observer in state.observers])
+
+    def _merge_compounds(self, state):
+        counts = self._count_compound_ids(state)
+        for entry in merge_duplicate_entries(
+                self._read_compounds(state), state.report, counts):
+            yield entry
+
+    def _count_compound_ids(self, state):
+        """Return dict of the number of rows of each compound ID.
+
+        The default counts the IDs in the ID column of the compounds sheet
+        in :attr:`sheet_layouts`. Importers that change the IDs when they
+        are read must count the changed IDs. If None is returned, the
+        duplicate compounds are merged after all rows have been read.
+        """
+        for layout in self.sheet_layouts:
+            if layout.kind == 'compounds':
+                sheet = getattr(state, layout.book).sheet_by_name(layout.name)
+                return Counter(sheet.col_values(
+                    layout.id_column, start_rowx=layout.start))
+        return None
+
+    def _iter_reactions(self, state):
+        entries = self._read_reactions(state)
+        if state.compact:
+            entries = compact_entries(entries)
+        return observe(entries, [
+            observer.reaction for observer in state.observers])
+
+    def _finish(self, state, model):
+        if state.report is not None or state.create_missing:
+            self._add_missing_compounds(state, model)
+        for observer in state.observers:
+            observer.finish(model)
+
+    def _add_missing_compounds(self, state, model):
+        defined = set(compound.id for compound in model.compounds)
+        missing = OrderedDict()
+        for reaction in model.reactions:
+            equation = reaction.properties.get('equation')
+            if equation is None:
+                continue
+            for compound, _ in equation.compounds:
+                if (compound.name not in defined and
+                        compound.name not in missing):
+                    missing[compound.name] = reaction.id
+
+        for compound_id, reaction_id in iteritems(missing):
+            if state.report is not None:
+                state.report.add(
+                    'missing_compound', compound_id,
+                    'Used in {} but not defined'.format(reaction_id))
+            if state.create_missing:
+                entry = CompoundEntry(dict(
+                    id=compound_id, name=self.missing_compound_names.get(
+                        compound_id, compound_id)))
+                if state.compact:
+                    entry = compact_entry(entry)
+                for observer in state.observers:
+                    observer.compound(entry)
+                model.compounds.add_entry(entry)
+
+    def _open_source(self, source):
+        """Open source and return the import state.
+
+        The default only opens the workbooks (see :meth:`_open_workbooks`).
+        """
+        return self._open_workbooks(source)
+
+    def _open_workbooks(self, source):
+        """Open the workbooks of the source and return the import state.
+
+        Used by :meth:`validate` which does not need any other files to be
+        read.
+        """
+        state = ImportState(source)
         context = FilePathContext(source)
         if os.path.isdir(context.filepath):
             context = FilePathContext(os.path.join(source, self.filename))
 
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
+        state.context = context
+        state.book = open_workbook(context.filepath)
+        return state
 
-        model = native.NativeModel()
+    def _create_model(self, state):
+        model = LazyModel() if state.lazy else native.NativeModel()
         model.name = self.title
-        model.biomass_reaction = 'ST_biomass_core'
-        model.extracellular_compartment = 'e'
-        model.reactions.update(self._read_reactions())
-        model.compounds.update(self._read_compounds())
-
+        if state.model_name is not None:
+            model.name = state.model_name
+        if self.biomass_reaction is not None:
+            model.biomass_reaction = self.biomass_reaction
+        if self.extracellular_compartment is not None:
+            model.extracellular_compartment = self.extracellular_compartment
         return model
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('compounds')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        raise NotImplementedError()
+
+    def _read_reactions(self, state):
+        raise NotImplementedError()
+
+
+class ImportiMA945(ImportiMA945Info, ExcelImporter):
+    """Importer for iMA945 model."""
+
+    biomass_reaction = 'ST_biomass_core'
+    extracellular_compartment = 'e'
+
+    # Reaction equations and genes are messed up in a few rows
+    reaction_fixups = FixupTable(patch={
+        'FACOAL100t2pp': {
+            'equation': Substitute(r'STM1818$', ']'), 'genes': 'STM1818'},
+        'FACOAL80t2pp': {
+            'equation': Substitute(r'STM1818$', ']'), 'genes': 'STM1818'},
+        'FACOAL60t2pp': {
+            'equation': Substitute(r'STM1818$', ''), 'genes': 'STM1818'},
+        'NTRIR4pp': {
+            'equation': Split(r'^(?P<equation>.*nh4\[p\])(?P<genes>.*)$')},
+        'FE3DHBZSabcpp': {
+            'equation': Split(r'^(?P<equation>.*pi\[c\])(?P<genes>.*)$')},
+        '14GLUCANabcpp': {
+            'equation': Split(r'^(?P<equation>.*pi\[c\])(?P<genes>.*)$')}
+    })
+
+    sheet_layouts = (
+        SheetLayout('compounds', 'compounds', 1, 7, exact=True),
+        SheetLayout('reactions', 'reactions', 1, 4, unique=True),
+    )
+
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('compounds')
+        for i in self._rows(state, sheet, 1):
             compound_id, name, formula, charge, cas, formula_neutral, kegg = (
                 sheet.row_values(i))
 
@@ -106,43 +478,33 @@ class ImportiMA945(Importer):
 
             kegg = None if kegg == '' else kegg
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, formula=formula,
                 formula_neutral=formula_neutral,
                 charge=charge, kegg=kegg), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<==>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows, parse_global=True)
 
-        sheet = self._book.sheet_by_name('reactions')
-        for i in range(1, sheet.nrows):
+        sheet = state.book.sheet_by_name('reactions')
+        for i in self._rows(state, sheet, 1):
             reaction_id, name, equation, genes = (
                 sheet.row_values(i, end_colx=4))
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, None, equation):
+                continue
 
             # Fixup model errors
-            if reaction_id in ('FACOAL100t2pp', 'FACOAL80t2pp'):
-                # Reaction equation and genes are messed up
-                equation = re.sub(r'STM1818$', ']', equation)
-                genes = 'STM1818'
-            elif reaction_id == 'FACOAL60t2pp':
-                equation = re.sub(r'STM1818$', '', equation)
-                genes = 'STM1818'
-            elif reaction_id == 'NTRIR4pp':
-                m = re.match(r'^(.*nh4\[p\])(.*)$', equation)
-                equation = m.group(1)
-                genes = m.group(2)
-            elif reaction_id in ('FE3DHBZSabcpp', '14GLUCANabcpp'):
-                m = re.match(r'^(.*pi\[c\])(.*)$', equation)
-                equation = m.group(1)
-                genes = m.group(2)
+            cells = self.reaction_fixups.patch(
+                reaction_id, dict(equation=equation, genes=genes))
+            equation, genes = cells['equation'], cells['genes']
 
             name = None if name == '' else name
 
@@ -154,47 +516,26 @@ class ImportiMA945(Importer):
 
             genes = self._try_parse_gene_association(reaction_id, genes)
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name,
                 genes=genes, equation=equation), filemark=filemark)
 
 
-class ImportiRR1083(Importer):
+class ImportiRR1083(ImportiRR1083Info, ExcelImporter):
     """Importer for iRR1083 model."""
 
-    name = 'iRR1083'
-    title = ('Salmonella enterica iRR1083 (Excel format),'
-             ' Raghunathan et al., 2009')
-
-    filename = '1752-0509-3-38-s1.xls'
-
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
-
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
-
-        model = native.NativeModel()
-        model.name = self.title
-        model.extracellular_compartment = 'e'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
+    extracellular_compartment = 'e'
 
-        return model
+    sheet_layouts = (
+        SheetLayout('compounds', 'Metabolites', 1, 5, exact=True),
+        SheetLayout('reactions', 'Gene Protein Reaction iRR1083', 3, 6,
+                    id_column=2, unique=True),
+    )
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('Metabolites')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('Metabolites')
+        for i in self._rows(state, sheet, 1):
             compound_id, name, formula_neutral, charge, kegg = (
                 sheet.row_values(i))
 
@@ -213,27 +554,29 @@ class ImportiRR1083(Importer):
 
             kegg = None if kegg == '' else kegg
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name,
                 formula=formula_neutral,
                 formula_neutral=formula_neutral,
                 charge=charge, kegg=kegg), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<==>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows, parse_global=True)
 
-        sheet = self._book.sheet_by_name('Gene Protein Reaction iRR1083')
-        for i in range(3, sheet.nrows):
+        sheet = state.book.sheet_by_name('Gene Protein Reaction iRR1083')
+        for i in self._rows(state, sheet, 3):
             genes, protein, reaction_id, name, equation, subsystem = (
                 sheet.row_values(i, end_colx=6))
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             genes = self._try_parse_gene_association(reaction_id, genes)
             protein = None if protein == '' else protein
@@ -247,55 +590,40 @@ class ImportiRR1083(Importer):
 
             subsystem = None if subsystem == '' else subsystem
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation), filemark=filemark)
 
 
-class ImportiJO1366(Importer):
+class ImportiJO1366(ImportiJO1366Info, ExcelImporter):
     """Importer for iJO1366 model."""
 
-    name = 'iJO1366'
-    title = ('Escerichia coli iJO1366 (Excel format),'
-             ' Orth et al., 2011')
+    biomass_reaction = 'Ec_biomass_iJO1366_core_53p95M'
+    extracellular_compartment = 'e'
 
-    filename = 'inline-supplementary-material-2.xls'
-
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
-
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
-
-        model = native.NativeModel()
-        model.name = self.title
-        model.biomass_reaction = 'Ec_biomass_iJO1366_core_53p95M'
-        model.extracellular_compartment = 'e'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
+    sheet_layouts = (
+        SheetLayout('compounds', 'Table 3', 1, 9),
+        SheetLayout('reactions', 'Table 2', 1, 9, unique=True),
+    )
 
-        return model
+    def _count_compound_ids(self, state):
+        sheet = state.book.sheet_by_name('Table 3')
+        state.compound_ids = CompoundIdIndex(
+            sheet.col_values(0, start_rowx=1))
+        return state.compound_ids.counts
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('Table 3')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('Table 3')
+        compound_ids = state.compound_ids
+        for i in self._rows(state, sheet, 1):
             (compound_id, name, formula_neutral, formula, charge, compartment,
                 kegg, cas, alt_names) = sheet.row_values(i, end_colx=9)
 
             if compound_id.strip() == '':
                 continue
 
-            compound_id = re.match(r'^(.*)\[.\]$', compound_id).group(1)
+            compound_id = compound_ids[compound_id]
             name = None if name.strip() == '' else name
 
             formula_neutral = self._try_parse_formula(
@@ -310,27 +638,29 @@ class ImportiJO1366(Importer):
             kegg = None if kegg.strip() == '' else kegg
             cas = None if cas.strip() == '' else cas
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name,
                 formula=formula,
                 formula_neutral=formula_neutral,
                 charge=charge, kegg=kegg, cas=cas), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('->', Direction.Forward),
             ('<=>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows)
 
-        sheet = self._book.sheet_by_name('Table 2')
-        for i in range(1, sheet.nrows):
+        sheet = state.book.sheet_by_name('Table 2')
+        for i in self._rows(state, sheet, 1):
             (reaction_id, name, equation, _, genes, _, subsystem, ec,
                 reversible) = sheet.row_values(i, end_colx=9)
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             genes = self._try_parse_gene_association(reaction_id, genes)
             name = None if name.strip() == '' else name
@@ -344,48 +674,33 @@ class ImportiJO1366(Importer):
             subsystem = None if subsystem.strip() == '' else subsystem
             ec = None if ec.strip() == '' else ec
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, subsystem=subsystem,
                 ec=ec), filemark=filemark)
 
 
-class EColiTextbookImport(Importer):
+class EColiTextbookImport(EColiTextbookImportInfo, ExcelImporter):
     """Importer for E. coli core textbook model."""
 
-    name = 'EColi_textbook'
-    title = ('Escerichia coli Textbook (core) model (Excel format),'
-             ' Orth et al., 2010')
-
-    filename = 'ecoli_core_model.xls'
-
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
-
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
+    extracellular_compartment = 'e'
 
-        model = native.NativeModel()
-        model.name = self.title
-        model.extracellular_compartment = 'e'
-        model.reactions.update(self._read_reactions())
-        model.compounds.update(self._read_compounds())
+    sheet_layouts = (
+        SheetLayout('compounds', 'metabolites', 1, 8),
+        SheetLayout('reactions', 'reactions', 1, 11, unique=True),
+    )
 
-        return model
+    def _count_compound_ids(self, state):
+        sheet = state.book.sheet_by_name('metabolites')
+        state.compound_ids = CompoundIdIndex(
+            sheet.col_values(0, start_rowx=1))
+        return state.compound_ids.counts
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('metabolites')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('metabolites')
+        compound_ids = state.compound_ids
+        for i in self._rows(state, sheet, 1):
             (compound_id, name, formula, charge, cas, formula_neutral,
                 alt_names, kegg) = sheet.row_values(i, end_colx=8)
 
@@ -393,9 +708,7 @@ class EColiTextbookImport(Importer):
                 continue
 
             # Skip compartmentalized compounds
-            m = re.match(r'^(.*)\[.\]$', compound_id)
-            if m:
-                compound_id = m.group(1)
+            compound_id = compound_ids[compound_id]
 
             name = None if name.strip() == '' else name
             formula = None if formula.strip() == '' else formula
@@ -412,27 +725,29 @@ class EColiTextbookImport(Importer):
             cas = None if cas.strip() == '' or cas == 'None' else cas
             kegg = None if kegg.strip() == '' else kegg
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name,
                 formula=formula,
                 formula_neutral=formula_neutral,
                 charge=charge, kegg=kegg, cas=cas), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<==>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows, parse_global=True)
 
-        sheet = self._book.sheet_by_name('reactions')
-        for i in range(1, sheet.nrows):
+        sheet = state.book.sheet_by_name('reactions')
+        for i in self._rows(state, sheet, 1):
             (reaction_id, name, equation, subsystem, ec, _, _, _, _, _,
                 genes) = sheet.row_values(i, end_colx=11)
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             genes = self._try_parse_gene_association(reaction_id, genes)
             name = None if name.strip() == '' else name
@@ -446,48 +761,28 @@ class EColiTextbookImport(Importer):
             subsystem = None if subsystem.strip() == '' else subsystem
             ec = None if ec.strip() == '' else ec
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes, equation=equation,
                 subsystem=subsystem, ec=ec), filemark=filemark)
 
 
-class ImportSTMv1_0(Importer):  # noqa
+class ImportSTMv1_0(ImportSTMv1_0Info, ExcelImporter):  # noqa
     """Importer for STM_v1.0 model."""
 
-    name = 'STM_v1.0'
-    title = ('Salmonella enterica STM_v1.0 (Excel format),'
-             ' Thiele et al., 2011')
+    biomass_reaction = 'biomass_iRR1083_metals'
+    extracellular_compartment = 'e'
 
-    filename = '1752-0509-5-8-s1.xlsx'
-
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
-
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
-
-        model = native.NativeModel()
-        model.name = self.title
-        model.biomass_reaction = 'biomass_iRR1083_metals'
-        model.extracellular_compartment = 'e'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
-
-        return model
+    sheet_layouts = (
+        SheetLayout('compounds', 'SI Tables - S2b - Metabolites', 2, 9,
+                    id_column=1),
+        SheetLayout('reactions', 'SI Tables - S2a - Reactions', 4, 6,
+                    unique=True),
+    )
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('SI Tables - S2b - Metabolites')
-        for i in range(2, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('SI Tables - S2b - Metabolites')
+        for i in self._rows(state, sheet, 2):
             _, compound_id, name, formula, charge, _, kegg, pubchem, chebi = (
                 sheet.row_values(i, end_colx=9))
 
@@ -504,25 +799,27 @@ class ImportSTMv1_0(Importer):  # noqa
 
             kegg = None if kegg.strip() == '' else kegg
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name,
                 formula=formula, charge=charge, kegg=kegg), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<=>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows)
 
-        sheet = self._book.sheet_by_name('SI Tables - S2a - Reactions')
-        for i in range(4, sheet.nrows):
+        sheet = state.book.sheet_by_name('SI Tables - S2a - Reactions')
+        for i in self._rows(state, sheet, 4):
             reaction_id, name, equation, genes, _, subsystem = (
                 sheet.row_values(i, end_colx=6))
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             name = None if name.strip() == '' else name.strip()
 
@@ -535,56 +832,45 @@ class ImportSTMv1_0(Importer):  # noqa
             subsystem = None if subsystem.strip() == '' else subsystem
             genes = self._try_parse_gene_association(reaction_id, genes)
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name,
                 genes=genes, equation=equation,
                 subsystem=subsystem), filemark=filemark)
 
 
-class ImportiJN746(Importer):
+class ImportiJN746(ImportiJN746Info, ExcelImporter):
     """Importer for iJN746 model."""
 
-    name = 'iJN746'
-    title = ('Pseudomonas putida iJN746 (Excel format),'
-             ' Nogales et al., 2011')
-
-    filenames = ('1752-0509-2-79-s8.xls',
-                 '1752-0509-2-79-s9.xls')
+    extracellular_compartment = 'e'
 
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:')
-        for filename in self.filenames:
-            print('- {}'.format(filename))
+    sheet_layouts = (
+        SheetLayout('compounds', 'Additional file 8', 1, 8,
+                    book='compound_book'),
+        SheetLayout('reactions', 'Additional file 9', 1, 7,
+                    book='reaction_book', unique=True),
+    )
 
-    def import_model(self, source):
-        """Import and return model instance."""
+    def _open_workbooks(self, source):
         if not os.path.isdir(source):
             raise ModelLoadError('Source must be a directory')
 
-        self._compound_context = FilePathContext(
+        state = ImportState(source)
+        state.compound_context = FilePathContext(
             os.path.join(source, self.filenames[0]))
-        self._reaction_context = FilePathContext(
+        state.reaction_context = FilePathContext(
             os.path.join(source, self.filenames[1]))
 
-        self._compound_book = xlrd.open_workbook(
-            self._compound_context.filepath)
-        self._reaction_book = xlrd.open_workbook(
-            self._reaction_context.filepath)
-
-        model = native.NativeModel()
-        model.name = self.title
-        model.extracellular_compartment = 'e'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
+        state.compound_book = open_workbook(
+            state.compound_context.filepath)
+        state.reaction_book = open_workbook(
+            state.reaction_context.filepath)
 
-        return model
+        return state
 
-    def _read_compounds(self):
-        sheet = self._compound_book.sheet_by_name('Additional file 8')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.compound_book.sheet_by_name('Additional file 8')
+        for i in self._rows(state, sheet, 1):
             (compound_id, name, formula, charge, cas, formula_neutral, _,
                 kegg) = sheet.row_values(i, end_colx=8)
 
@@ -609,26 +895,28 @@ class ImportiJN746(Importer):
             else:
                 cas = str(cas)
 
-            filemark = FileMark(self._compound_context, i, None)
+            filemark = FileMark(state.compound_context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, formula=formula,
                 formula_neutral=formula_neutral,
                 charge=charge, kegg=kegg, cas=cas), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<==>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows, parse_global=True)
 
-        sheet = self._reaction_book.sheet_by_name('Additional file 9')
-        for i in range(1, sheet.nrows):
+        sheet = state.reaction_book.sheet_by_name('Additional file 9')
+        for i in self._rows(state, sheet, 1):
             reaction_id, name, equation, subsystem, ec, _, genes = (
                 sheet.row_values(i, end_colx=7))
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             name = None if name.strip() == '' else name
 
@@ -642,47 +930,33 @@ class ImportiJN746(Importer):
             ec = None if ec.strip() == '' else ec
             genes = self._try_parse_gene_association(reaction_id, genes)
 
-            filemark = FileMark(self._reaction_context, i, None)
+            filemark = FileMark(state.reaction_context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name,
                 genes=genes, equation=equation,
                 subsystem=subsystem, ec=ec), filemark=filemark)
 
 
-class ImportiJP815(Importer):
+class ImportiJP815(ImportiJP815Info, ExcelImporter):
     """Importer for iJP815 model."""
 
-    name = 'iJP815'
-    title = ('Pseudomonas putida iJP815 (Excel format),'
-             ' Puchalka et al., 2008')
-
-    filename = 'journal.pcbi.1000210.s011.XLS'
-
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
-
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
-
-        model = native.NativeModel()
-        model.name = self.title
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
+    sheet_layouts = (
+        SheetLayout('compounds', 'Metabolites', 1, 2),
+        SheetLayout('reactions', 'Reactions', 1, 11, unique=True),
+    )
 
-        return model
+    def _count_compound_ids(self, state):
+        sheet = state.book.sheet_by_name('Metabolites')
+        counts = Counter()
+        for compound_id in sheet.col_values(0, start_rowx=1):
+            m = re.match(r'^(E|I)(C\d+)$', compound_id)
+            if m:
+                counts[m.group(2)] += 1
+        return counts
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('Metabolites')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('Metabolites')
+        for i in self._rows(state, sheet, 1):
             compound_id, name = sheet.row_values(i, end_colx=2)
 
             if compound_id.strip() == '':
@@ -697,87 +971,73 @@ class ImportiJP815(Importer):
             if m:
                 name = m.group(1)
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, kegg=kegg), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<==>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows)
 
-        sheet = self._book.sheet_by_name('Reactions')
-        for i in range(1, sheet.nrows):
+        # Compartment information is encoded in the compound IDs
+        def translate(c):
+            compartment = 'e' if c.name[0] == 'E' else None
+            return Compound(c.name[1:], compartment=compartment)
+        translator = CompoundTranslator(translate)
+
+        sheet = state.book.sheet_by_name('Reactions')
+        for i in self._rows(state, sheet, 1):
             (reaction_id, name, equation, _, _, _, _, _, _, subsystem,
                 genes) = sheet.row_values(i, end_colx=11)
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             name = None if name.strip() == '' else name
 
             if equation.strip() != '':
                 equation = self._try_parse_reaction(
                     reaction_id, equation, parser=parser.parse)
-
-                # Rebuild reaction with compartment information
-                def translate(c, v):
-                    compartment = 'e' if c.name[0] == 'E' else None
-                    return Compound(c.name[1:], compartment=compartment), v
-
-                equation = Reaction(
-                    equation.direction,
-                    (translate(c, v) for c, v in equation.compounds))
+                equation = translator.translate_reaction(equation)
             else:
                 equation = None
 
             subsystem = None if subsystem.strip() == '' else subsystem
             genes = self._try_parse_gene_association(reaction_id, genes)
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, subsystem=subsystem), filemark=filemark)
 
+        translator.add_to_report(state.report)
 
-class ImportiSyn731(Importer):
-    """Importer for iSyn731."""
 
-    name = 'iSyn731'
-    title = ('Synechocystis sp. PCC 6803 iSyn731 (Excel format),'
-             ' Saha et al., 2012')
-
-    filename = 'journal.pone.0048285.s001.XLSX'
-
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
+class ImportiSyn731(ImportiSyn731Info, ExcelImporter):
+    """Importer for iSyn731."""
 
-    def import_model(self, source):
-        """Import and return model instance."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
+    biomass_reaction = 'Biomass_Hetero'
+    extracellular_compartment = 'e'
 
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
+    normalize_equation = EquationNormalizer(['+'], quoted_compartments=True)
 
-        model = native.NativeModel()
-        model.name = self.title
-        model.biomass_reaction = 'Biomass_Hetero'
-        model.extracellular_compartment = 'e'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
+    reaction_fixups = FixupTable(rename={
+        'EX_Arsenic acid': 'EX_Arsenic_acid'
+    })
 
-        return model
+    sheet_layouts = (
+        SheetLayout('compounds', 'Metabolites', 1, 5, exact=True),
+        SheetLayout('reactions', 'Model', 2, 7, unique=True),
+    )
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('Metabolites')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('Metabolites')
+        for i in self._rows(state, sheet, 1):
             compound_id, name, formula, charge, kegg = (
                 sheet.row_values(i))
 
@@ -802,29 +1062,26 @@ class ImportiSyn731(Importer):
             else:
                 kegg = None
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, formula=formula,
                 charge=charge, kegg=kegg), filemark=filemark)
 
-    def _read_reactions(self):
-        sheet = self._book.sheet_by_name('Model')
-        for i in range(2, sheet.nrows):
+    def _read_reactions(self, state):
+        sheet = state.book.sheet_by_name('Model')
+        for i in self._rows(state, sheet, 2):
             reaction_id, name, ec, genes, _, equation, subsystem = (
                 sheet.row_values(i, end_colx=7))
-            if reaction_id.strip() == 'EX_Arsenic acid':
-                reaction_id = 'EX_Arsenic_acid'
+            reaction_id = self.reaction_fixups.rename(reaction_id)
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             name = None if name == '' else name
 
             if equation.strip() != '':
-                # check that this works correctly. should substitute the => for
-                # a space then =>. the double spaces should be ignored though.
-                equation = re.sub(r'\s*\+\s*', ' + ', equation)
-                equation = re.sub(r'\|\[(\w)\]', r'[\1]|', equation)
-                equation = equation.replace('||', '|')
+                equation = self.normalize_equation(equation)
                 equation = self._try_parse_reaction(reaction_id, equation)
             else:
                 equation = None
@@ -832,57 +1089,54 @@ class ImportiSyn731(Importer):
             genes = self._try_parse_gene_association(reaction_id, genes)
             ec = ec if ec.strip() != '' and ec != 'Undetermined' else None
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, subsystem=subsystem,
                 ec=ec), filemark=filemark)
 
 
-class ImportiCce806(Importer):
+class ImportiCce806(ImportiCce806Info, ExcelImporter):
     """Importer for iCce806 model."""
 
-    name = 'iCce806'
-    title = ('Cyanothece sp. ATCC 51142 iCce806 (Excel format),'
-             ' Vu et al., 2012')
+    biomass_reaction = 'CyanoBM (average)'
+    extracellular_compartment = 'e'
 
-    filenames = ('journal.pcbi.1002460.s005.XLSX',
-                 'journal.pcbi.1002460.s006.XLSX')
+    normalize_equation = EquationNormalizer(['+', '-->', '<==>'])
 
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:')
-        for filename in self.filenames:
-            print('- {}'.format(filename))
+    # Notes and column descriptions at the end of the reaction sheet
+    reaction_fixups = FixupTable(skip=[
+        'Notes:', 'Abbreviation', 'AL', 'LL', 'Column headings',
+        'Column H through K', 'Column H', 'Column I', 'Column J', 'Column K'
+    ])
 
-    def import_model(self, source):
-        """Import and return model instance."""
+    sheet_layouts = (
+        SheetLayout('compounds', 'Table S2', 2, 8, book='compound_book',
+                    exact=True),
+        SheetLayout('reactions', 'S1 - Reactions', 1, 7,
+                    book='reaction_book', unique=True),
+    )
+
+    def _open_workbooks(self, source):
         if not os.path.isdir(source):
             raise ModelLoadError('Source must be a directory')
 
-        self._compound_context = FilePathContext(
+        state = ImportState(source)
+        state.compound_context = FilePathContext(
             os.path.join(source, self.filenames[1]))
-        self._reaction_context = FilePathContext(
+        state.reaction_context = FilePathContext(
             os.path.join(source, self.filenames[0]))
 
-        self._compound_book = xlrd.open_workbook(
-            self._compound_context.filepath)
-        self._reaction_book = xlrd.open_workbook(
-            self._reaction_context.filepath)
+        state.compound_book = open_workbook(
+            state.compound_context.filepath)
+        state.reaction_book = open_workbook(
+            state.reaction_context.filepath)
 
-        model = native.NativeModel()
-        model.name = self.title
-        model.biomass_reaction = 'CyanoBM (average)'
-        model.extracellular_compartment = 'e'
-        model.reactions.update(self._read_reactions())
-        model.compounds.update(self._read_compounds())
+        return state
 
-        return model
-
-    def _read_compounds(self):
-        sheet = self._compound_book.sheet_by_name('Table S2')
-        for i in range(2, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.compound_book.sheet_by_name('Table S2')
+        for i in self._rows(state, sheet, 2):
             (compound_id, name, formula, charge, cas, formula_neutral, _,
                 kegg) = sheet.row_values(i)
 
@@ -914,54 +1168,35 @@ class ImportiCce806(Importer):
             else:
                 cas = None
 
-            filemark = FileMark(self._compound_context, i, None)
+            filemark = FileMark(state.compound_context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, formula=formula,
                 formula_neutral=formula, charge=charge,
                 kegg=kegg, cas=cas), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<==>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows, parse_global=True)
 
-        sheet = self._reaction_book.sheet_by_name('S1 - Reactions')
-        for i in range(1, sheet.nrows):
+        sheet = state.reaction_book.sheet_by_name('S1 - Reactions')
+        for i in self._rows(state, sheet, 1):
             reaction_id, name, equation, _, genes, subsystem, ec = (
                 sheet.row_values(i, end_colx=7))
 
             if reaction_id.strip() == '':
                 continue
-            if reaction_id.strip() == 'Notes:':
-                continue
-            if reaction_id.strip() == 'Abbreviation':
-                continue
-            if reaction_id.strip() == 'AL':
-                continue
-            if reaction_id.strip() == 'LL':
-                continue
-            if reaction_id.strip() == 'Column headings':
+            if self.reaction_fixups.skip(reaction_id):
                 continue
-            if reaction_id.strip() == 'Column H through K':
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
                 continue
-            if reaction_id.strip() == 'Column H':
-                continue
-            if reaction_id.strip() == 'Column I':
-                continue
-            if reaction_id.strip() == 'Column J':
-                continue
-            if reaction_id.strip() == 'Column K':
-                continue
-            # Fixup model errors
 
             name = None if name == '' else name
 
             if equation.strip() != '':
-                equation = re.sub(r'\s*\+\s*', ' + ', equation)
-                equation = re.sub(r'\s*-->\s*', ' --> ', equation)
-                equation = re.sub(r'\s*<==>\s*', ' <==> ', equation)
+                equation = self.normalize_equation(equation)
                 equation = self._try_parse_reaction(
                     reaction_id, equation, parser=parser.parse)
             else:
@@ -977,117 +1212,100 @@ class ImportiCce806(Importer):
             else:
                 ec = None
 
-            filemark = FileMark(self._reaction_context, i, None)
+            filemark = FileMark(state.reaction_context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, subsystem=subsystem,
                 ec=ec), filemark=filemark)
 
 
-class ImportGSMN_TB(Importer):  # noqa
+class ImportGSMN_TB(ImportGSMN_TBInfo, ExcelImporter):  # noqa
     """Importer for GSMN-TB model."""
 
-    name = 'GSMN-TB'
-    title = ('Mycobacterium tuberculosis GSMN-TB (Excel format),'
-             ' Beste et al., 2007')
-
-    filenames = ('gb-2007-8-5-r89-s4.xls',
-                 'gb-2007-8-5-r89-s6.xls')
-
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:')
-        for filename in self.filenames:
-            print('- {}'.format(filename))
+    # Compounds used in reactions are missing from the compound table
+    create_missing_compounds = True
+    missing_compound_names = {
+        'MBT-HOLO': 'Mycobactin-Holo',
+        'TAGbio': 'Triacylglycerol-bio',
+        'TREHALOSEMONOMYCOLATE(CY)': 'Trehalosemonomycolate(cy)',
+        'MYCOTHIOL-S-CONJUGATE': 'Mycothiol-S-conjugate',
+        'N-ACETYL-S-CONJUGATE': 'N-actyl-s-conjugate',
+        '(n-1)POLYP': '(n-1)Polyphosphate',
+        '(n)POLYP': '(n)Polyphosphate',
+        'HYDROXYGLU': 'Hydroxy-glutamate',
+        'OCTANOYL-ACP': 'OCTANOYL-Acyl-Carrier-Protein',
+        'MOLYBDENUM-CO': 'MOLYBDENUM-COfactor',
+        'TAGcat': 'TracylGlycerol Cat',
+        'METHYLISOCITRATE': 'Methyl-Isocitrate',
+        'MPM': 'Methyl Pyrimidine',
+        'APO-LIPO': 'apo-lipo-amide',
+        'BIOMASSxt': 'Biomass extracellular',
+        'GLUCAN': 'Glucanate'
+    }
+
+    sheet_layouts = (
+        SheetLayout('compounds', 'File 6', 2, 2, book='compound_book'),
+        SheetLayout('reactions', 'File 4', 4, 8, book='reaction_book',
+                    unique=True),
+    )
 
-    def import_model(self, source):
-        """Import and return model instance."""
+    def _open_workbooks(self, source):
         if not os.path.isdir(source):
             raise ModelLoadError('Source must be a directory')
 
-        self._compound_context = FilePathContext(
+        state = ImportState(source)
+        state.compound_context = FilePathContext(
             os.path.join(source, self.filenames[1]))
-        self._reaction_context = FilePathContext(
+        state.reaction_context = FilePathContext(
             os.path.join(source, self.filenames[0]))
 
-        self._compound_book = xlrd.open_workbook(
-            self._compound_context.filepath)
-        self._reaction_book = xlrd.open_workbook(
-            self._reaction_context.filepath)
+        state.compound_book = open_workbook(
+            state.compound_context.filepath)
+        state.reaction_book = open_workbook(
+            state.reaction_context.filepath)
 
-        model = native.NativeModel()
-        model.name = self.title
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
+        return state
 
-        return model
+    def _count_compound_ids(self, state):
+        sheet = state.compound_book.sheet_by_name('File 6')
+        state.compound_ids = CompoundIdIndex(
+            sheet.col_values(0, start_rowx=2))
+        return state.compound_ids.counts
 
-    def _read_compounds(self):
-        sheet = self._compound_book.sheet_by_name('File 6')
-        for i in range(2, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.compound_book.sheet_by_name('File 6')
+        compound_ids = state.compound_ids
+        for i in self._rows(state, sheet, 2):
             compound_id, name = sheet.row_values(i, end_colx=2)
 
             if compound_id.strip() == '':
                 continue
 
             # Skip compartmentalized compounds
-            m = re.match(r'^(.*)\[.\]$', compound_id)
-            if m:
-                compound_id = m.group(1)
+            compound_id = compound_ids[compound_id]
 
             name = None if name.strip() == '' else name
 
-            filemark = FileMark(self._compound_context, i, None)
+            filemark = FileMark(state.compound_context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name), filemark=filemark)
 
-        def create_missing(compound_id, name=None):
-            if name is None:
-                name = compound_id
-            return CompoundEntry(dict(id=compound_id, name=name))
-
-        # Generate missing compounds
-        yield create_missing('MBT-HOLO', 'Mycobactin-Holo')
-        yield create_missing('TAGbio', 'Triacylglycerol-bio')
-        yield create_missing('TREHALOSEMONOMYCOLATE(CY)',
-                             'Trehalosemonomycolate(cy)')
-        yield create_missing('MYCOTHIOL-S-CONJUGATE', 'Mycothiol-S-conjugate')
-        yield create_missing('N-ACETYL-S-CONJUGATE', 'N-actyl-s-conjugate')
-        yield create_missing('(n-1)POLYP', '(n-1)Polyphosphate')
-        yield create_missing('(n)POLYP', '(n)Polyphosphate')
-        yield create_missing('HYDROXYGLU', 'Hydroxy-glutamate')
-        yield create_missing('OCTANOYL-ACP', 'OCTANOYL-Acyl-Carrier-Protein')
-        yield create_missing('UDP[NAM:NGM]ALA')
-        yield create_missing('UDP[NAM:NGM]ALAGLU')
-        yield create_missing('UDP[NAM:NGM]AGMDAPIMAA')
-        yield create_missing('UDP[NAM:NGM]AGMDAPIM')
-        yield create_missing('MOLYBDENUM-CO', 'MOLYBDENUM-COfactor')
-        yield create_missing('CISACONITATE')
-        yield create_missing('ELECTROPHILE-X')
-        yield create_missing('H2X')
-        yield create_missing('TAGcat', 'TracylGlycerol Cat')
-        yield create_missing('METHYLISOCITRATE', 'Methyl-Isocitrate')
-        yield create_missing('ARA[1]GALACTANDPP')
-        yield create_missing('MPM', 'Methyl Pyrimidine')
-        yield create_missing('APO-LIPO', 'apo-lipo-amide')
-        yield create_missing('BIOMASSxt', 'Biomass extracellular')
-        yield create_missing('GLUCAN', 'Glucanate')
-
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('->', Direction.Forward),
             ('=', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows)
 
-        sheet = self._reaction_book.sheet_by_name('File 4')
-        for i in range(4, sheet.nrows):
+        sheet = state.reaction_book.sheet_by_name('File 4')
+        for i in self._rows(state, sheet, 4):
             (reaction_id, equation, fluxbound, _, ec, genes, name,
                 subsystem) = sheet.row_values(i, end_colx=8)
 
             if reaction_id.startswith('%') or reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
             genes = self._try_parse_gene_association(reaction_id, genes)
 
             name = None if name.strip() == '' else name
@@ -1102,48 +1320,26 @@ class ImportGSMN_TB(Importer):  # noqa
             subsystem = None if subsystem.strip() == '' else subsystem
             ec = None if ec.strip() == '' else ec
 
-            filemark = FileMark(self._reaction_context, i, None)
+            filemark = FileMark(state.reaction_context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, subsystem=subsystem,
                 ec=ec), filemark=filemark)
 
 
-class ImportiNJ661(Importer):
+class ImportiNJ661(ImportiNJ661Info, ExcelImporter):
     """Importer for iNJ661 model."""
 
-    name = 'iNJ661'
-    title = ('Mycobacterium tuberculosis iNJ661 (Excel format),'
-             ' Jamshidi et al., 2007')
+    extracellular_compartment = 'e'
 
-    filename = '1752-0509-1-26-s5.xls'
-
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
-
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
-
-        model = native.NativeModel()
-        model.name = self.title
-        model.extracellular_compartment = 'e'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
-
-        return model
+    sheet_layouts = (
+        SheetLayout('compounds', 'metabolites', 1, 4),
+        SheetLayout('reactions', 'iNJ661', 5, 7, unique=True),
+    )
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('metabolites')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('metabolites')
+        for i in self._rows(state, sheet, 1):
             compound_id, name, formula, charge = sheet.row_values(
                 i, end_colx=4)
 
@@ -1158,25 +1354,27 @@ class ImportiNJ661(Importer):
             except ValueError:
                 charge = None
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, formula=formula,
                 charge=charge), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<==>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows, parse_global=True)
 
-        sheet = self._book.sheet_by_name('iNJ661')
-        for i in range(5, sheet.nrows):
+        sheet = state.book.sheet_by_name('iNJ661')
+        for i in self._rows(state, sheet, 5):
             reaction_id, name, equation, _, subsystem, _, genes = (
                 sheet.row_values(i, end_colx=7))
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             # TODO model uses an alternative gene association format
             if genes.strip() != '':
@@ -1195,72 +1393,82 @@ class ImportiNJ661(Importer):
 
             subsystem = None if subsystem.strip() == '' else subsystem
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, subsystem=subsystem), filemark=filemark)
 
 
-class ImportGenericiNJ661mv(Importer):
+class ImportGenericiNJ661mv(ExcelImporter):
     """Importer for the models iNJ661m and iNJ661v.
 
     For models of Mycobacterium tuberculosis iNJ661m/v (Excel format),
     Fang et al., 2010.
     """
 
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
+    biomass_reaction = 'biomass_Mtb_9_60atp_test_NOF'
+    extracellular_compartment = 'e'
 
-    def import_model_named(self, name, source):
-        """Import and return model instance with the given name."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
-
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
-
-        model = native.NativeModel()
-        model.name = name
-        model.biomass_reaction = 'biomass_Mtb_9_60atp_test_NOF'
-        model.extracellular_compartment = 'e'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
-
-        return model
+    sheet_layouts = (
+        SheetLayout('compounds', 'metabolites', 1, 3),
+        SheetLayout('reactions', 'reactions', 1, 6, unique=True),
+    )
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('metabolites')
-        for i in range(1, sheet.nrows):
+    def import_model_named(self, name, source, **kwargs):
+        """Import and return model instance with the given name."""
+        return self._import(self._open_named(name, source, **kwargs))
+
+    def import_model_named_async(self, name, source, **kwargs):
+        """Return coroutine importing the named model without blocking.
+
+        See :func:`psamm_import.aio.import_model_named_async`.
+        """
+        from .aio import import_model_named_async
+        return import_model_named_async(self, name, source, **kwargs)
+
+    def _open_named(self, name, source, **kwargs):
+        state = self._open(source, **kwargs)
+        state.model_name = name
+        return state
+
+    def _count_compound_ids(self, state):
+        sheet = state.book.sheet_by_name('metabolites')
+        state.compound_ids = CompoundIdIndex(
+            sheet.col_values(0, start_rowx=1))
+        return state.compound_ids.counts
+
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('metabolites')
+        compound_ids = state.compound_ids
+        for i in self._rows(state, sheet, 1):
             compound_id, name, formula = sheet.row_values(i, end_colx=3)
 
             # Skip compartmentalized compounds
-            compound_id = re.match(r'^(.*)\[.\]$', compound_id).group(1)
+            compound_id = compound_ids[compound_id]
             name = name if name.strip() != '' else None
 
             formula = self._try_parse_formula(compound_id, formula)
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, formula=formula), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('->', Direction.Forward),
             ('<=>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows)
 
-        sheet = self._book.sheet_by_name('reactions')
-        for i in range(1, sheet.nrows):
+        sheet = state.book.sheet_by_name('reactions')
+        for i in self._rows(state, sheet, 1):
             reaction_id, name, equation, genes, _, subsystem = (
                 sheet.row_values(i, end_colx=6))
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             genes = self._try_parse_gene_association(reaction_id, genes)
             name = None if name.strip() == '' else name.strip()
@@ -1275,39 +1483,21 @@ class ImportGenericiNJ661mv(Importer):
 
             subsystem = None if subsystem.strip() == '' else subsystem
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, subsystem=subsystem), filemark=filemark)
 
 
-class ImportiNJ661m(ImportGenericiNJ661mv):
+class ImportiNJ661m(ImportiNJ661mInfo, ImportGenericiNJ661mv):
     """Importer for iNJ661m model."""
 
-    name = 'inj661m'
-    title = ('Mycobacterium tuberculosis iNJ661m (Excel format),'
-             ' Fang et al., 2010')
-    filename = '1752-0509-4-160-s3.xls'
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        return self.import_model_named(self.title, source)
-
 
-class ImportiNJ661v(ImportGenericiNJ661mv):
+class ImportiNJ661v(ImportiNJ661vInfo, ImportGenericiNJ661mv):
     """Importer for iNJ661v model."""
 
-    name = 'inj661v'
-    title = ('Mycobacterium tuberculosis iNJ661v (Excel format),'
-             ' Fang et al., 2010')
-    filename = '1752-0509-4-160-s5.xls'
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        return self.import_model_named(self.title, source)
-
 
-class ImportShewanellaOng(Importer):
+class ImportShewanellaOng(ImportShewanellaOngInfo, ExcelImporter):
     """Generic importer for four models published in Ong et al., 2014.
 
     Generic importer for the models iMR1_799, iMR4_812, iW3181_789 and
@@ -1316,7 +1506,6 @@ class ImportShewanellaOng(Importer):
     (1). BMC Systems Biology: 1-11. doi:10.1186/1752-0509-8-31.
     """
 
-    filename = '1752-0509-8-31-s2.xlsx'
     biomass_names = (
         'SO_BIOMASSMACRO_DM_NOATP2',
         'MR4_BIOMASSMACRO_DM_NOATP2',
@@ -1324,41 +1513,90 @@ class ImportShewanellaOng(Importer):
         'Sden_BIOMASSMACRO_DM_NOATP2',
         'Core_BIOMASSMACRO_DM_NOATP2'
     )
+    extracellular_compartment = 'e'
 
-    def help(self):
-        """Print import help text."""
-        print('Source must contain the model definition in Excel format.\n'
-              'Expected files in source directory:\n'
-              '- {}'.format(self.filename))
+    normalize_equation = EquationNormalizer(['+'])
 
-    def import_model_named(self, name, col_index, source):
-        """Import and return model instance."""
-        context = FilePathContext(source)
-        if os.path.isdir(context.filepath):
-            context = FilePathContext(os.path.join(source, self.filename))
+    # Names of the models in the presence columns of the reaction sheet
+    model_names = ('iMR1_799', 'iMR4_812', 'iW3181_789', 'iOS217_672', 'Core')
+
+    # Index of the model column in the workbook (set by subclasses)
+    col_index = None
+
+    sheet_layouts = (
+        SheetLayout('compounds', 'S3-Metabolites', 1, 13),
+        SheetLayout('reactions', 'S2-Reactions', 2, 19, unique=True),
+    )
 
-        self._context = context
-        self._book = xlrd.open_workbook(context.filepath)
-        self._col_index = col_index
+    def read_presence_matrix(self, source):
+        """Return presence of the reactions in each of the models.
 
-        model = native.NativeModel()
-        model.name = name
-        model.biomass_reaction = self.biomass_names[col_index]
-        model.extracellular_compartment = 'e'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions())
+        The reaction sheet is read once and a
+        :class:`psamm_import.presence.PresenceMatrix` with a column for each
+        of :attr:`model_names` is returned.
+        """
+        from .presence import PresenceMatrix
 
+        state = self._open_source(source)
+        sheet = state.book.sheet_by_name('S2-Reactions')
+        reactions, rows = [], []
+        for i in range(2, sheet.nrows):
+            reaction_id = sheet.cell_value(i, 0)
+            if reaction_id.strip() == '':
+                continue
+            reactions.append(reaction_id)
+            rows.append(self._read_presence(sheet, i))
+        return PresenceMatrix.from_rows(reactions, self.model_names, rows)
+
+    def _read_presence(self, sheet, i):
+        return [bool(value) for value in sheet.row_values(
+            i, start_colx=1, end_colx=1 + len(self.model_names))]
+
+    def import_model_named(self, name, col_index, source, **kwargs):
+        """Import and return model instance."""
+        return self._import(self._open_named(
+            name, col_index, source, **kwargs))
+
+    def import_model_named_async(self, name, col_index, source, **kwargs):
+        """Return coroutine importing the named model without blocking.
+
+        See :func:`psamm_import.aio.import_model_named_async`.
+        """
+        from .aio import import_model_named_async
+        return import_model_named_async(
+            self, name, col_index, source, **kwargs)
+
+    def _open_named(self, name, col_index, source, **kwargs):
+        state = self._open(source, **kwargs)
+        state.col_index = col_index
+        state.model_name = name
+        return state
+
+    def _open_source(self, source):
+        state = super(ImportShewanellaOng, self)._open_source(source)
+        state.col_index = self.col_index
+        return state
+
+    def _create_model(self, state):
+        model = super(ImportShewanellaOng, self)._create_model(state)
+        model.biomass_reaction = self.biomass_names[state.col_index]
         return model
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('S3-Metabolites')
-        for i in range(1, sheet.nrows):
+    def _count_compound_ids(self, state):
+        sheet = state.book.sheet_by_name('S3-Metabolites')
+        state.compound_ids = CompoundIdIndex(
+            sheet.col_values(0, start_rowx=1), lower=True)
+        return state.compound_ids.counts
+
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('S3-Metabolites')
+        compound_ids = state.compound_ids
+        for i in self._rows(state, sheet, 1):
             (compound_id, _, _, _, _, _, name, formula_neutral, formula,
                 charge, _, kegg, cas) = sheet.row_values(i, end_colx=13)
 
             # Remove compartmentalization of compounds
-            compound_id = re.match(
-                r'^(.*)\[.\]$', compound_id).group(1).lower()
+            compound_id = compound_ids[compound_id]
             name = name if name.strip() != '' else None
 
             formula_neutral = self._try_parse_formula(
@@ -1377,30 +1615,50 @@ class ImportShewanellaOng(Importer):
             else:
                 cas = str(cas)
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, formula=formula,
                 formula_neutral=formula_neutral, charge=charge,
                 kegg=kegg, cas=cas), filemark=filemark)
 
-    def _read_reactions(self):
+    def _read_reactions(self, state):
         arrows = (
             ('-->', Direction.Forward),
             ('<==>', Direction.Both)
         )
         parser = ReactionParser(arrows=arrows, parse_global=True)
 
-        sheet = self._book.sheet_by_name('S2-Reactions')
-        for i in range(2, sheet.nrows):
+        # Fixup compound names in reactions
+        def translate(s):
+            s = s.lower()
+            m = re.match(r'^(.*)_e$', s)
+            if m:
+                s = m.group(1)
+
+            if s == 'aaacoa':
+                s = 'aacoa'
+
+            if s in ('fdxr-4:2', 'fdxo-4:2'):
+                s = s.replace(':', '_')
+
+            if s in ('q8', 'q8h2'):
+                s = 'ub' + s
+            return s
+        translator = CompoundTranslator(lambda c: c.translate(translate))
+
+        sheet = state.book.sheet_by_name('S2-Reactions')
+        for i in self._rows(state, sheet, 2):
             reaction_id, _, _, _, _, _, name, equation = sheet.row_values(
                 i, end_colx=8)
 
             if reaction_id.strip() == '':
                 continue
+            subsystem = sheet.cell_value(i, 18)
+            if self._skip_reaction(state, reaction_id, subsystem, equation):
+                continue
 
             # Whether the reaction is present in this model
-            model_presence = bool(sheet.row_values(
-                i, start_colx=1, end_colx=6)[self._col_index])
+            model_presence = self._read_presence(sheet, i)[state.col_index]
 
             if not model_presence:
                 # TODO load the complete reaction list and use the model subset
@@ -1409,111 +1667,74 @@ class ImportShewanellaOng(Importer):
 
             # Genes
             model_genes = sheet.row_values(
-                i, start_colx=8, end_colx=12)[self._col_index].strip()
-
-            # Fixup compound names in reactions
-            def translate(s):
-                s = s.lower()
-                m = re.match(r'^(.*)_e$', s)
-                if m:
-                    s = m.group(1)
-
-                if s == 'aaacoa':
-                    s = 'aacoa'
-
-                if s in ('fdxr-4:2', 'fdxo-4:2'):
-                    s = s.replace(':', '_')
-
-                if s in ('q8', 'q8h2'):
-                    s = 'ub' + s
-                return s
+                i, start_colx=8, end_colx=12)[state.col_index].strip()
 
             # Reaction equation
             if equation.strip() != '':
-                equation = re.sub(r'\s*\+\s*', ' + ', equation)
+                equation = self.normalize_equation(equation)
                 equation = self._try_parse_reaction(
                     reaction_id, equation, parser=parser.parse)
-                equation = equation.translated_compounds(translate)
+                equation = translator.translate_reaction(equation)
             else:
                 equation = None
 
             genes = self._try_parse_gene_association(reaction_id, model_genes)
-            subsystem = sheet.cell_value(i, 18)
 
             name = None if name.strip() == '' else name.strip()
             subsystem = None if subsystem.strip() == '' else subsystem
 
-            filemark = FileMark(self._context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, subsystem=subsystem), filemark=filemark)
 
+        translator.add_to_report(state.report)
 
-class ImportiMR1_799(ImportShewanellaOng):  # noqa
-    """Importer for iMR_799 model."""
 
-    name = 'imr1_799'
-    title = ('Shewanella oneidensis MR-1 iMR1_799 (Excel format),'
-             ' Ong et al., 2014')
+class ImportiMR1_799(ImportiMR1_799Info, ImportShewanellaOng):  # noqa
+    """Importer for iMR_799 model."""
 
-    def import_model(self, source):
-        """Import and return model instance."""
-        return self.import_model_named(self.title, 0, source)
+    col_index = 0
 
 
-class ImportiMR4_812(ImportShewanellaOng):  # noqa
+class ImportiMR4_812(ImportiMR4_812Info, ImportShewanellaOng):  # noqa
     """Importer for iMR4_812 model."""
 
-    name = 'imr4_812'
-    title = ('Shewanella sp. MR-4 iMR4_812 (Excel format),'
-             ' Ong et al., 2014')
-
-    def import_model(self, source):
-        """Import and return model instance."""
-        return self.import_model_named(self.title, 1, source)
+    col_index = 1
 
 
-class ImportiW3181_789(ImportShewanellaOng):  # noqa
+class ImportiW3181_789(ImportiW3181_789Info, ImportShewanellaOng):  # noqa
     """Importer for iW3181_789 model."""
 
-    name = 'iw3181_789'
-    title = ('Shewanella sp. W3-18-1 iW3181_789 (Excel format),'
-             ' Ong et al., 2014')
+    col_index = 2
 
-    def import_model(self, source):
-        """Import and return model instance."""
-        return self.import_model_named(self.title, 2, source)
 
-
-class ImportiOS217_672(ImportShewanellaOng):  # noqa
+class ImportiOS217_672(ImportiOS217_672Info, ImportShewanellaOng):  # noqa
     """Importer for iOS217_672 model."""
 
-    name = 'ios217_672'
-    title = ('Shewanella denitrificans OS217 iOS217_672 (Excel format),'
-             ' Ong et al., 2014')
+    col_index = 3
 
-    def import_model(self, source):
-        """Import and return model instance."""
-        return self.import_model_named(self.title, 3, source)
 
+class ImportModelSEED(ImportModelSEEDInfo, ExcelImporter):
+    """Read metabolic model for a ModelSEED model.
 
-class ImportModelSEED(Importer):
-    """Read metabolic model for a ModelSEED model."""
+    The PEGs in the Genes sheet are mapped to the genes at the same location
+    in the PTT file. To also map PEGs whose location differs slightly from
+    the PTT file, set :attr:`gene_location_tolerance` on the importer. The
+    approximate matches are logged as warnings and added to the report.
+    """
 
-    name = 'ModelSEED'
-    title = 'ModelSEED model (Excel format)'
-    generic = True
+    # Maximum distance in bases of the gene start and stop in the PTT file
+    # from the location given in the model (0 only accepts exact matches).
+    gene_location_tolerance = 0
 
-    def help(self):
-        """Print importer help text."""
-        print('Source must contain the model definition in Excel format\n'
-              ' and a PTT file for mapping PEG gene names.'
-              'Expected files in source directory:\n'
-              '- Seed*.xls\n'
-              '- NC_*.ptt')
+    sheet_layouts = (
+        SheetLayout('genes', 'Genes', 1, 6, unique=True),
+        SheetLayout('compounds', 'Compounds', 1, 6),
+        SheetLayout('reactions', 'Reactions', 1, 8, unique=True),
+    )
 
-    def import_model(self, source):
-        """Import and return model instance."""
+    def _open_workbooks(self, source):
         if not os.path.isdir(source):
             raise ModelLoadError('Source must be a directory')
 
@@ -1524,7 +1745,8 @@ class ImportModelSEED(Importer):
             raise ModelLoadError(
                 'More than one .xls file found in source directory')
 
-        self._excel_context = FilePathContext(excel_sources[0])
+        state = ImportState(source)
+        state.context = FilePathContext(excel_sources[0])
 
         ptt_sources = glob.glob(os.path.join(source, '*.ptt'))
         if len(ptt_sources) == 0:
@@ -1533,24 +1755,20 @@ class ImportModelSEED(Importer):
             raise ModelLoadError(
                 'More than one .ptt file found in source directory')
 
-        self._book = xlrd.open_workbook(self._excel_context.filepath)
-
-        with open(ptt_sources[0], 'r') as ptt_file:
-            # Read mapping from location to gene ID from PTT file
-            location_mapping = {}
-            for i in range(3):
-                ptt_file.readline()  # Skip headers
-            for row in csv.reader(ptt_file, delimiter='\t'):
-                location, direction, _, _, _, gene_id = row[:6]
-
-                start, stop = re.match(r'^(\d+)\.\.(\d+)$', location).groups()
-                start, stop = int(start), int(stop)
+        state.book = open_workbook(state.context.filepath)
+        state.ptt_path = ptt_sources[0]
+        return state
 
-                location_mapping[start, stop, direction] = gene_id
+    def _open_source(self, source):
+        state = self._open_workbooks(source)
+        try:
+            gene_index = open_gene_index(state.ptt_path)
+        except ValueError as e:
+            raise ModelLoadError('Unable to read PTT file: {}'.format(e))
 
         # Read mapping from PEG to gene ID
-        peg_mapping = {}
-        sheet = self._book.sheet_by_name('Genes')
+        pegs, locations = [], []
+        sheet = state.book.sheet_by_name('Genes')
         for i in range(1, sheet.nrows):
             gene_id, gene_type, _, start, stop, direction = sheet.row_values(
                 i, end_colx=6)
@@ -1559,22 +1777,42 @@ class ImportModelSEED(Importer):
             if not m:
                 continue
 
-            peg_id = m.group(1)
+            pegs.append(m.group(1))
             direction = '+' if direction == 'for' else '-'
-            start, stop = int(start), int(stop)
+            locations.append((int(start), int(stop), direction))
 
-            peg_mapping[peg_id] = location_mapping[start, stop, direction]
+        gene_ids = gene_index.lookup_many(
+            locations, tolerance=self.gene_location_tolerance)
 
-        model = native.NativeModel()
+        peg_mapping = {}
+        state.approximate_pegs = []
+        for peg_id, location, gene_id in zip(pegs, locations, gene_ids):
+            if gene_id is None:
+                raise ModelLoadError(
+                    'No gene found in PTT file at location {}..{} ({})'
+                    ' of {}'.format(location[0], location[1], location[2],
+                                    peg_id))
+            if (self.gene_location_tolerance > 0 and
+                    gene_index.lookup(*location) is None):
+                logger.warning(
+                    'No gene in PTT file at location {}..{} ({}) of {};'
+                    ' mapped to {}'.format(
+                        location[0], location[1], location[2], peg_id,
+                        gene_id))
+                state.approximate_pegs.append((peg_id, location, gene_id))
+            peg_mapping[peg_id] = gene_id
+
+        state.peg_mapping = peg_mapping
+        return state
+
+    def _create_model(self, state):
+        model = LazyModel() if state.lazy else native.NativeModel()
         model.name = 'ModelSEED model'
-        model.compounds.update(self._read_compounds())
-        model.reactions.update(self._read_reactions(peg_mapping))
-
         return model
 
-    def _read_compounds(self):
-        sheet = self._book.sheet_by_name('Compounds')
-        for i in range(1, sheet.nrows):
+    def _read_compounds(self, state):
+        sheet = state.book.sheet_by_name('Compounds')
+        for i in self._rows(state, sheet, 1):
             compound_id, name, alt_name, formula, charge, _ = (
                 sheet.row_values(i, end_colx=6))
 
@@ -1588,19 +1826,44 @@ class ImportModelSEED(Importer):
             else:
                 formula = None
 
-            filemark = FileMark(self._excel_context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield CompoundEntry(dict(
                 id=compound_id, name=name, formula=formula,
                 charge=charge), filemark=filemark)
 
-    def _read_reactions(self, peg_mapping):
-        sheet = self._book.sheet_by_name('Reactions')
-        for i in range(1, sheet.nrows):
+    def _read_reactions(self, state):
+        # PEGs are translated once for each distinct PEG and GPR string.
+        # Unmapped PEGs are kept with the first reaction they occur in.
+        # The substitution can pass translated gene IDs to translate_pegs
+        # again; these are returned unchanged.
+        peg_genes = {}
+        gpr_genes = {}
+        unmapped_pegs = OrderedDict()
+        gene_ids = set(itervalues(state.peg_mapping))
+
+        def translate_pegs(variable):
+            gene = peg_genes.get(variable.symbol)
+            if gene is None:
+                gene_id = state.peg_mapping.get(variable.symbol)
+                if gene_id is not None:
+                    gene = boolean.Variable(gene_id)
+                elif variable.symbol in gene_ids:
+                    return variable
+                else:
+                    gene = True
+                    unmapped_pegs.setdefault(variable.symbol, reaction_id)
+                peg_genes[variable.symbol] = gene
+            return gene
+
+        sheet = state.book.sheet_by_name('Reactions')
+        for i in self._rows(state, sheet, 1):
             reaction_id, name, equation, _, ec_list, _, _, pegs = (
                 sheet.row_values(i, end_colx=8))
 
             if reaction_id.strip() == '':
                 continue
+            if self._skip_reaction(state, reaction_id, None, equation):
+                continue
 
             name = name if name.strip() != '' else None
 
@@ -1609,17 +1872,17 @@ class ImportModelSEED(Importer):
             else:
                 continue
 
-            def translate_pegs(variable):
-                if variable.symbol in peg_mapping:
-                    return boolean.Variable(peg_mapping[variable.symbol])
-                return True
-
-            pegs = self._try_parse_gene_association(reaction_id, pegs)
-            genes = None
-            if isinstance(pegs, boolean.Expression):
-                genes = pegs.substitute(translate_pegs)
-                if genes.has_value():
-                    genes = None
+            if pegs in gpr_genes:
+                genes = gpr_genes[pegs]
+            else:
+                expression = self._try_parse_gene_association(
+                    reaction_id, pegs)
+                genes = None
+                if isinstance(expression, boolean.Expression):
+                    genes = expression.substitute(translate_pegs)
+                    if genes.has_value():
+                        genes = None
+                gpr_genes[pegs] = genes
 
             if ec_list == '':
                 ec_list = None
@@ -1632,7 +1895,19 @@ class ImportModelSEED(Importer):
                 ec_list = frozenset([ec_list])
                 ec = next(iter(ec_list))
 
-            filemark = FileMark(self._excel_context, i, None)
+            filemark = FileMark(state.context, i, None)
             yield ReactionEntry(dict(
                 id=reaction_id, name=name, genes=genes,
                 equation=equation, ec=ec), filemark=filemark)
+
+        if state.report is not None:
+            for peg_id, reaction_id in iteritems(unmapped_pegs):
+                state.report.add(
+                    'unmapped_gene', peg_id,
+                    'Used in {} but not in the Genes sheet'.format(
+                        reaction_id))
+            for peg_id, location, gene_id in state.approximate_pegs:
+                state.report.add(
+                    'approximate_gene_location', peg_id,
+                    'Mapped to {} (no gene at {}..{})'.format(
+                        gene_id, location[0], location[1]))
@@ -0,0 +1,80 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Selection of the reactions to import.
+
+A :class:`ReactionFilter` passed to ``import_model()`` is evaluated on the
+raw cell values of each reaction row, before the equation and the gene
+association are parsed, so the rows that are left out cost almost nothing::
+
+    selection = ReactionFilter(subsystems=['Glycolysis/Gluconeogenesis'])
+    model = importer.import_model(
+        source, reaction_filter=selection, referenced_compounds=True)
+
+With ``referenced_compounds``, the compounds are restricted to those used in
+the selected reactions.
+"""
+
+import re
+
+from six import string_types
+
+
+class ReactionFilter(object):
+    """Filter of reaction rows by ID, subsystem or equation.
+
+    A row is accepted if it matches all of the given criteria. IDs and
+    subsystems are compared after removing leading and trailing whitespace.
+    Rows without a subsystem (or from sources that have no subsystem
+    column) do not match a subsystem criterion. The equation pattern is
+    searched in the equation as written in the source, e.g. to select the
+    reactions with compounds in a compartment.
+
+    Args:
+        ids: Reaction IDs to accept.
+        subsystems: Subsystems to accept.
+        pattern: Regular expression that the reaction ID must match.
+        equation_pattern: Regular expression to search for in the equation.
+    """
+
+    def __init__(self, ids=None, subsystems=None, pattern=None,
+                 equation_pattern=None):
+        """Create filter from the criteria."""
+        self._ids = None if ids is None else frozenset(
+            i.strip() for i in ids)
+        self._subsystems = None if subsystems is None else frozenset(
+            s.strip() for s in subsystems)
+        self._pattern = None if pattern is None else re.compile(pattern)
+        self._equation_pattern = (
+            None if equation_pattern is None else re.compile(equation_pattern))
+
+    def accepts(self, reaction_id, subsystem=None, equation=None):
+        """Return True if the reaction row is accepted."""
+        reaction_id = reaction_id.strip()
+        if self._ids is not None and reaction_id not in self._ids:
+            return False
+        if self._pattern is not None and not self._pattern.match(reaction_id):
+            return False
+        if self._subsystems is not None:
+            if (not isinstance(subsystem, string_types) or
+                    subsystem.strip() not in self._subsystems):
+                return False
+        if self._equation_pattern is not None:
+            if (not isinstance(equation, string_types) or
+                    not self._equation_pattern.search(equation)):
+                return False
+        return True
@@ -0,0 +1,121 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Tables of fixups for errors in the rows of the source workbooks.
+
+The fixups of an importer are declared in a :class:`FixupTable`: the IDs of
+rows to skip, IDs to rename and patches of the cells of specific rows. The
+table is built once when the importer class is defined, so a row is looked
+up in a set or dict no matter how many fixups are declared. A patch of a
+cell is a new value, a :class:`Substitute` or a :class:`Split`.
+"""
+
+import re
+
+from six import iteritems, string_types
+
+
+class Substitute(object):
+    """Patch that substitutes a pattern in the cell value.
+
+    Args:
+        pattern: Regular expression to substitute.
+        replacement: Replacement as for :func:`re.sub`.
+    """
+
+    def __init__(self, pattern, replacement):
+        """Create substitution of the pattern."""
+        self._pattern = re.compile(pattern)
+        self._replacement = replacement
+
+    def apply(self, column, cells, result):
+        """Substitute in the cell of column and store in result."""
+        result[column] = self._pattern.sub(self._replacement, cells[column])
+
+
+class Split(object):
+    """Patch that splits the cell value into several cells.
+
+    The pattern is matched against the cell value and each named group of
+    the match is stored in the cell with the same name. The cells are left
+    unchanged if the pattern does not match.
+
+    Args:
+        pattern: Regular expression with named groups.
+    """
+
+    def __init__(self, pattern):
+        """Create split by the pattern."""
+        self._pattern = re.compile(pattern)
+
+    def apply(self, column, cells, result):
+        """Split the cell of column and store the parts in result."""
+        m = self._pattern.match(cells[column])
+        if m:
+            result.update(m.groupdict())
+
+
+class FixupTable(object):
+    """Fixups of the rows of a sheet looked up by the ID of the row.
+
+    IDs are compared after leading and trailing whitespace is removed. The
+    patches of a row all read the original cell values, so a cell should
+    only be written by one patch.
+
+    Args:
+        skip: IDs of rows that should be skipped (e.g. notes and headings).
+        rename: Dict of IDs to replace.
+        patch: Dict mapping IDs to dicts of cell patches. A patch of a
+            column is a new value, a :class:`Substitute` or a
+            :class:`Split`.
+    """
+
+    def __init__(self, skip=(), rename=None, patch=None):
+        """Create table of the fixups."""
+        self._skip = frozenset(skip)
+        self._rename = dict(rename or {})
+        self._patch = {}
+        for entry_id, patches in iteritems(patch or {}):
+            self._patch[entry_id] = [
+                (column, patch) for column, patch in sorted(iteritems(patches))
+            ]
+
+    def skip(self, entry_id):
+        """Return True if the row with ID should be skipped."""
+        return entry_id.strip() in self._skip
+
+    def rename(self, entry_id):
+        """Return the ID that should be used instead of the ID."""
+        return self._rename.get(entry_id.strip(), entry_id)
+
+    def patch(self, entry_id, cells):
+        """Return dict of the cells of row with the patches applied.
+
+        The given dict of cells is returned unchanged if there are no
+        patches for the row.
+        """
+        patches = self._patch.get(entry_id.strip())
+        if patches is None:
+            return cells
+
+        result = dict(cells)
+        for column, patch in patches:
+            if isinstance(patch, string_types) or patch is None:
+                result[column] = patch
+            else:
+                patch.apply(column, cells, result)
+        return result
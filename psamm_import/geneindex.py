@@ -0,0 +1,130 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Index of the reactions associated with each gene.
+
+:class:`GeneIndexBuilder` is an import observer (see
+:mod:`psamm_import.observer`) that collects the genes of each reaction as
+the gene associations are parsed::
+
+    builder = GeneIndexBuilder()
+    model = importer.import_model(source, observers=[builder])
+    builder.build().save('genes.tsv.gz')
+
+The index is saved as a tab-separated file with a line for each gene: the
+gene ID followed by the IDs of the reactions. The file is compressed if the
+file name ends in ``.gz`` or ``.zst`` (see :mod:`psamm_import.output`).
+"""
+
+from collections import OrderedDict
+
+from six import string_types, text_type
+
+from psamm.expression import boolean
+
+from .observer import ImportObserver
+from .output import open_compressed
+
+#: Default file name of the gene index next to the model
+DEFAULT_FILENAME = 'genes.tsv.gz'
+
+
+def reaction_genes(genes):
+    """Return tuple of the gene IDs in the genes property of a reaction.
+
+    The property is a gene association expression or a set of gene IDs.
+    Gene associations that could not be parsed (strings) have no genes.
+    """
+    if genes is None or isinstance(genes, string_types):
+        return ()
+    if isinstance(genes, boolean.Expression):
+        return tuple(sorted(set(v.symbol for v in genes.variables)))
+    return tuple(sorted(set(text_type(gene) for gene in genes)))
+
+
+class GeneIndex(object):
+    """Index of the reactions associated with each gene.
+
+    Args:
+        genes: Dict mapping each gene ID to the list of reaction IDs.
+    """
+
+    def __init__(self, genes):
+        """Create index from dict of gene ID to reaction IDs."""
+        self._genes = OrderedDict(
+            (gene, list(reactions)) for gene, reactions in genes.items())
+
+    def __len__(self):
+        """Return the number of genes."""
+        return len(self._genes)
+
+    def __contains__(self, gene):
+        """Return True if the gene is associated with any reaction."""
+        return gene in self._genes
+
+    def __iter__(self):
+        """Iterate over the gene IDs."""
+        return iter(self._genes)
+
+    def reactions(self, gene):
+        """Return list of the reaction IDs associated with the gene."""
+        return list(self._genes.get(gene, []))
+
+    def save(self, path, compression=None):
+        """Save index as tab-separated file (compressed by extension)."""
+        with open_compressed(path, 'wb', compression=compression) as f:
+            for gene, reactions in self._genes.items():
+                f.write(u'\t'.join([gene] + reactions).encode('utf-8'))
+                f.write(b'\n')
+
+    @classmethod
+    def load(cls, path):
+        """Load index from the (compressed) file at path."""
+        genes = OrderedDict()
+        with open_compressed(path, 'rb') as f:
+            for line in f:
+                fields = line.decode('utf-8').rstrip('\r\n').split('\t')
+                if fields[0] != '':
+                    genes[fields[0]] = fields[1:]
+        return cls(genes)
+
+
+class GeneIndexBuilder(ImportObserver):
+    """Import observer building the gene to reaction index.
+
+    The genes and reactions are kept in the order they were first seen.
+    """
+
+    def __init__(self):
+        """Create empty builder."""
+        self._reactions = OrderedDict()
+
+    def reaction(self, entry):
+        """Add the genes of the reaction entry to the index."""
+        # A repeated reaction ID replaces the earlier reaction as in the model
+        self._reactions.pop(entry.id, None)
+        genes = reaction_genes(entry.properties.get('genes'))
+        if len(genes) > 0:
+            self._reactions[entry.id] = genes
+
+    def build(self):
+        """Return the :class:`GeneIndex`."""
+        genes = OrderedDict()
+        for reaction_id, gene_ids in self._reactions.items():
+            for gene in gene_ids:
+                genes.setdefault(gene, []).append(reaction_id)
+        return GeneIndex(genes)
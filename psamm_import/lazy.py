@@ -0,0 +1,180 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Models with entries that are read from the source on access.
+
+With ``import_model(source, lazy=True)`` the importers return a
+:class:`LazyModel` right after the source is opened. The model properties
+(e.g. the name and the biomass reaction) are available immediately while
+the compounds and reactions are read from the source when they are
+accessed. Looking up an entry by ID only reads the rows up to that entry;
+iterating over the entries or taking the number of entries reads all of
+them. The observers and the report of the import are finished when all
+compounds and reactions have been read.
+
+Lazy models are not thread-safe. If an ID is repeated in the source, a
+lookup may return the first entry with the ID before the later entry
+replaces it.
+"""
+
+from collections import OrderedDict
+
+from six import itervalues
+
+from psamm.datasource import native
+
+
+class LazyEntrySet(object):
+    """Ordered set of entries that are read from an iterable on access.
+
+    Provides the interface of the entry sets of
+    :class:`psamm.datasource.native.NativeModel`. The ``on_complete``
+    callback is called when all entries have been read.
+    """
+
+    def __init__(self, entries=(), on_complete=None):
+        """Create entry set reading from the entries."""
+        self._dict = OrderedDict()
+        self._entries = iter(entries)
+        self._on_complete = on_complete
+        self._error = None
+
+    @property
+    def complete(self):
+        """Whether all entries have been read."""
+        return self._entries is None
+
+    def _read(self, key=None):
+        """Read entries until the entry with key is read (all if None)."""
+        if self._error is not None:
+            raise self._error
+        if self._entries is None:
+            return
+
+        try:
+            for entry in self._entries:
+                self._dict[entry.id] = entry
+                if key is not None and entry.id == key:
+                    return
+        except Exception as e:
+            self._error = e
+            raise
+
+        self._entries = None
+        if self._on_complete is not None:
+            callback, self._on_complete = self._on_complete, None
+            callback()
+
+    def __contains__(self, key):
+        """Return True if an entry with the ID exists."""
+        if key not in self._dict:
+            self._read(key)
+        return key in self._dict
+
+    def get(self, key, default=None):
+        """Return entry with the ID or default if it does not exist."""
+        try:
+            return self.__getitem__(key)
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        """Return entry with the ID."""
+        if key not in self._dict:
+            self._read(key)
+        return self._dict[key]
+
+    def __iter__(self):
+        """Iterate over the entries (reads all entries)."""
+        self._read()
+        return itervalues(self._dict)
+
+    def __len__(self):
+        """Return the number of entries (reads all entries)."""
+        self._read()
+        return len(self._dict)
+
+    def add_entry(self, entry):
+        """Add entry after the entries from the source."""
+        self._read()
+        self._dict[entry.id] = entry
+
+    def discard(self, key):
+        """Remove the entry with the ID if it exists."""
+        self._read()
+        self._dict.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        self._read()
+        self._dict.clear()
+
+    def update(self, it):
+        """Add the entries from the iterable."""
+        for entry in it:
+            self.add_entry(entry)
+
+    def __repr__(self):
+        """Return representation of the entries read so far."""
+        return str('<LazyEntrySet {{{}}}{}>').format(
+            ', '.join(repr(x) for x in itervalues(self._dict)),
+            '' if self.complete else ', ...')
+
+
+class LazyModel(native.NativeModel):
+    """Native model with compounds and reactions that are read on access.
+
+    The model has no entries until :meth:`defer` is called with the
+    entries to read.
+    """
+
+    def __init__(self, properties={}):
+        """Create empty model."""
+        super(LazyModel, self).__init__(properties)
+        self._compounds = LazyEntrySet()
+        self._reactions = LazyEntrySet()
+
+    def defer(self, compounds, reactions, finish=None,
+              compounds_need_reactions=False):
+        """Read the compounds and reactions from the iterables on access.
+
+        The ``finish`` callback is called with the model when all compounds
+        and reactions have been read. If ``compounds_need_reactions`` is
+        True, reading all compounds also reads all reactions (e.g. when the
+        finish callback adds placeholders for missing compounds).
+        """
+        pending = [2]
+
+        def complete():
+            pending[0] -= 1
+            if pending[0] == 0 and finish is not None:
+                finish(self)
+
+        if compounds_need_reactions:
+            compounds = self._iter_then_read_reactions(compounds)
+        self._compounds = LazyEntrySet(compounds, complete)
+        self._reactions = LazyEntrySet(reactions, complete)
+
+    def _iter_then_read_reactions(self, compounds):
+        for entry in compounds:
+            yield entry
+        self._reactions._read()
+
+    @property
+    def complete(self):
+        """Whether all compounds and reactions have been read."""
+        return self._compounds.complete and self._reactions.complete
@@ -0,0 +1,200 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Sparse stoichiometric matrix built while a model is imported.
+
+:class:`StoichiometricMatrixBuilder` is an import observer (see
+:mod:`psamm_import.observer`) that collects the stoichiometry of each
+reaction as the reaction rows are parsed::
+
+    builder = StoichiometricMatrixBuilder()
+    model = importer.import_model(source, observers=[builder])
+    builder.build().save('stoichiometry.npz')
+
+The matrix has a row for each compound (e.g. ``atp[c]``) and a column for
+each reaction with an equation, and is stored in CSR format. The ``.npz``
+file uses the same array names as :func:`scipy.sparse.save_npz`, so it can
+also be loaded with :func:`scipy.sparse.load_npz`. Requires NumPy (install
+the ``matrix`` extra).
+"""
+
+from collections import OrderedDict
+import logging
+
+from six import text_type
+
+from .observer import ImportObserver
+
+logger = logging.getLogger(__name__)
+
+#: Direction flag of reactions that can run forward
+FORWARD = 1
+
+#: Direction flag of reactions that can run in reverse
+REVERSE = 2
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            'NumPy is required for the stoichiometric matrix'
+            ' (install psamm-import[matrix])')
+    return numpy
+
+
+class StoichiometricMatrix(object):
+    """Sparse stoichiometric matrix in CSR format.
+
+    Attributes:
+        compounds: Array of compound names (row index).
+        reactions: Array of reaction IDs (column index).
+        directions: Array of direction flags of the reactions, a combination
+            of :data:`FORWARD` and :data:`REVERSE`.
+        indptr, indices, data: CSR arrays of the matrix.
+    """
+
+    def __init__(self, compounds, reactions, directions, indptr, indices,
+                 data):
+        """Create matrix from index and CSR arrays."""
+        self.compounds = compounds
+        self.reactions = reactions
+        self.directions = directions
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @property
+    def shape(self):
+        """Return the number of rows and columns."""
+        return len(self.compounds), len(self.reactions)
+
+    def reversible(self):
+        """Return boolean array of reactions that are reversible."""
+        return self.directions == FORWARD | REVERSE
+
+    def to_dense(self):
+        """Return matrix as a dense NumPy array."""
+        numpy = _numpy()
+        dense = numpy.zeros(self.shape)
+        for row in range(len(self.compounds)):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            dense[row, self.indices[start:end]] = self.data[start:end]
+        return dense
+
+    def to_scipy(self):
+        """Return matrix as :class:`scipy.sparse.csr_matrix`."""
+        from scipy import sparse
+        return sparse.csr_matrix(
+            (self.data, self.indices, self.indptr), shape=self.shape)
+
+    def save(self, path, compressed=True):
+        """Save matrix to ``.npz`` file."""
+        numpy = _numpy()
+        save = numpy.savez_compressed if compressed else numpy.savez
+        save(path, format=numpy.array(b'csr'),
+             shape=numpy.array(self.shape), indptr=self.indptr,
+             indices=self.indices, data=self.data, compounds=self.compounds,
+             reactions=self.reactions, directions=self.directions)
+
+    @classmethod
+    def load(cls, path):
+        """Load matrix from ``.npz`` file."""
+        numpy = _numpy()
+        with numpy.load(path) as f:
+            return cls(f['compounds'], f['reactions'], f['directions'],
+                       f['indptr'], f['indices'], f['data'])
+
+
+class StoichiometricMatrixBuilder(ImportObserver):
+    """Import observer building the stoichiometric matrix.
+
+    Reactions without an equation are left out of the matrix. Coefficients
+    that are not numbers (e.g. variable stoichiometry) are left out with a
+    warning.
+    """
+
+    def __init__(self):
+        """Create empty builder."""
+        self._compounds = {}
+        self._compound_names = []
+        self._reactions = OrderedDict()
+
+    def _compound_index(self, compound):
+        name = text_type(compound)
+        index = self._compounds.get(name)
+        if index is None:
+            index = len(self._compound_names)
+            self._compounds[name] = index
+            self._compound_names.append(name)
+        return index
+
+    def reaction(self, entry):
+        """Add the reaction column for the reaction entry."""
+        equation = entry.properties.get('equation')
+        if equation is None:
+            self._reactions.pop(entry.id, None)
+            return
+
+        column = {}
+        for compound, value in equation.compounds:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                logger.warning(
+                    'Leaving out non-numeric stoichiometry of {} in {}'
+                    ' from matrix'.format(compound, entry.id))
+                continue
+            index = self._compound_index(compound)
+            column[index] = column.get(index, 0.0) + value
+
+        direction = equation.direction
+        flags = ((FORWARD if direction.forward else 0) |
+                 (REVERSE if direction.reverse else 0))
+
+        # A repeated reaction ID replaces the earlier reaction as in the model
+        self._reactions.pop(entry.id, None)
+        self._reactions[entry.id] = flags, column
+
+    def build(self):
+        """Return the :class:`StoichiometricMatrix`."""
+        numpy = _numpy()
+
+        rows, cols, values = [], [], []
+        for col, (_, column) in enumerate(self._reactions.values()):
+            for row, value in column.items():
+                if value != 0:
+                    rows.append(row)
+                    cols.append(col)
+                    values.append(value)
+
+        rows = numpy.array(rows, dtype=numpy.int32)
+        cols = numpy.array(cols, dtype=numpy.int32)
+        order = numpy.lexsort((cols, rows))
+        counts = numpy.bincount(rows, minlength=len(self._compound_names))
+        indptr = numpy.zeros(len(self._compound_names) + 1, dtype=numpy.int32)
+        numpy.cumsum(counts, out=indptr[1:])
+
+        return StoichiometricMatrix(
+            compounds=numpy.array(self._compound_names, dtype=text_type),
+            reactions=numpy.array(list(self._reactions), dtype=text_type),
+            directions=numpy.array(
+                [flags for flags, _ in self._reactions.values()],
+                dtype=numpy.int8),
+            indptr=indptr, indices=cols[order],
+            data=numpy.array(values, dtype=numpy.float64)[order])
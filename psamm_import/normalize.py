@@ -0,0 +1,297 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Normalization of compound IDs and merging of duplicate compounds.
+
+Several workbooks list a compound once for every compartment it occurs in
+(e.g. ``atp[c]`` and ``atp[e]``), while the model only has one compound
+entry per base ID (``atp``). :class:`CompoundIdIndex` maps the
+compartmentalized IDs to base IDs and :func:`merge_duplicate_entries`
+merges the entries that end up with the same ID as soon as all entries
+with the ID have been read. :class:`CompoundTranslator`
+maps the compounds in parsed reaction equations to the IDs used in the
+model. :class:`EquationNormalizer` rewrites the equation strings of a
+workbook to the syntax accepted by the reaction parser.
+"""
+
+import re
+import logging
+from collections import OrderedDict
+
+from six import iteritems, text_type
+
+from psamm.datasource.entry import DictCompoundEntry
+from psamm.reaction import Reaction
+
+logger = logging.getLogger(__name__)
+
+_COMPARTMENT_SUFFIX = re.compile(r'^(.*)\[(.)\]$')
+
+
+class CompoundIdIndex(object):
+    """Index of compartmentalized compound IDs to base IDs.
+
+    The index is built once from the column of compound IDs in the
+    compound sheet. Each distinct ID is only parsed once and equal base IDs
+    share a single string object. :attr:`counts` is the number of IDs added
+    for each base ID, which tells :func:`merge_duplicate_entries` when all
+    entries of a base ID have been read.
+
+    Args:
+        compound_ids: Iterable of compound IDs to index.
+        lower: Whether to convert base IDs to lower case.
+    """
+
+    def __init__(self, compound_ids=(), lower=False):
+        """Create index of the given compound IDs."""
+        self._lower = lower
+        self._base_ids = {}
+        self._strings = {}
+        self._compartments = OrderedDict()
+        self._counts = {}
+        for compound_id in compound_ids:
+            self.add(compound_id)
+
+    def add(self, compound_id):
+        """Add compound ID to the index and return the base ID."""
+        base_id = self._lookup(compound_id)
+        self._counts[base_id] = self._counts.get(base_id, 0) + 1
+        return base_id
+
+    def _lookup(self, compound_id):
+        base_id = self._base_ids.get(compound_id)
+        if base_id is not None:
+            return base_id
+
+        m = _COMPARTMENT_SUFFIX.match(compound_id)
+        if m:
+            base_id, compartment = m.groups()
+        else:
+            base_id, compartment = compound_id, None
+
+        if self._lower:
+            base_id = base_id.lower()
+        base_id = self._strings.setdefault(base_id, base_id)
+
+        self._base_ids[compound_id] = base_id
+        compartments = self._compartments.setdefault(base_id, [])
+        if compartment is not None and compartment not in compartments:
+            compartments.append(compartment)
+        return base_id
+
+    def __getitem__(self, compound_id):
+        """Return base ID of compound ID."""
+        return self._lookup(compound_id)
+
+    def __len__(self):
+        """Return the number of distinct base IDs."""
+        return len(self._compartments)
+
+    def __iter__(self):
+        """Iterate over the base IDs in the order they were added."""
+        return iter(self._compartments)
+
+    def compartments(self, base_id):
+        """Return list of the compartments that the compound is listed in."""
+        return list(self._compartments.get(base_id, []))
+
+    @property
+    def counts(self):
+        """Return dict of the number of IDs added for each base ID."""
+        return self._counts
+
+
+def merge_duplicate_entries(entries, report=None, counts=None):
+    """Merge entries with the same ID and yield the merged entries.
+
+    The entries are yielded in the order that each ID was first seen. The
+    first entry with an ID takes precedence; properties that are missing
+    (None) in the first entry are filled in from the later entries in a new
+    entry, so the entries read are not modified. If a later entry has a
+    different value for a property, the conflict is added to the report in
+    the category ``compound_conflict`` (or logged as a warning if there is
+    no report).
+
+    ``counts`` maps each ID to the number of entries with the ID (e.g.
+    :attr:`CompoundIdIndex.counts`). An entry is yielded as soon as all
+    entries with its ID have been read and the entries before it have been
+    yielded, so only the entries between the first and the last entry of a
+    duplicated ID are kept in memory. Entries with an ID that is not in
+    ``counts`` (or all entries if ``counts`` is None) are kept until all
+    entries have been read.
+    """
+    pending = OrderedDict()
+    remaining = {}
+    merged = set()
+    for entry in entries:
+        if entry.id in merged:
+            # More entries than counted; the merged entry was yielded
+            _warn_conflict(report, entry.id, 'Ignoring duplicate entry')
+            continue
+
+        group = pending.get(entry.id)
+        if group is None:
+            group = pending[entry.id] = []
+            remaining[entry.id] = (
+                counts.get(entry.id) if counts is not None else None)
+        group.append(entry)
+        if remaining[entry.id] is not None:
+            remaining[entry.id] -= 1
+
+        while len(pending) > 0:
+            entry_id = next(iter(pending))
+            if remaining[entry_id] is None or remaining[entry_id] > 0:
+                break
+            group = pending.pop(entry_id)
+            del remaining[entry_id]
+            merged.add(entry_id)
+            yield _merge_entries(group, report)
+
+    for group in pending.values():
+        yield _merge_entries(group, report)
+
+
+def _merge_entries(group, report):
+    """Return the first entry with missing properties filled in."""
+    first = group[0]
+    properties = first.properties
+    copied = False
+    for entry in group[1:]:
+        for key, value in sorted(iteritems(entry.properties)):
+            if value is None:
+                continue
+            current = properties.get(key)
+            if current is None:
+                if not copied:
+                    properties = dict(properties)
+                    copied = True
+                properties[key] = value
+            elif current != value:
+                _warn_conflict(
+                    report, entry.id, 'Conflicting {}: {} and {}'.format(
+                        key, current, value))
+
+    if not copied:
+        return first
+    return DictCompoundEntry(properties, filemark=first.filemark)
+
+
+def _warn_conflict(report, entry_id, message):
+    if report is not None:
+        report.add('compound_conflict', entry_id, message)
+    else:
+        logger.warning('{}: {}'.format(entry_id, message))
+
+
+class CompoundTranslator(object):
+    """Memoized translation of the compounds in reaction equations.
+
+    The translation function is called once for each distinct compound and
+    the result is cached, so equal compounds in all equations of an import
+    share the translated :class:`psamm.reaction.Compound` object.
+
+    Args:
+        translate: Function mapping a compound to the translated compound.
+    """
+
+    def __init__(self, translate):
+        """Create translator using the translation function."""
+        self._translate = translate
+        self._cache = {}
+
+    def __call__(self, compound):
+        """Return translated compound."""
+        result = self._cache.get(compound)
+        if result is None:
+            result = self._translate(compound)
+            self._cache[compound] = result
+        return result
+
+    def translate_reaction(self, reaction):
+        """Return reaction with the compounds translated."""
+        return Reaction(
+            reaction.direction,
+            [(self(compound), value) for compound, value in reaction.left],
+            [(self(compound), value) for compound, value in reaction.right])
+
+    @property
+    def count(self):
+        """Return the number of distinct compounds seen."""
+        return len(self._cache)
+
+    def translated(self):
+        """Return list of ``(compound, translated)`` pairs that differ."""
+        return [(compound, result) for compound, result in
+                sorted(iteritems(self._cache), key=lambda x: text_type(x[0]))
+                if compound != result]
+
+    def add_to_report(self, report):
+        """Add the translated compounds to the report.
+
+        The items are added in the category ``translated_compound``.
+        """
+        if report is None:
+            return
+        for compound, result in self.translated():
+            report.add('translated_compound', text_type(compound),
+                       'Translated to {}'.format(result))
+
+
+class EquationNormalizer(object):
+    """Normalization of the operators in reaction equation strings.
+
+    The equation is split at the operators (including the surrounding
+    whitespace) by one compiled pattern and joined again with a single
+    space around each operator. This is a single scan in the regular
+    expression engine instead of one substitution for each operator
+    (``benchmarks/equations.py`` compares it to the substitutions).
+
+    With ``quoted_compartments``, compartments following a quoted compound
+    name are moved inside the quotes (``|atp|[c]`` becomes ``|atp[c]|``)
+    and double pipes are reduced to one.
+
+    Args:
+        operators: Operator strings (e.g. ``+`` and the reaction arrows).
+        quoted_compartments: Whether to move compartments inside quotes.
+    """
+
+    def __init__(self, operators, quoted_compartments=False):
+        """Create normalizer for the operators."""
+        # Longer operators first so that an operator that is a prefix of
+        # another operator does not split it.
+        operators = sorted(operators, key=len, reverse=True)
+        self._split = re.compile(r'\s*({})\s*'.format(
+            '|'.join(re.escape(op) for op in operators)), re.UNICODE)
+        self._quoted_compartments = quoted_compartments
+
+    def __call__(self, equation):
+        """Return normalized equation string."""
+        equation = ' '.join(self._split.split(equation))
+        if self._quoted_compartments:
+            if '|[' in equation:
+                equation = _QUOTED_COMPARTMENT.sub(
+                    _move_compartment, equation)
+            equation = equation.replace('||', '|')
+        return equation
+
+
+_QUOTED_COMPARTMENT = re.compile(r'\|\[(\w)\]', re.UNICODE)
+
+
+def _move_compartment(match):
+    # Faster than expanding a replacement template for every match
+    return '[' + match.group(1) + ']|'
@@ -0,0 +1,62 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Observers of the entries read during an import.
+
+Observers are passed to ``import_model()`` of the importers and see each
+compound and reaction entry as soon as it has been parsed from the source,
+before it is added to the model. This allows building derived data (e.g.
+the stoichiometric matrix in :mod:`psamm_import.matrix`) in the same pass
+over the rows instead of walking the model again after the import.
+"""
+
+
+class ImportObserver(object):
+    """Base class of import observers.
+
+    Compound entries with the same ID are merged before they are observed
+    (see :func:`psamm_import.normalize.merge_duplicate_entries`): the first
+    entry with an ID is kept and its missing properties are filled in from
+    the later entries. Observers see each compound ID once, as the merged
+    entry that is added to the model.
+
+    A reaction entry may be seen more than once if the source defines the
+    same ID multiple times. The later reaction entry replaces the earlier
+    entry in the model, so observers should do the same.
+    """
+
+    def compound(self, entry):
+        """Observe compound entry."""
+
+    def reaction(self, entry):
+        """Observe reaction entry."""
+
+    def finish(self, model):
+        """Observe the model when all entries have been read."""
+
+
+def observe(entries, callbacks):
+    """Yield entries after calling each of the callbacks with the entry."""
+    if len(callbacks) == 0:
+        for entry in entries:
+            yield entry
+        return
+
+    for entry in entries:
+        for callback in callbacks:
+            callback(entry)
+        yield entry
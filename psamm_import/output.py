@@ -0,0 +1,312 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Compressed single-file output of imported models.
+
+Instead of the directory of YAML files written by
+:func:`psamm.importer.write_yaml_model`, the model is written as a single
+YAML document (e.g. ``model.yaml.gz``) with the compounds and reactions
+included inline. The entries are written to the compressed stream in chunks
+so only one chunk of converted entries is held in memory at a time.
+
+Gzip is always available. Zstandard compression requires the ``zstandard``
+package (install the ``zstd`` extra). :func:`load_model` detects the
+compression from the file contents, so compressed and uncompressed models
+are loaded the same way.
+"""
+
+from collections import OrderedDict
+from decimal import Decimal
+import gzip
+import io
+import itertools
+import os
+
+import yaml
+
+from psamm.datasource import native
+from psamm.datasource.context import FilePathContext
+from psamm.expression import boolean
+from psamm import importer
+
+#: Default number of entries converted and written at a time
+DEFAULT_CHUNK_SIZE = 1000
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd'
+}
+
+#: File names searched for by :func:`load_model` in a directory
+DEFAULT_MODEL_FILES = ('model.yaml.gz', 'model.yaml.zst')
+
+
+class _Dumper(yaml.SafeDumper):
+    """YAML dumper for the model properties."""
+
+
+def _represent_ordered_dict(dumper, data):
+    return dumper.represent_mapping(
+        'tag:yaml.org,2002:map', data.items())
+
+
+def _represent_decimal(dumper, data):
+    if data == data.to_integral_value():
+        return dumper.represent_int(int(data))
+    return dumper.represent_scalar('tag:yaml.org,2002:float', str(data))
+
+
+def _represent_set(dumper, data):
+    return dumper.represent_list(sorted(data))
+
+
+def _represent_expression(dumper, data):
+    return dumper.represent_str(str(data))
+
+
+_Dumper.add_representer(OrderedDict, _represent_ordered_dict)
+_Dumper.add_representer(Decimal, _represent_decimal)
+_Dumper.add_representer(set, _represent_set)
+_Dumper.add_representer(frozenset, _represent_set)
+_Dumper.add_representer(boolean.Expression, _represent_expression)
+_Dumper.ignore_aliases = lambda *args: True
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            'Zstandard compression requires the zstandard package'
+            ' (install psamm-import[zstd])')
+    return zstandard
+
+
+def compression_from_path(path):
+    """Return compression implied by the file extension of path (or None)."""
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def _detect_compression(path):
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic.startswith(_GZIP_MAGIC):
+        return 'gzip'
+    elif magic.startswith(_ZSTD_MAGIC):
+        return 'zstd'
+    return None
+
+
+def open_compressed(path, mode='rb', compression=None):
+    """Open binary file that may be compressed.
+
+    When reading, the compression is detected from the file contents. When
+    writing, the compression is given or implied by the file extension
+    (``.gz`` or ``.zst``).
+    """
+    if mode not in ('rb', 'wb'):
+        raise ValueError('Invalid mode: {}'.format(mode))
+
+    if compression is None:
+        if mode == 'rb':
+            compression = _detect_compression(path)
+        else:
+            compression = compression_from_path(path)
+
+    if compression is None:
+        return open(path, mode)
+    elif compression == 'gzip':
+        return gzip.open(path, mode)
+    elif compression == 'zstd':
+        zstandard = _zstandard()
+        f = open(path, mode)
+        try:
+            if mode == 'rb':
+                stream = zstandard.ZstdDecompressor().stream_reader(f)
+                return io.BufferedReader(_ClosingStream(stream, f))
+            return _ClosingStream(
+                zstandard.ZstdCompressor().stream_writer(f), f)
+        except Exception:
+            f.close()
+            raise
+    raise ValueError('Unknown compression: {}'.format(compression))
+
+
+class _ClosingStream(io.RawIOBase):
+    """Wrap (de)compression stream and close the file with the stream."""
+
+    def __init__(self, stream, f):
+        self._stream = stream
+        self._file = f
+
+    def readable(self):
+        return hasattr(self._stream, 'read')
+
+    def writable(self):
+        return hasattr(self._stream, 'write')
+
+    def readinto(self, b):
+        data = self._stream.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def write(self, b):
+        self._stream.write(b)
+        return len(b)
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._stream.close()
+            finally:
+                self._file.close()
+        super(_ClosingStream, self).close()
+
+
+def _prepare_model(model, convert_exchange):
+    """Fill in model properties as :func:`write_yaml_model` does."""
+    if model.default_flux_limit is None:
+        model.default_flux_limit = importer.detect_best_flux_limit(model)
+
+    if model.extracellular_compartment is None:
+        model.extracellular_compartment = (
+            importer.sbml.detect_extracellular_compartment(model))
+
+    if model.default_compartment is None:
+        model.default_compartment = importer.get_default_compartment(model)
+
+    if convert_exchange:
+        importer.sbml.convert_exchange_to_compounds(model)
+
+    if len(model.compartments) == 0:
+        importer.infer_compartment_entries(model)
+
+    if (len(model.compartments) != 0 and
+            len(model.compartment_boundaries) == 0):
+        importer.infer_compartment_adjacency(model)
+
+
+def _model_properties(model, writer):
+    model_d = OrderedDict()
+    if model.name is not None:
+        model_d['name'] = model.name
+    if model.biomass_reaction is not None:
+        model_d['biomass'] = model.biomass_reaction
+    if model.default_flux_limit is not None:
+        model_d['default_flux_limit'] = model.default_flux_limit
+    if model.extracellular_compartment != 'e':
+        model_d['extracellular'] = model.extracellular_compartment
+    if model.default_compartment != 'c':
+        model_d['default_compartment'] = model.default_compartment
+
+    if len(model.compartments) > 0:
+        adjacency = {}
+        for c1, c2 in model.compartment_boundaries:
+            adjacency.setdefault(c1, set()).add(c2)
+            adjacency.setdefault(c2, set()).add(c1)
+
+        compartment_list = []
+        for compartment in sorted(model.compartments, key=lambda c: c.id):
+            adjacent = adjacency.get(compartment.id)
+            if adjacent is not None and len(adjacent) == 1:
+                adjacent = next(iter(adjacent))
+            compartment_list.append(writer.convert_compartment_entry(
+                compartment, adjacent))
+        model_d['compartments'] = compartment_list
+
+    if len(model.exchange) > 0:
+        model_d['exchange'] = [importer.model_exchange(model)]
+
+    reaction_limits = list(importer.model_reaction_limits(model))
+    if len(reaction_limits) > 0:
+        model_d['limits'] = reaction_limits
+
+    return model_d
+
+
+def _write_chunked(stream, key, entries, write, chunk_size):
+    """Write entries as block sequence under key in chunks."""
+    entries = iter(entries)
+    chunk = list(itertools.islice(entries, chunk_size))
+    if len(chunk) == 0:
+        stream.write(key.encode('utf-8') + b': []\n')
+        return
+
+    stream.write(key.encode('utf-8') + b':\n')
+    while len(chunk) > 0:
+        # Each chunk is dumped as a block sequence without indentation.
+        # Consecutive sequences form a single sequence under the key.
+        write(stream, chunk)
+        chunk = list(itertools.islice(entries, chunk_size))
+
+
+def write_model_stream(model, stream, convert_exchange=True,
+                       chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write model as a single YAML document to binary stream.
+
+    The model properties are completed as in
+    :func:`psamm.importer.write_yaml_model` and the exchange reactions are
+    converted to an exchange definition if ``convert_exchange`` is True.
+    """
+    writer = native.ModelWriter()
+    _prepare_model(model, convert_exchange)
+
+    yaml.dump(_model_properties(model, writer), stream, Dumper=_Dumper,
+              default_flow_style=False, encoding='utf-8', allow_unicode=True,
+              width=79)
+
+    _write_chunked(stream, 'compounds',
+                   sorted(model.compounds, key=lambda c: c.id),
+                   writer.write_compounds, chunk_size)
+    _write_chunked(stream, 'reactions',
+                   sorted(model.reactions, key=lambda r: r.id),
+                   writer.write_reactions, chunk_size)
+
+
+def write_compressed_model(model, path, compression=None, **kwargs):
+    """Write model to the (compressed) file at path.
+
+    The compression is ``gzip``, ``zstd`` or None, and defaults to the
+    compression implied by the file extension. Keyword arguments are passed
+    to :func:`write_model_stream`.
+    """
+    with open_compressed(path, 'wb', compression=compression) as f:
+        write_model_stream(model, f, **kwargs)
+
+
+def load_model(path):
+    """Load model from the (compressed) model file at path.
+
+    If path is a directory, it is searched for a compressed model file
+    (:data:`DEFAULT_MODEL_FILES`) before falling back to the YAML model in
+    the directory.
+    """
+    if os.path.isdir(path):
+        for filename in DEFAULT_MODEL_FILES:
+            model_path = os.path.join(path, filename)
+            if os.path.isfile(model_path):
+                path = model_path
+                break
+        else:
+            return native.ModelReader.reader_from_path(path).create_model()
+
+    with open_compressed(path, 'rb') as f:
+        reader = native.ModelReader(f, FilePathContext(path))
+    return reader.create_model()
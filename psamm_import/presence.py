@@ -0,0 +1,168 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Presence of reactions across models defined in the same workbook.
+
+Some workbooks define several models in one reaction table, with a column
+per model marking whether the reaction is present in that model. The
+:class:`PresenceMatrix` keeps the presence of each model as a bitset over
+the reaction rows (a Python integer with bit ``i`` set if reaction ``i`` is
+present), so comparisons across the models are a few bitwise operations.
+"""
+
+from six import integer_types, string_types
+
+
+def _popcount(bits):
+    return bin(bits).count('1')
+
+
+class PresenceMatrix(object):
+    """Reaction-by-model presence matrix.
+
+    Args:
+        reactions: Sequence of reaction IDs (rows).
+        models: Sequence of model names (columns).
+        bitsets: Sequence with the presence bitset of each model.
+    """
+
+    def __init__(self, reactions, models, bitsets):
+        """Create presence matrix from bitsets."""
+        self.reactions = tuple(reactions)
+        self.models = tuple(models)
+        self._bitsets = tuple(bitsets)
+        if len(self._bitsets) != len(self.models):
+            raise ValueError('Expected a bitset for each model')
+
+    @classmethod
+    def from_rows(cls, reactions, models, rows):
+        """Create matrix from rows of presence values (one per model)."""
+        # Collect the binary digits of each bitset and convert each bitset
+        # at once. Setting the bits one at a time would copy the growing
+        # integer for every row.
+        digits = [[] for _ in models]
+        for row in rows:
+            for j, present in enumerate(row):
+                digits[j].append('1' if present else '0')
+        bitsets = [int(''.join(reversed(d)), 2) if len(d) > 0 else 0
+                   for d in digits]
+        return cls(reactions, models, bitsets)
+
+    @property
+    def shape(self):
+        """Return the number of reactions and models."""
+        return len(self.reactions), len(self.models)
+
+    def model_index(self, model):
+        """Return column index of model given as name or index."""
+        if isinstance(model, integer_types):
+            if not 0 <= model < len(self.models):
+                raise IndexError('Model index out of range: {}'.format(model))
+            return model
+
+        if isinstance(model, string_types):
+            for i, name in enumerate(self.models):
+                if name.lower() == model.lower():
+                    return i
+        raise KeyError('Unknown model: {}'.format(model))
+
+    def bitset(self, model):
+        """Return presence bitset of model."""
+        return self._bitsets[self.model_index(model)]
+
+    def _combined(self, models, operator):
+        if models is None:
+            models = range(len(self.models))
+        bitsets = [self.bitset(model) for model in models]
+        if len(bitsets) == 0:
+            return 0
+        result = bitsets[0]
+        for bits in bitsets[1:]:
+            result = operator(result, bits)
+        return result
+
+    def core_bitset(self, models=None):
+        """Return bitset of reactions present in all of the models."""
+        return self._combined(models, lambda a, b: a & b)
+
+    def pan_bitset(self, models=None):
+        """Return bitset of reactions present in any of the models."""
+        return self._combined(models, lambda a, b: a | b)
+
+    def unique_bitset(self, model, models=None):
+        """Return bitset of reactions only present in model.
+
+        The reactions are compared to the other models in ``models`` (all
+        models by default).
+        """
+        index = self.model_index(model)
+        if models is None:
+            models = range(len(self.models))
+        others = [m for m in models if self.model_index(m) != index]
+        return self._bitsets[index] & ~self.pan_bitset(others)
+
+    def reaction_ids(self, bits):
+        """Return list of reaction IDs of the bits set in bitset."""
+        digits = bin(bits)[:1:-1]
+        result = []
+        i = digits.find('1')
+        while i >= 0:
+            result.append(self.reactions[i])
+            i = digits.find('1', i + 1)
+        return result
+
+    def present(self, model):
+        """Return list of reactions present in model."""
+        return self.reaction_ids(self.bitset(model))
+
+    def core(self, models=None):
+        """Return list of reactions present in all of the models."""
+        return self.reaction_ids(self.core_bitset(models))
+
+    def pan(self, models=None):
+        """Return list of reactions present in any of the models."""
+        return self.reaction_ids(self.pan_bitset(models))
+
+    def unique(self, model, models=None):
+        """Return list of reactions only present in model."""
+        return self.reaction_ids(self.unique_bitset(model, models))
+
+    def count(self, model):
+        """Return number of reactions present in model."""
+        return _popcount(self.bitset(model))
+
+    def shared_counts(self):
+        """Return matrix (list of lists) of reactions shared by two models."""
+        return [[_popcount(a & b) for b in self._bitsets]
+                for a in self._bitsets]
+
+    def to_array(self):
+        """Return NumPy boolean array of shape (reactions, models)."""
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('NumPy is required to convert to array')
+
+        n = len(self.reactions)
+        array = numpy.zeros(self.shape, dtype=bool)
+        for j, bits in enumerate(self._bitsets):
+            if n > 0:
+                # Binary digits of the bitset with reaction 0 first
+                digits = '{:0{}b}'.format(bits, n)[::-1].encode('ascii')
+                array[:, j] = numpy.frombuffer(
+                    digits, dtype=numpy.uint8) == ord('1')
+        return array
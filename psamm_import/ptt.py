@@ -0,0 +1,160 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Index of the gene locations in NCBI protein table (PTT) files.
+
+ModelSEED models name genes by PEG IDs, which are mapped to the gene IDs of
+the genome through their locations in the PTT file. :class:`GeneLocationIndex`
+keeps the genes sorted by start position so genes can be looked up by
+exact location, by the nearest location within a tolerance (the coordinates
+in ModelSEED are sometimes off by a few bases) or by overlap with an
+interval. Indexes are shared through :data:`gene_index_cache`, so the PTT
+file of a genome is only parsed once for all models of that genome.
+"""
+
+import bisect
+import csv
+import logging
+import re
+
+from .workbook import WorkbookCache
+
+logger = logging.getLogger(__name__)
+
+_LOCATION = re.compile(r'^(\d+)\.\.(\d+)$')
+
+
+def iter_ptt(f):
+    """Yield ``(start, stop, strand, gene_id)`` of the genes in PTT file.
+
+    The three header lines are skipped and the gene ID is taken from the
+    synonym column (the locus tag).
+    """
+    for _ in range(3):
+        f.readline()  # Skip headers
+    for i, row in enumerate(csv.reader(f, delimiter='\t'), start=4):
+        if len(row) == 0:
+            continue
+        if len(row) < 6:
+            raise ValueError(
+                'Expected at least six columns on line {}'.format(i))
+        location, strand, _, _, _, gene_id = row[:6]
+        m = _LOCATION.match(location)
+        if not m:
+            raise ValueError('Invalid location on line {}: {!r}'.format(
+                i, location))
+        yield int(m.group(1)), int(m.group(2)), strand, gene_id
+
+
+class GeneLocationIndex(object):
+    """Index of genes by location on the genome.
+
+    Args:
+        genes: Iterable of ``(start, stop, strand, gene_id)``.
+    """
+
+    def __init__(self, genes=()):
+        """Create index of the genes."""
+        genes = sorted(genes)
+        self._starts = [g[0] for g in genes]
+        self._stops = [g[1] for g in genes]
+        self._strands = [g[2] for g in genes]
+        self._gene_ids = [g[3] for g in genes]
+        self._exact = {}
+        for start, stop, strand, gene_id in genes:
+            self._exact.setdefault((start, stop, strand), gene_id)
+        self._max_length = max(
+            [stop - start for start, stop, _, _ in genes] or [0])
+
+    @classmethod
+    def from_file(cls, path):
+        """Create index from the PTT file at path."""
+        with open(path, 'r') as f:
+            return cls(iter_ptt(f))
+
+    def __len__(self):
+        """Return the number of genes in the index."""
+        return len(self._gene_ids)
+
+    def lookup(self, start, stop, strand, tolerance=0):
+        """Return ID of the gene at location or None if not found.
+
+        If there is no gene at the exact location, the gene on the same
+        strand with the nearest location is returned if both the start and
+        stop are within ``tolerance`` bases.
+        """
+        gene_id = self._exact.get((start, stop, strand))
+        if gene_id is not None or tolerance <= 0:
+            return gene_id
+
+        best, best_distance = None, None
+        lo = bisect.bisect_left(self._starts, start - tolerance)
+        hi = bisect.bisect_right(self._starts, start + tolerance)
+        for i in range(lo, hi):
+            if self._strands[i] != strand:
+                continue
+            stop_distance = abs(self._stops[i] - stop)
+            if stop_distance > tolerance:
+                continue
+            distance = abs(self._starts[i] - start) + stop_distance
+            if best_distance is None or distance < best_distance:
+                best, best_distance = self._gene_ids[i], distance
+        return best
+
+    def lookup_many(self, locations, tolerance=0):
+        """Return list of gene IDs (or None) of the locations.
+
+        The locations are ``(start, stop, strand)`` tuples. Repeated
+        locations are only looked up once.
+        """
+        found = {}
+        result = []
+        for location in locations:
+            gene_id = found.get(location, self)
+            if gene_id is self:
+                gene_id = self.lookup(*location, tolerance=tolerance)
+                found[location] = gene_id
+            result.append(gene_id)
+        return result
+
+    def overlapping(self, start, stop, strand=None):
+        """Return list of IDs of the genes that overlap the interval.
+
+        If strand is given, only genes on that strand are returned.
+        """
+        lo = bisect.bisect_left(self._starts, start - self._max_length)
+        hi = bisect.bisect_right(self._starts, stop)
+        return [self._gene_ids[i] for i in range(lo, hi)
+                if self._stops[i] >= start and
+                (strand is None or self._strands[i] == strand)]
+
+
+class GeneIndexCache(WorkbookCache):
+    """LRU cache of gene location indexes keyed by PTT file path."""
+
+    def _load(self, path):
+        logger.debug('Indexing PTT file {}'.format(path))
+        return GeneLocationIndex.from_file(path)
+
+
+#: Gene index cache shared by all importers in the process
+gene_index_cache = GeneIndexCache()
+
+
+def open_gene_index(path):
+    """Return gene location index of the PTT file at path (cached)."""
+    return gene_index_cache.open(path)
@@ -0,0 +1,383 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2015-2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+# Copyright 2015  Keith Dufault-Thompson <keitht547@my.uri.edu>
+
+"""Importer metadata and lazily loaded importer entry points.
+
+This module must stay cheap to import: it must not import xlrd or
+:mod:`psamm_import.excel`. The metadata of each importer (name, title and
+expected files) is defined here in an ``*Info`` class. The importers in
+:mod:`psamm_import.excel` derive from these classes, and the
+``psamm.importer`` entry points refer to the :class:`LazyImporter`
+subclasses below which only load :mod:`psamm_import.excel` when a model is
+actually imported. Listing the importers (``psamm-import list``) therefore
+only imports this module. The proxies derive from
+:class:`psamm.importer.Importer` which is already imported by
+``psamm-import`` when it reads the entry points.
+
+``benchmarks/startup.py`` measures the time it takes to list the importers.
+"""
+
+from __future__ import print_function
+
+import os
+import glob
+import importlib
+
+from psamm.importer import Importer
+
+
+class ImporterInfo(object):
+    """Metadata of an importer."""
+
+    name = None
+    title = None
+    generic = False
+
+    # Name of model file (single file importers)
+    filename = None
+
+    # Names of model files (multiple file importers)
+    filenames = ()
+
+    def help(self):
+        """Print importer help text."""
+        print('Source must contain the model definition in Excel format.\n'
+              'Expected files in source directory:')
+        for filename in self.filenames or (self.filename,):
+            print('- {}'.format(filename))
+
+    def source_files(self, source):
+        """Return paths of the files that a model is imported from."""
+        if os.path.isfile(source):
+            return [source]
+        return [os.path.join(source, filename)
+                for filename in self.filenames or (self.filename,)]
+
+
+class ImportiMA945Info(ImporterInfo):
+    """Metadata of the ImportiMA945 importer."""
+
+    name = 'iMA945'
+    title = 'Salmonella enterica iMA945 (Excel format), AbuOun et al., 2009'
+    filename = 'jbc.M109.005868-5.xls'
+
+
+class ImportiRR1083Info(ImporterInfo):
+    """Metadata of the ImportiRR1083 importer."""
+
+    name = 'iRR1083'
+    title = ('Salmonella enterica iRR1083 (Excel format),'
+             ' Raghunathan et al., 2009')
+    filename = '1752-0509-3-38-s1.xls'
+
+
+class ImportiJO1366Info(ImporterInfo):
+    """Metadata of the ImportiJO1366 importer."""
+
+    name = 'iJO1366'
+    title = ('Escerichia coli iJO1366 (Excel format),'
+             ' Orth et al., 2011')
+    filename = 'inline-supplementary-material-2.xls'
+
+
+class EColiTextbookImportInfo(ImporterInfo):
+    """Metadata of the EColiTextbookImport importer."""
+
+    name = 'EColi_textbook'
+    title = ('Escerichia coli Textbook (core) model (Excel format),'
+             ' Orth et al., 2010')
+    filename = 'ecoli_core_model.xls'
+
+
+class ImportSTMv1_0Info(ImporterInfo):  # noqa
+    """Metadata of the ImportSTMv1_0 importer."""
+
+    name = 'STM_v1.0'
+    title = ('Salmonella enterica STM_v1.0 (Excel format),'
+             ' Thiele et al., 2011')
+    filename = '1752-0509-5-8-s1.xlsx'
+
+
+class ImportiJN746Info(ImporterInfo):
+    """Metadata of the ImportiJN746 importer."""
+
+    name = 'iJN746'
+    title = ('Pseudomonas putida iJN746 (Excel format),'
+             ' Nogales et al., 2011')
+    filenames = ('1752-0509-2-79-s8.xls',
+                 '1752-0509-2-79-s9.xls')
+
+
+class ImportiJP815Info(ImporterInfo):
+    """Metadata of the ImportiJP815 importer."""
+
+    name = 'iJP815'
+    title = ('Pseudomonas putida iJP815 (Excel format),'
+             ' Puchalka et al., 2008')
+    filename = 'journal.pcbi.1000210.s011.XLS'
+
+
+class ImportiSyn731Info(ImporterInfo):
+    """Metadata of the ImportiSyn731 importer."""
+
+    name = 'iSyn731'
+    title = ('Synechocystis sp. PCC 6803 iSyn731 (Excel format),'
+             ' Saha et al., 2012')
+    filename = 'journal.pone.0048285.s001.XLSX'
+
+
+class ImportiCce806Info(ImporterInfo):
+    """Metadata of the ImportiCce806 importer."""
+
+    name = 'iCce806'
+    title = ('Cyanothece sp. ATCC 51142 iCce806 (Excel format),'
+             ' Vu et al., 2012')
+    filenames = ('journal.pcbi.1002460.s005.XLSX',
+                 'journal.pcbi.1002460.s006.XLSX')
+
+
+class ImportGSMN_TBInfo(ImporterInfo):  # noqa
+    """Metadata of the ImportGSMN_TB importer."""
+
+    name = 'GSMN-TB'
+    title = ('Mycobacterium tuberculosis GSMN-TB (Excel format),'
+             ' Beste et al., 2007')
+    filenames = ('gb-2007-8-5-r89-s4.xls',
+                 'gb-2007-8-5-r89-s6.xls')
+
+
+class ImportiNJ661Info(ImporterInfo):
+    """Metadata of the ImportiNJ661 importer."""
+
+    name = 'iNJ661'
+    title = ('Mycobacterium tuberculosis iNJ661 (Excel format),'
+             ' Jamshidi et al., 2007')
+    filename = '1752-0509-1-26-s5.xls'
+
+
+class ImportiNJ661mInfo(ImporterInfo):
+    """Metadata of the ImportiNJ661m importer."""
+
+    name = 'inj661m'
+    title = ('Mycobacterium tuberculosis iNJ661m (Excel format),'
+             ' Fang et al., 2010')
+    filename = '1752-0509-4-160-s3.xls'
+
+
+class ImportiNJ661vInfo(ImporterInfo):
+    """Metadata of the ImportiNJ661v importer."""
+
+    name = 'inj661v'
+    title = ('Mycobacterium tuberculosis iNJ661v (Excel format),'
+             ' Fang et al., 2010')
+    filename = '1752-0509-4-160-s5.xls'
+
+
+class ImportShewanellaOngInfo(ImporterInfo):
+    """Metadata of the ImportShewanellaOng importer."""
+
+    filename = '1752-0509-8-31-s2.xlsx'
+
+
+class ImportiMR1_799Info(ImportShewanellaOngInfo):  # noqa
+    """Metadata of the ImportiMR1_799 importer."""
+
+    name = 'imr1_799'
+    title = ('Shewanella oneidensis MR-1 iMR1_799 (Excel format),'
+             ' Ong et al., 2014')
+
+
+class ImportiMR4_812Info(ImportShewanellaOngInfo):  # noqa
+    """Metadata of the ImportiMR4_812 importer."""
+
+    name = 'imr4_812'
+    title = ('Shewanella sp. MR-4 iMR4_812 (Excel format),'
+             ' Ong et al., 2014')
+
+
+class ImportiW3181_789Info(ImportShewanellaOngInfo):  # noqa
+    """Metadata of the ImportiW3181_789 importer."""
+
+    name = 'iw3181_789'
+    title = ('Shewanella sp. W3-18-1 iW3181_789 (Excel format),'
+             ' Ong et al., 2014')
+
+
+class ImportiOS217_672Info(ImportShewanellaOngInfo):  # noqa
+    """Metadata of the ImportiOS217_672 importer."""
+
+    name = 'ios217_672'
+    title = ('Shewanella denitrificans OS217 iOS217_672 (Excel format),'
+             ' Ong et al., 2014')
+
+
+class ImportModelSEEDInfo(ImporterInfo):
+    """Metadata of the ImportModelSEED importer."""
+
+    name = 'ModelSEED'
+    title = 'ModelSEED model (Excel format)'
+    generic = True
+
+    def help(self):
+        """Print importer help text."""
+        print('Source must contain the model definition in Excel format\n'
+              ' and a PTT file for mapping PEG gene names.'
+              'Expected files in source directory:\n'
+              '- Seed*.xls\n'
+              '- NC_*.ptt')
+
+    def source_files(self, source):
+        """Return paths of the files that a model is imported from."""
+        return sorted(glob.glob(os.path.join(source, 'Seed*.xls')) +
+                      glob.glob(os.path.join(source, '*.ptt')))
+
+
+def iter_importer_entries():
+    """Yield canonical name and entry point of each available importer.
+
+    This includes importers from other packages. The names are lower case
+    as in ``psamm-import``.
+    """
+    import pkg_resources
+
+    seen = set()
+    for entry in pkg_resources.iter_entry_points('psamm.importer'):
+        name = entry.name.lower()
+        if name not in seen:
+            seen.add(name)
+            yield name, entry
+
+
+def load_importer(name):
+    """Return importer class for the given importer name."""
+    name = name.lower()
+    for entry_name, entry in iter_importer_entries():
+        if entry_name == name:
+            return entry.load()
+    raise ValueError('Importer {} not found'.format(name))
+
+
+class LazyImporter(Importer):
+    """Importer proxy that loads the actual importer on first use.
+
+    The actual importer is the class with the same name in the module
+    ``target_module``. Any attribute that is not metadata is looked up on an
+    instance of the actual importer, so the proxy can be used in place of
+    the importer. The proxy is a :class:`psamm.importer.Importer`.
+    """
+
+    target_module = 'psamm_import.excel'
+
+    def __init__(self):
+        """Create proxy without loading the actual importer."""
+        self._importer = None
+
+    @classmethod
+    def load(cls):
+        """Import and return the actual importer class."""
+        module = importlib.import_module(cls.target_module)
+        return getattr(module, cls.__name__)
+
+    @property
+    def importer(self):
+        """Instance of the actual importer."""
+        if self._importer is None:
+            self._importer = self.load()()
+        return self._importer
+
+    def import_model(self, source, **kwargs):
+        """Import and return model instance."""
+        return self.importer.import_model(source, **kwargs)
+
+    def __getattr__(self, name):
+        """Look up attribute on the actual importer."""
+        if name.startswith('__') or name == '_importer':
+            raise AttributeError(name)
+        return getattr(self.importer, name)
+
+
+class ImportiMA945(ImportiMA945Info, LazyImporter):
+    """Importer for iMA945 model."""
+
+
+class ImportiRR1083(ImportiRR1083Info, LazyImporter):
+    """Importer for iRR1083 model."""
+
+
+class ImportiJO1366(ImportiJO1366Info, LazyImporter):
+    """Importer for iJO1366 model."""
+
+
+class EColiTextbookImport(EColiTextbookImportInfo, LazyImporter):
+    """Importer for E. coli core textbook model."""
+
+
+class ImportSTMv1_0(ImportSTMv1_0Info, LazyImporter):  # noqa
+    """Importer for STM_v1.0 model."""
+
+
+class ImportiJN746(ImportiJN746Info, LazyImporter):
+    """Importer for iJN746 model."""
+
+
+class ImportiJP815(ImportiJP815Info, LazyImporter):
+    """Importer for iJP815 model."""
+
+
+class ImportiSyn731(ImportiSyn731Info, LazyImporter):
+    """Importer for iSyn731."""
+
+
+class ImportiCce806(ImportiCce806Info, LazyImporter):
+    """Importer for iCce806 model."""
+
+
+class ImportGSMN_TB(ImportGSMN_TBInfo, LazyImporter):  # noqa
+    """Importer for GSMN-TB model."""
+
+
+class ImportiNJ661(ImportiNJ661Info, LazyImporter):
+    """Importer for iNJ661 model."""
+
+
+class ImportiNJ661m(ImportiNJ661mInfo, LazyImporter):
+    """Importer for iNJ661m model."""
+
+
+class ImportiNJ661v(ImportiNJ661vInfo, LazyImporter):
+    """Importer for iNJ661v model."""
+
+
+class ImportiMR1_799(ImportiMR1_799Info, LazyImporter):  # noqa
+    """Importer for iMR_799 model."""
+
+
+class ImportiMR4_812(ImportiMR4_812Info, LazyImporter):  # noqa
+    """Importer for iMR4_812 model."""
+
+
+class ImportiW3181_789(ImportiW3181_789Info, LazyImporter):  # noqa
+    """Importer for iW3181_789 model."""
+
+
+class ImportiOS217_672(ImportiOS217_672Info, LazyImporter):  # noqa
+    """Importer for iOS217_672 model."""
+
+
+class ImportModelSEED(ImportModelSEEDInfo, LazyImporter):
+    """Read metabolic model for a ModelSEED model."""
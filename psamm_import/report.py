@@ -0,0 +1,85 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Report of the issues found and fixes made during an import.
+
+An :class:`ImportReport` can be passed to ``import_model()`` of the
+importers. Each item of the report has a category (e.g.
+``missing_compound``), the ID of the entry it concerns and a message.
+"""
+
+from __future__ import print_function
+
+from collections import OrderedDict
+
+
+class ImportReport(object):
+    """Items reported during an import, grouped by category."""
+
+    def __init__(self):
+        """Create empty report."""
+        self._items = OrderedDict()
+
+    def add(self, category, entry_id, message=None):
+        """Add item to the report."""
+        self._items.setdefault(category, []).append((entry_id, message))
+
+    def categories(self):
+        """Return list of the categories that have items."""
+        return list(self._items)
+
+    def items(self, category):
+        """Return list of ``(entry_id, message)`` items in category."""
+        return list(self._items.get(category, []))
+
+    def entry_ids(self, category):
+        """Return list of the entry IDs in category."""
+        return [entry_id for entry_id, _ in self._items.get(category, [])]
+
+    def count(self, category):
+        """Return the number of items in category."""
+        return len(self._items.get(category, []))
+
+    def counts(self):
+        """Return dict of the number of items in each category."""
+        return OrderedDict(
+            (category, len(items)) for category, items in self._items.items())
+
+    def __len__(self):
+        """Return the total number of items."""
+        return sum(len(items) for items in self._items.values())
+
+    def __iter__(self):
+        """Iterate over ``(category, entry_id, message)`` items."""
+        for category, items in self._items.items():
+            for entry_id, message in items:
+                yield category, entry_id, message
+
+    def write(self, f, limit=None):
+        """Write report as text to file-like object.
+
+        At most ``limit`` items are written for each category.
+        """
+        for category, items in self._items.items():
+            print('{} ({}):'.format(category, len(items)), file=f)
+            for entry_id, message in items[:limit]:
+                if message is None:
+                    print('- {}'.format(entry_id), file=f)
+                else:
+                    print('- {}: {}'.format(entry_id, message), file=f)
+            if limit is not None and len(items) > limit:
+                print('- ... ({} more)'.format(len(items) - limit), file=f)
@@ -0,0 +1,505 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Compact binary snapshots of imported models.
+
+A snapshot stores the compounds and reactions of a
+:class:`psamm.datasource.native.NativeModel` in flat arrays that are memory
+mapped when the snapshot is opened, so opening a snapshot is much faster
+than parsing the YAML model. Strings are stored once in a string table and
+referred to by index, and reaction equations are stored as arrays of
+compound indices and stoichiometric values. Requires NumPy (install the
+``snapshot`` extra).
+
+File layout: the magic bytes ``PSAMMSNP``, the format version and the length
+of the header as little endian 32-bit integers, a JSON header with the model
+properties and the offset, type and shape of each array, and then the raw
+arrays, each aligned to :data:`ALIGNMENT` bytes.
+"""
+
+import json
+import struct
+from decimal import Decimal
+
+from six import iteritems, text_type, integer_types
+
+from psamm.datasource import native
+from psamm.datasource.entry import (DictCompoundEntry as CompoundEntry,
+                                    DictReactionEntry as ReactionEntry)
+from psamm.datasource.context import FileMark, FilePathContext
+from psamm.reaction import Reaction, Compound, Direction
+from psamm.expression import boolean, affine
+
+from .matrix import FORWARD, REVERSE, _numpy
+
+MAGIC = b'PSAMMSNP'
+VERSION = 1
+
+#: Alignment of arrays in the snapshot file
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct('<8sII')
+
+# Model properties stored in the header
+_MODEL_PROPERTIES = (
+    'name', 'version_string', 'biomass_reaction',
+    'extracellular_compartment', 'default_compartment', 'default_flux_limit')
+
+# Kinds of property values
+_NONE, _STRING, _INT, _FLOAT, _BOOL, _GENES, _EQUATION, _LIST, _SET = range(9)
+
+# Kinds of stoichiometric values
+_VALUE_INT, _VALUE_DECIMAL, _VALUE_FLOAT, _VALUE_EXPRESSION = range(4)
+
+_DIRECTIONS = {
+    FORWARD: Direction.Forward,
+    REVERSE: Direction.Reverse,
+    FORWARD | REVERSE: Direction.Both
+}
+
+
+def _index_array(numpy, values):
+    """Return array of offsets using 32-bit integers if possible."""
+    array = numpy.asarray(values, dtype=numpy.int64)
+    if len(array) == 0 or array[-1] < 2**31:
+        array = array.astype(numpy.int32)
+    return array
+
+
+def _narrow_array(numpy, values, dtype, narrow_dtype):
+    """Return array of values using the narrow type if that is lossless."""
+    array = numpy.array(values, dtype=dtype)
+    narrow = array.astype(narrow_dtype)
+    if numpy.array_equal(narrow, array):
+        return narrow
+    return array
+
+
+class _StringTable(object):
+    """Table of unique strings."""
+
+    def __init__(self):
+        self._index = {}
+        self._strings = []
+
+    def add(self, s):
+        if s is None:
+            return -1
+        s = text_type(s)
+        index = self._index.get(s)
+        if index is None:
+            index = len(self._strings)
+            self._index[s] = index
+            self._strings.append(s)
+        return index
+
+    def arrays(self, numpy):
+        encoded = [s.encode('utf-8') for s in self._strings]
+        offsets = numpy.zeros(len(encoded) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(s) for s in encoded], out=offsets[1:])
+        data = numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8)
+        return _index_array(numpy, offsets), data
+
+
+def _decode_term(number, kind, text):
+    """Return side (True if left) and value of an encoded equation term.
+
+    The sign of the number is the side. For decimal and variable values
+    the number is only the sign and the value is decoded from the text.
+    """
+    if kind == _VALUE_INT:
+        value = int(abs(number))
+    elif kind == _VALUE_DECIMAL:
+        value = Decimal(text)
+    elif kind == _VALUE_FLOAT:
+        value = abs(number)
+    else:
+        value = affine.Expression(text)
+    return number < 0, value
+
+
+class _SnapshotWriter(object):
+    """Encode model entries into the snapshot arrays."""
+
+    def __init__(self):
+        self.strings = _StringTable()
+        self.entry_id = []
+        self.filemark = []
+        self.prop_ptr = [0]
+        self.prop_key = []
+        self.prop_kind = []
+        self.prop_value = []
+        self.list_ptr = [0]
+        self.list_item = []
+        self.eq_direction = []
+        self.eq_ptr = [0]
+        self.eq_compound = []
+        self.eq_compartment = []
+        self.eq_value = []
+        self.eq_value_kind = []
+        self.eq_value_text = []
+
+    def _add_equation(self, equation):
+        # The sides are encoded separately since the values of
+        # equation.compounds are negated for the left side, which does not
+        # keep the side of a variable stoichiometry.
+        for sign, side in ((-1, equation.left), (1, equation.right)):
+            for compound, value in side:
+                self._add_term(sign, compound, value)
+
+        direction = equation.direction
+        self.eq_direction.append(
+            (FORWARD if direction.forward else 0) |
+            (REVERSE if direction.reverse else 0))
+        self.eq_ptr.append(len(self.eq_compound))
+        return len(self.eq_direction) - 1
+
+    def _add_term(self, sign, compound, value):
+        if len(compound.arguments) > 0:
+            raise ValueError(
+                'Compound arguments are not supported: {}'.format(compound))
+
+        if isinstance(value, integer_types):
+            kind, text, number = _VALUE_INT, None, sign * value
+        elif isinstance(value, Decimal):
+            kind, text, number = _VALUE_DECIMAL, text_type(value), sign
+        elif isinstance(value, float):
+            kind, text, number = _VALUE_FLOAT, None, sign * value
+        else:
+            # Variable stoichiometry: only the side is kept as a number
+            kind, text, number = _VALUE_EXPRESSION, text_type(value), sign
+
+        # Check that the term is decoded to the same side and value
+        if _decode_term(float(number), kind, text) != (sign < 0, value):
+            raise ValueError(
+                'Unable to store stoichiometry of {}: {!r}'.format(
+                    compound, value))
+
+        self.eq_compound.append(self.strings.add(compound.name))
+        self.eq_compartment.append(self.strings.add(compound.compartment))
+        self.eq_value.append(float(number))
+        self.eq_value_kind.append(kind)
+        self.eq_value_text.append(self.strings.add(text))
+
+    def _add_list(self, values):
+        self.list_item.extend(self.strings.add(value) for value in values)
+        self.list_ptr.append(len(self.list_item))
+        return len(self.list_ptr) - 2
+
+    def _encode_value(self, key, value):
+        if value is None:
+            return _NONE, 0
+        elif isinstance(value, bool):
+            return _BOOL, int(value)
+        elif isinstance(value, integer_types):
+            return _INT, value
+        elif isinstance(value, float):
+            return _FLOAT, struct.unpack('<q', struct.pack('<d', value))[0]
+        elif isinstance(value, Reaction):
+            return _EQUATION, self._add_equation(value)
+        elif isinstance(value, boolean.Expression):
+            return _GENES, self.strings.add(value)
+        elif isinstance(value, list):
+            return _LIST, self._add_list(value)
+        elif isinstance(value, (set, frozenset)):
+            return _SET, self._add_list(sorted(value))
+        elif isinstance(value, text_type) or isinstance(value, str):
+            return _STRING, self.strings.add(value)
+        raise ValueError('Unable to store value of property {}: {!r}'.format(
+            key, value))
+
+    def add_entry(self, entry):
+        self.entry_id.append(self.strings.add(entry.id))
+
+        filemark = entry.filemark
+        if filemark is None:
+            self.filemark.append((-1, -1, -1))
+        else:
+            self.filemark.append((
+                self.strings.add(filemark.filecontext),
+                -1 if filemark.line is None else filemark.line,
+                -1 if filemark.column is None else filemark.column))
+
+        for key, value in sorted(iteritems(entry.properties)):
+            if key == 'id':
+                continue
+            kind, encoded = self._encode_value(key, value)
+            self.prop_key.append(self.strings.add(key))
+            self.prop_kind.append(kind)
+            self.prop_value.append(encoded)
+        self.prop_ptr.append(len(self.prop_key))
+
+    def arrays(self, numpy):
+        string_offsets, string_data = self.strings.arrays(numpy)
+        return [
+            ('string_offsets', string_offsets),
+            ('string_data', string_data),
+            ('entry_id', numpy.array(self.entry_id, dtype=numpy.int32)),
+            ('filemark', numpy.array(
+                self.filemark, dtype=numpy.int32).reshape(-1, 3)),
+            ('prop_ptr', _index_array(numpy, self.prop_ptr)),
+            ('prop_key', numpy.array(self.prop_key, dtype=numpy.int32)),
+            ('prop_kind', numpy.array(self.prop_kind, dtype=numpy.int8)),
+            ('prop_value', _narrow_array(
+                numpy, self.prop_value, numpy.int64, numpy.int32)),
+            ('list_ptr', _index_array(numpy, self.list_ptr)),
+            ('list_item', numpy.array(self.list_item, dtype=numpy.int32)),
+            ('eq_direction', numpy.array(
+                self.eq_direction, dtype=numpy.int8)),
+            ('eq_ptr', _index_array(numpy, self.eq_ptr)),
+            ('eq_compound', numpy.array(self.eq_compound, dtype=numpy.int32)),
+            ('eq_compartment', numpy.array(
+                self.eq_compartment, dtype=numpy.int32)),
+            ('eq_value', _narrow_array(
+                numpy, self.eq_value, numpy.float64, numpy.float32)),
+            ('eq_value_kind', numpy.array(
+                self.eq_value_kind, dtype=numpy.int8)),
+            ('eq_value_text', numpy.array(
+                self.eq_value_text, dtype=numpy.int32))
+        ]
+
+
+def _align(n):
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_snapshot(model, path):
+    """Save compounds and reactions of model as snapshot file at path."""
+    numpy = _numpy()
+
+    writer = _SnapshotWriter()
+    compounds = list(model.compounds)
+    reactions = list(model.reactions)
+    for entry in compounds:
+        writer.add_entry(entry)
+    for entry in reactions:
+        writer.add_entry(entry)
+    arrays = writer.arrays(numpy)
+
+    # Array offsets are relative to the end of the header so the header
+    # size does not depend on the offsets.
+    offset = 0
+    table = {}
+    for name, array in arrays:
+        array = numpy.ascontiguousarray(array)
+        table[name] = [array.dtype.newbyteorder('<').str, list(array.shape),
+                       offset]
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps({
+        'model': dict((prop, getattr(model, prop, None))
+                      for prop in _MODEL_PROPERTIES),
+        'compounds': len(compounds),
+        'reactions': len(reactions),
+        'arrays': table
+    }, sort_keys=True).encode('utf-8')
+    header += b' ' * (_align(_PREAMBLE.size + len(header)) -
+                      _PREAMBLE.size - len(header))
+
+    with open(path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        position = 0
+        for name, array in arrays:
+            _, _, array_offset = table[name]
+            f.write(b'\0' * (array_offset - position))
+            data = array.astype(array.dtype.newbyteorder('<')).tobytes()
+            f.write(data)
+            position = array_offset + len(data)
+
+
+class ModelSnapshot(object):
+    """Memory-mapped model snapshot.
+
+    The arrays of the snapshot are available in :attr:`arrays` without
+    copying. Entries are only decoded when they are accessed, e.g. by
+    :meth:`compound`, :meth:`reaction` or :meth:`create_model`.
+    """
+
+    def __init__(self, path):
+        """Open snapshot file at path."""
+        numpy = _numpy()
+        with open(path, 'rb') as f:
+            magic, version, header_size = _PREAMBLE.unpack(
+                f.read(_PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError('Not a model snapshot: {}'.format(path))
+            if version != VERSION:
+                raise ValueError('Unsupported snapshot version {}: {}'.format(
+                    version, path))
+            header = json.loads(f.read(header_size).decode('utf-8'))
+
+        data_offset = _PREAMBLE.size + header_size
+        self._mmap = numpy.memmap(path, dtype=numpy.uint8, mode='r')
+
+        self.arrays = {}
+        for name, (dtype, shape, offset) in iteritems(header['arrays']):
+            dtype = numpy.dtype(dtype)
+            start = data_offset + offset
+            size = dtype.itemsize * int(numpy.prod(shape))
+            self.arrays[name] = self._mmap[start:start + size].view(
+                dtype).reshape(shape)
+
+        self.properties = header['model']
+        self.compound_count = header['compounds']
+        self.reaction_count = header['reactions']
+        self._columns = self.arrays
+        self._strings = [None] * (len(self.arrays['string_offsets']) - 1)
+        self._contexts = {}
+        self._expressions = {}
+
+    def _decode_all(self):
+        """Decode all strings and convert arrays to lists.
+
+        Accessing single elements of the memory-mapped arrays is slow, so
+        this is done before decoding all entries.
+        """
+        if self._columns is not self.arrays:
+            return
+
+        offsets = self.arrays['string_offsets'].tolist()
+        data = self.arrays['string_data'].tobytes()
+        self._strings = [data[offsets[i]:offsets[i + 1]].decode('utf-8')
+                         for i in range(len(offsets) - 1)]
+        self._columns = dict(
+            (name, array.tolist()) for name, array in iteritems(self.arrays))
+
+    def string(self, index):
+        """Return string from the string table."""
+        if index < 0:
+            return None
+        s = self._strings[index]
+        if s is None:
+            offsets = self.arrays['string_offsets']
+            s = self.arrays['string_data'][
+                offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+            self._strings[index] = s
+        return s
+
+    def entry_id(self, index):
+        """Return ID of entry (compounds first, then reactions)."""
+        return self.string(int(self._columns['entry_id'][index]))
+
+    def compound_ids(self):
+        """Return list of compound IDs."""
+        return [self.entry_id(i) for i in range(self.compound_count)]
+
+    def reaction_ids(self):
+        """Return list of reaction IDs."""
+        return [self.entry_id(self.compound_count + i)
+                for i in range(self.reaction_count)]
+
+    def _filemark(self, index):
+        context, line, column = (
+            int(v) for v in self._columns['filemark'][index])
+        if context < 0:
+            return None
+        filecontext = self._contexts.get(context)
+        if filecontext is None:
+            filecontext = FilePathContext(self.string(context))
+            self._contexts[context] = filecontext
+        return FileMark(filecontext, None if line < 0 else line,
+                        None if column < 0 else column)
+
+    def _list(self, index):
+        ptr = self._columns['list_ptr']
+        return [self.string(int(i)) for i in
+                self._columns['list_item'][ptr[index]:ptr[index + 1]]]
+
+    def _equation(self, index):
+        arrays = self._columns
+        start, end = arrays['eq_ptr'][index], arrays['eq_ptr'][index + 1]
+        left, right = [], []
+        for i in range(start, end):
+            compound = Compound(
+                self.string(int(arrays['eq_compound'][i])),
+                self.string(int(arrays['eq_compartment'][i])))
+            is_left, value = _decode_term(
+                float(arrays['eq_value'][i]), arrays['eq_value_kind'][i],
+                self.string(int(arrays['eq_value_text'][i])))
+            if is_left:
+                left.append((compound, value))
+            else:
+                right.append((compound, value))
+        return Reaction(
+            _DIRECTIONS[int(arrays['eq_direction'][index])], left, right)
+
+    def _decode_value(self, kind, value):
+        if kind == _NONE:
+            return None
+        elif kind == _STRING:
+            return self.string(value)
+        elif kind == _INT:
+            return value
+        elif kind == _FLOAT:
+            return struct.unpack('<d', struct.pack('<q', value))[0]
+        elif kind == _BOOL:
+            return bool(value)
+        elif kind == _GENES:
+            # Expressions are immutable so equal expressions are shared
+            expression = self._expressions.get(value)
+            if expression is None:
+                expression = boolean.Expression(self.string(value))
+                self._expressions[value] = expression
+            return expression
+        elif kind == _EQUATION:
+            return self._equation(value)
+        elif kind == _LIST:
+            return self._list(value)
+        elif kind == _SET:
+            return frozenset(self._list(value))
+        raise ValueError('Invalid property kind: {}'.format(kind))
+
+    def properties_of(self, index):
+        """Return properties dict of entry (compounds first)."""
+        arrays = self._columns
+        start, end = arrays['prop_ptr'][index], arrays['prop_ptr'][index + 1]
+        properties = {'id': self.entry_id(index)}
+        for i in range(start, end):
+            key = self.string(int(arrays['prop_key'][i]))
+            properties[key] = self._decode_value(
+                int(arrays['prop_kind'][i]), int(arrays['prop_value'][i]))
+        return properties
+
+    def compound(self, index):
+        """Return compound entry at index."""
+        return CompoundEntry(
+            self.properties_of(index), filemark=self._filemark(index))
+
+    def reaction(self, index):
+        """Return reaction entry at index."""
+        index += self.compound_count
+        return ReactionEntry(
+            self.properties_of(index), filemark=self._filemark(index))
+
+    def create_model(self):
+        """Return :class:`psamm.datasource.native.NativeModel`."""
+        self._decode_all()
+        model = native.NativeModel()
+        for prop, value in iteritems(self.properties):
+            if value is not None:
+                setattr(model, prop, value)
+        model.compounds.update(
+            self.compound(i) for i in range(self.compound_count))
+        model.reactions.update(
+            self.reaction(i) for i in range(self.reaction_count))
+        return model
+
+
+def load_snapshot(path):
+    """Load model from snapshot file at path."""
+    return ModelSnapshot(path).create_model()
@@ -0,0 +1,116 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from psamm_import import excel
+from psamm_import.lazy import LazyModel
+from psamm_import.report import ImportReport
+from psamm_import.tests.workbooks import (
+    write_workbook, write_ima945_source, model_entries)
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'Requires Python 3.5')
+class TestImportAsync(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+        self._loop = asyncio.new_event_loop()
+        self._dir = tempfile.mkdtemp()
+        self._sources = []
+        for i in range(3):
+            source = os.path.join(self._dir, 'source{}'.format(i))
+            os.mkdir(source)
+            write_ima945_source(source, [
+                ('atp', 'ATP', 'C10H12N5O13P3', -4),
+                ('adp', 'ADP', 'C10H12N5O10P2', -3),
+                ('h2o', 'Water', 'H2O', 0)
+            ], [
+                ('ATPASE', 'ATPase', '[c] : atp + h2o --> adp + pi', 'g1'),
+                ('R{}'.format(i), '', '[c] : adp <==> atp', '')
+            ])
+            self._sources.append(source)
+
+    def tearDown(self):
+        self._loop.close()
+        shutil.rmtree(self._dir)
+
+    def run_async(self, coro):
+        return self._loop.run_until_complete(coro)
+
+    def test_import_model_async(self):
+        from psamm_import.aio import import_model_async
+        importer = excel.ImportiMA945()
+        model = self.run_async(import_model_async(
+            importer, self._sources[0], chunk_size=1))
+        self.assertEqual(model_entries(model), model_entries(
+            importer.import_model(self._sources[0])))
+
+    def test_import_model_async_lazy(self):
+        from psamm_import.aio import import_model_async
+        report = ImportReport()
+        model = self.run_async(import_model_async(
+            excel.ImportiMA945(), self._sources[0], lazy=True,
+            report=report))
+        self.assertIsInstance(model, LazyModel)
+        self.assertFalse(model.complete)
+        self.assertIn('ATPASE', model.reactions)
+        self.assertEqual(len(model.compounds), 3)
+        self.assertEqual(len(model.reactions), 2)
+        self.assertTrue(model.complete)
+        self.assertEqual(report.entry_ids('missing_compound'), ['pi'])
+
+    def test_import_models_async_with_options(self):
+        from psamm_import.aio import import_models_async
+        importer = excel.ImportiMA945()
+        reports = [ImportReport() for _ in self._sources]
+        jobs = [(importer, source, {'report': report})
+                for source, report in zip(self._sources, reports)]
+        jobs.append((importer, self._sources[0]))
+        models = self.run_async(import_models_async(jobs, concurrency=2))
+
+        self.assertEqual(len(models), 4)
+        for model, source in zip(models, self._sources + self._sources[:1]):
+            self.assertEqual(model_entries(model), model_entries(
+                importer.import_model(source)))
+        for report in reports:
+            self.assertEqual(report.entry_ids('missing_compound'), ['pi'])
+
+    def test_import_model_named_async(self):
+        from psamm_import.aio import import_model_named_async
+        source = os.path.join(self._dir, 'inj661m')
+        os.mkdir(source)
+        write_workbook(os.path.join(source, '1752-0509-4-160-s3.xls'), [
+            ('metabolites', [
+                ['id', 'name', 'formula'],
+                ['atp[c]', 'ATP', 'C10H12N5O13P3'],
+                ['atp[e]', 'ATP', 'C10H12N5O13P3'],
+                ['adp[c]', 'ADP', 'C10H12N5O10P2']]),
+            ('reactions', [
+                ['id', 'name', 'equation', 'genes', 'x', 'subsystem'],
+                ['R1', 'r1', 'atp[c] -> adp[c]', 'Rv0001', '', 'sub']])
+        ])
+
+        importer = excel.ImportiNJ661m()
+        model = self.run_async(import_model_named_async(
+            importer, 'Named model', source))
+        self.assertEqual(model.name, 'Named model')
+        self.assertEqual(model_entries(model), model_entries(
+            importer.import_model_named('Named model', source)))
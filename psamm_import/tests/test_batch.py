@@ -0,0 +1,94 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from psamm_import.batch import BatchResult, ImportJournal, STATUS_OK
+
+
+class TestImportJournal(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, 'journal.jsonl')
+        self._key = ('ModelSEED', '/src/g1', None)
+        self._fingerprint = (('Seed1.xls', 100, 1.0),)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def result(self, reactions=10):
+        return BatchResult('/src/g1', STATUS_OK, model={
+            'name': 'g1', 'reactions': reactions}, elapsed=1.5)
+
+    def read_lines(self):
+        with open(self._path, 'r') as f:
+            return f.readlines()
+
+    def test_unchanged_result_is_not_appended(self):
+        with ImportJournal(self._path) as journal:
+            journal.put(self._key, self._fingerprint, self.result())
+            journal.put(self._key, self._fingerprint, self.result(11))
+            self.assertEqual(
+                journal.get(self._key, self._fingerprint).model['reactions'],
+                11)
+        self.assertEqual(len(self.read_lines()), 1)
+
+    def test_changed_fingerprint_is_appended(self):
+        fingerprint = (('Seed1.xls', 200, 2.0),)
+        with ImportJournal(self._path) as journal:
+            journal.put(self._key, self._fingerprint, self.result())
+            journal.put(self._key, fingerprint, self.result(12))
+        self.assertEqual(len(self.read_lines()), 2)
+
+        with ImportJournal(self._path) as journal:
+            self.assertIsNone(journal.get(self._key, self._fingerprint))
+            result = journal.get(self._key, fingerprint)
+            self.assertEqual(result.model['reactions'], 12)
+
+        # The superseded line was removed when the journal was opened
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['model']['reactions'], 12)
+
+    def test_invalid_and_partial_lines_are_compacted(self):
+        other_key = ('ModelSEED', '/src/g2', None)
+        with ImportJournal(self._path) as journal:
+            journal.put(self._key, self._fingerprint, self.result())
+        with open(self._path, 'a') as f:
+            f.write('not json\n')
+            f.write('{"key": ["Model')
+
+        with ImportJournal(self._path) as journal:
+            self.assertEqual(len(journal), 1)
+            journal.put(other_key, self._fingerprint, self.result())
+
+        lines = self.read_lines()
+        self.assertEqual([tuple(json.loads(line)['key']) for line in lines],
+                         [self._key, other_key])
+        self.assertFalse(os.path.exists(self._path + '.tmp'))
+
+    def test_journal_without_obsolete_lines_is_not_rewritten(self):
+        with ImportJournal(self._path) as journal:
+            journal.put(self._key, self._fingerprint, self.result())
+        inode = os.stat(self._path).st_ino
+        with ImportJournal(self._path) as journal:
+            self.assertEqual(len(journal), 1)
+        self.assertEqual(os.stat(self._path).st_ino, inode)
@@ -0,0 +1,69 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from psamm_import.daemon import ImportServer, ImportClient
+
+
+class TestImportServer(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, 'daemon.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_refuse_socket_of_running_daemon(self):
+        server = ImportServer(self._path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with self.assertRaises(IOError):
+                ImportServer(self._path)
+
+            # The running daemon still owns the socket
+            with ImportClient(self._path, timeout=10) as client:
+                self.assertEqual(client.request(command='ping')['status'],
+                                 'ok')
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+        self.assertFalse(os.path.exists(self._path))
+
+    def test_replace_stale_socket(self):
+        # Socket file left behind by a daemon that is no longer running
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self._path)
+        sock.close()
+        self.assertTrue(os.path.exists(self._path))
+
+        server = ImportServer(self._path)
+        server.server_close()
+
+    def test_refuse_path_that_is_not_a_socket(self):
+        with open(self._path, 'w') as f:
+            f.write('data')
+        with self.assertRaises(IOError):
+            ImportServer(self._path)
+        self.assertTrue(os.path.exists(self._path))
@@ -0,0 +1,169 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+import os
+import shutil
+import logging
+import tempfile
+import threading
+import unittest
+
+from psamm.importer import ModelLoadError
+
+from psamm_import import excel
+from psamm_import.report import ImportReport
+from psamm_import.tests.workbooks import (
+    write_ima945_source, write_modelseed_source, model_entries)
+
+
+class TestConcurrentImports(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._sources = []
+        for i in range(6):
+            source = os.path.join(self._dir, 'source{}'.format(i))
+            os.mkdir(source)
+            compounds = [
+                ('atp', 'ATP', 'C10H12N5O13P3', -4),
+                ('adp', 'ADP', 'C10H12N5O10P2', -3),
+                ('pi', 'Phosphate', 'HO4P', -2),
+                ('h2o', 'Water', 'H2O', 0)
+            ] + [('cpd{}'.format(j), 'Compound {}'.format(j), 'C{}'.format(
+                j + 1), 0) for j in range(i * 10)]
+            reactions = [
+                ('ATPASE', 'ATPase {}'.format(i),
+                 '[c] : atp + h2o --> adp + pi', 'g1 and g{}'.format(i))
+            ] + [('R{}'.format(j), '', '[c] : cpd{} <==> cpd{}'.format(
+                j, j + 1), 'g{}'.format(j)) for j in range(i * 10 - 1)]
+            write_ima945_source(source, compounds, reactions)
+            self._sources.append(source)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_import_from_threads_with_shared_importer(self):
+        importer = excel.ImportiMA945()
+        expected = [model_entries(importer.import_model(source))
+                    for source in self._sources]
+
+        # Each source is imported by several threads at the same time
+        jobs = list(enumerate(self._sources)) * 4
+        results = [None] * len(jobs)
+        errors = []
+        barrier = threading.Event()
+
+        def run(job_index):
+            barrier.wait()
+            try:
+                i, source = jobs[job_index]
+                model = importer.import_model(source)
+                results[job_index] = i, model_entries(model)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(k,))
+                   for k in range(len(jobs))]
+        for thread in threads:
+            thread.start()
+        barrier.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for i, entries in results:
+            self.assertEqual(entries, expected[i])
+
+
+class TestModelSEEDImport(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        write_modelseed_source(self._dir, [
+            ('fig|1.peg.1', 100, 400, 'for'),
+            ('fig|1.peg.2', 500, 902, 'for'),
+            ('fig|1.peg.3', 1000, 1300, 'rev')
+        ], [
+            ('cpd00002', 'ATP', 'C10H12N5O13P3', -4),
+            ('cpd00008', 'ADP', 'C10H12N5O10P2', -3)
+        ], [
+            ('rxn1', 'r1', '|cpd00002| => |cpd00008|', 'peg.2'),
+            ('rxn2', 'r2', '|cpd00008| => |cpd00002|',
+             '(peg.1 and peg.9) or peg.3')
+        ], [
+            (100, 400, '+', 'GENE1'),
+            (500, 900, '+', 'GENE2'),
+            (1000, 1300, '-', 'GENE3')
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_approximate_gene_location_is_not_mapped_by_default(self):
+        with self.assertRaises(ModelLoadError):
+            excel.ImportModelSEED().import_model(self._dir)
+
+    def test_approximate_gene_location_with_tolerance(self):
+        importer = excel.ImportModelSEED()
+        importer.gene_location_tolerance = 10
+        report = ImportReport()
+        logger = logging.getLogger('psamm_import.excel')
+        handler = _ListHandler()
+        logger.addHandler(handler)
+        try:
+            model = importer.import_model(self._dir, report=report)
+        finally:
+            logger.removeHandler(handler)
+
+        self.assertEqual(
+            str(model.reactions['rxn1'].properties['genes']), 'GENE2')
+        self.assertEqual(
+            report.entry_ids('approximate_gene_location'), ['peg.2'])
+        self.assertEqual(len(handler.records), 1)
+        self.assertEqual(handler.records[0].levelno, logging.WARNING)
+
+    def test_mixed_mapped_and_unmapped_pegs(self):
+        importer = excel.ImportModelSEED()
+        importer.gene_location_tolerance = 10
+        report = ImportReport()
+        model = importer.import_model(self._dir, report=report)
+
+        self.assertEqual(
+            str(model.reactions['rxn2'].properties['genes']),
+            'GENE1 or GENE3')
+        self.assertEqual(report.entry_ids('unmapped_gene'), ['peg.9'])
+
+    def test_validate_does_not_read_ptt_file(self):
+        # The PEG locations are not mapped by validate()
+        importer = excel.ImportModelSEED()
+        self.assertEqual(len(importer.validate(self._dir)), 0)
+
+        with open(os.path.join(self._dir, 'NC_1.ptt'), 'w') as f:
+            f.write('Not a PTT file\n')
+        self.assertEqual(len(importer.validate(self._dir)), 0)
+
+    def test_validate_without_ptt_file(self):
+        os.remove(os.path.join(self._dir, 'NC_1.ptt'))
+        report = excel.ImportModelSEED().validate(self._dir)
+        self.assertEqual(report.entry_ids('invalid_source'), [self._dir])
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super(_ListHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
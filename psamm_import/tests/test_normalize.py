@@ -0,0 +1,185 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+import re
+import random
+import unittest
+import logging
+
+from psamm.datasource.entry import DictCompoundEntry as CompoundEntry
+
+from psamm_import import excel
+from psamm_import.normalize import CompoundIdIndex, merge_duplicate_entries
+from psamm_import.report import ImportReport
+
+
+def entry(compound_id, **kwargs):
+    kwargs['id'] = compound_id
+    return CompoundEntry(kwargs)
+
+
+class TestCompoundIdIndex(unittest.TestCase):
+    def test_counts(self):
+        index = CompoundIdIndex(['atp[c]', 'ATP[e]', 'adp[c]', 'h2o'],
+                                lower=True)
+        self.assertEqual(index.counts, {'atp': 2, 'adp': 1, 'h2o': 1})
+        self.assertEqual(list(index), ['atp', 'adp', 'h2o'])
+        self.assertEqual(index.compartments('atp'), ['c', 'e'])
+
+    def test_lookup_does_not_count(self):
+        index = CompoundIdIndex(['atp[c]', 'atp[e]'])
+        self.assertEqual(index['atp[c]'], 'atp')
+        self.assertEqual(index['adp[c]'], 'adp')
+        self.assertEqual(index.counts, {'atp': 2})
+
+
+class TestMergeDuplicateEntries(unittest.TestCase):
+    def setUp(self):
+        self._entries = [
+            entry('atp', name='ATP', formula=None),
+            entry('adp', name='ADP'),
+            entry('atp', name='ATP', formula='C10H12N5O13P3'),
+            entry('h2o', name='Water')
+        ]
+        self._counts = {'atp': 2, 'adp': 1, 'h2o': 1}
+
+    def test_merge_entries(self):
+        report = ImportReport()
+        merged = list(merge_duplicate_entries(
+            self._entries, report, self._counts))
+        self.assertEqual([e.id for e in merged], ['atp', 'adp', 'h2o'])
+        self.assertEqual(merged[0].properties['formula'], 'C10H12N5O13P3')
+        self.assertEqual(merged[0].properties['name'], 'ATP')
+        self.assertIs(merged[1], self._entries[1])
+        self.assertEqual(report.entry_ids('compound_conflict'), [])
+
+    def test_merge_does_not_modify_entries(self):
+        merged = list(merge_duplicate_entries(self._entries, None,
+                                              self._counts))
+        self.assertIsNone(self._entries[0].properties['formula'])
+        self.assertIsNot(merged[0], self._entries[0])
+        self.assertEqual(merged[0].filemark, self._entries[0].filemark)
+
+    def test_merge_streams_entries(self):
+        read = []
+
+        def entries():
+            for e in self._entries:
+                read.append(e.id)
+                yield e
+
+        merged = merge_duplicate_entries(entries(), None, self._counts)
+        self.assertEqual(next(merged).id, 'atp')
+        self.assertEqual(read, ['atp', 'adp', 'atp'])
+        self.assertEqual(next(merged).id, 'adp')
+        self.assertEqual(read, ['atp', 'adp', 'atp'])
+        self.assertEqual(next(merged).id, 'h2o')
+        self.assertEqual(read, ['atp', 'adp', 'atp', 'h2o'])
+
+    def test_merge_unique_entry_before_duplicate(self):
+        read = []
+
+        def entries():
+            for e in [entry('h2o'), entry('atp'), entry('adp'),
+                      entry('atp', formula='C10H12N5O13P3')]:
+                read.append(e.id)
+                yield e
+
+        merged = merge_duplicate_entries(entries(), None, self._counts)
+        self.assertEqual(next(merged).id, 'h2o')
+        self.assertEqual(read, ['h2o'])
+        self.assertEqual([e.id for e in merged], ['atp', 'adp'])
+
+    def test_merge_without_counts(self):
+        merged = list(merge_duplicate_entries(self._entries))
+        self.assertEqual([e.id for e in merged], ['atp', 'adp', 'h2o'])
+        self.assertEqual(merged[0].properties['formula'], 'C10H12N5O13P3')
+
+    def test_merge_conflict_is_reported(self):
+        report = ImportReport()
+        entries = [entry('atp', name='ATP'), entry('atp', name='Atp')]
+        merged = list(merge_duplicate_entries(entries, report, {'atp': 2}))
+        self.assertEqual(merged[0].properties['name'], 'ATP')
+        self.assertEqual(report.entry_ids('compound_conflict'), ['atp'])
+
+    def test_merge_conflict_is_logged_without_report(self):
+        entries = [entry('atp', name='ATP'), entry('atp', name='Atp')]
+        logger = logging.getLogger('psamm_import.normalize')
+        handler = _ListHandler()
+        logger.addHandler(handler)
+        try:
+            merged = list(merge_duplicate_entries(entries, None, {'atp': 2}))
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual(merged[0].properties['name'], 'ATP')
+        self.assertEqual(len(handler.records), 1)
+        self.assertEqual(handler.records[0].levelno, logging.WARNING)
+        self.assertIn('Conflicting name', handler.records[0].getMessage())
+
+    def test_merge_more_entries_than_counted(self):
+        report = ImportReport()
+        entries = [entry('atp', name='ATP'), entry('atp', formula='C10')]
+        merged = list(merge_duplicate_entries(entries, report, {'atp': 1}))
+        self.assertEqual(len(merged), 1)
+        self.assertIs(merged[0], entries[0])
+        self.assertEqual(report.entry_ids('compound_conflict'), ['atp'])
+
+
+class TestEquationNormalizer(unittest.TestCase):
+    """Test that the normalizers give the output of the old re.sub chains."""
+
+    def setUp(self):
+        tokens = ['a', 'b[c]', ' ', '  ', '\t', '+', '-->', '<==>', '=>',
+                  '-', '|', '||', '|[c]', '[e]', '(2)', '>']
+        rand = random.Random(0)
+        self._equations = [
+            ''.join(rand.choice(tokens) for _ in range(rand.randint(0, 12)))
+            for _ in range(5000)]
+        self._equations.append(
+            '|2-Oxoglutarate|[c]+|L-Glutamine|[c] + |H+|[c] => |NADP|[e]')
+
+    def test_isyn731(self):
+        normalize = excel.ImportiSyn731.normalize_equation
+        for equation in self._equations:
+            expected = re.sub(r'\s*\+\s*', ' + ', equation)
+            expected = re.sub(r'\|\[(\w)\]', r'[\1]|', expected)
+            expected = expected.replace('||', '|')
+            self.assertEqual(normalize(equation), expected)
+
+    def test_icce806(self):
+        # Only the whitespace between adjacent operators may differ
+        normalize = excel.ImportiCce806.normalize_equation
+        for equation in self._equations:
+            expected = re.sub(r'\s*\+\s*', ' + ', equation)
+            expected = re.sub(r'\s*-->\s*', ' --> ', expected)
+            expected = re.sub(r'\s*<==>\s*', ' <==> ', expected)
+            self.assertEqual(normalize(equation).split(), expected.split())
+
+    def test_shewanella(self):
+        normalize = excel.ImportShewanellaOng.normalize_equation
+        for equation in self._equations:
+            self.assertEqual(normalize(equation),
+                             re.sub(r'\s*\+\s*', ' + ', equation))
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super(_ListHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
@@ -0,0 +1,53 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+import sys
+import subprocess
+import unittest
+
+from psamm.importer import Importer
+
+from psamm_import import registry
+
+
+class TestLazyImporter(unittest.TestCase):
+    def test_proxy_is_importer(self):
+        importer = registry.ImportiMA945()
+        self.assertIsInstance(importer, Importer)
+        self.assertEqual(importer.name, 'iMA945')
+
+    def test_proxy_loads_importer(self):
+        from psamm_import import excel
+        importer = registry.ImportModelSEED()
+        self.assertIs(importer.load(), excel.ImportModelSEED)
+        self.assertIsInstance(importer.importer, excel.ImportModelSEED)
+
+    def test_metadata_does_not_load_importers(self):
+        code = '\n'.join([
+            'import sys',
+            'from psamm_import import registry',
+            'for name in dir(registry):',
+            '    cls = getattr(registry, name)',
+            '    if (isinstance(cls, type) and',
+            '            issubclass(cls, registry.LazyImporter) and',
+            '            issubclass(cls, registry.ImporterInfo)):',
+            '        cls().title, cls().source_files(".")',
+            'print(",".join(m for m in ("xlrd", "psamm_import.excel")',
+            '               if m in sys.modules))'
+        ])
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(output.decode('utf-8').strip(), '')
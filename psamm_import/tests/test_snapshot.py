@@ -0,0 +1,132 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+
+from psamm.datasource import native
+from psamm.datasource.context import FileMark, FilePathContext
+from psamm.datasource.entry import (DictCompoundEntry as CompoundEntry,
+                                    DictReactionEntry as ReactionEntry)
+from psamm.datasource.reaction import parse_reaction
+from psamm.expression import boolean
+
+from psamm_import import excel
+from psamm_import.tests.workbooks import (
+    write_ima945_source, model_entries)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'Requires NumPy')
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, 'model.snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def round_trip(self, model):
+        from psamm_import.snapshot import save_snapshot, load_snapshot
+        save_snapshot(model, self._path)
+        return load_snapshot(self._path)
+
+    def test_round_trip_properties(self):
+        context = FilePathContext('source/model.xls')
+        model = native.NativeModel()
+        model.name = 'Test model'
+        model.biomass_reaction = 'BIOMASS'
+        model.extracellular_compartment = 'e'
+        model.compounds.add_entry(CompoundEntry(dict(
+            id='atp', name='ATP', formula='C10H12N5O13P3', charge=-4,
+            zero=0, mass=507.18, flag=True, missing=None,
+            synonyms=['adenosine triphosphate', 'ATP'],
+            ec=frozenset(['1.1.1.1', '2.2.2.2'])),
+            filemark=FileMark(context, 4, None)))
+        model.compounds.add_entry(CompoundEntry(dict(id='adp')))
+        model.reactions.add_entry(ReactionEntry(dict(
+            id='R1', name='r1',
+            genes=boolean.Expression('(g1 and g2) or g3'),
+            equation=parse_reaction('atp[c] + h2o[c] => adp[c] + pi[c]')),
+            filemark=FileMark(context, 10, 2)))
+
+        loaded = self.round_trip(model)
+        self.assertEqual(loaded.name, 'Test model')
+        self.assertEqual(loaded.biomass_reaction, 'BIOMASS')
+        self.assertEqual(loaded.extracellular_compartment, 'e')
+        self.assertEqual(model_entries(loaded), model_entries(model))
+
+        atp = loaded.compounds['atp']
+        self.assertEqual(atp.properties['synonyms'],
+                         ['adenosine triphosphate', 'ATP'])
+        self.assertEqual(atp.properties['ec'],
+                         frozenset(['1.1.1.1', '2.2.2.2']))
+        self.assertIs(atp.properties['flag'], True)
+        self.assertEqual(atp.filemark.line, 4)
+        self.assertEqual(str(atp.filemark.filecontext), 'source/model.xls')
+        self.assertIsNone(loaded.compounds['adp'].filemark)
+
+        r1 = loaded.reactions['R1']
+        self.assertEqual(r1.equation, model.reactions['R1'].equation)
+        self.assertEqual(r1.filemark.column, 2)
+
+    def test_round_trip_stoichiometry(self):
+        model = native.NativeModel()
+        equations = [
+            '|a[c]| + 2 |b[c]| <=> 3 |c[c]|',
+            '(n) |a[c]| => (2n) |b[c]|',
+            '|a[c]| => (m + 1) |b[c]|',
+            '(0.5) |a[c]| => (1.25) |b[c]|',
+            '(1e-3) |a[c]| => |b[c]|',
+            '|a[c]| + (n) |b[c]| <= |c[c]|'
+        ]
+        for i, equation in enumerate(equations):
+            model.reactions.add_entry(ReactionEntry(dict(
+                id='R{}'.format(i), equation=parse_reaction(equation))))
+
+        loaded = self.round_trip(model)
+        for entry in model.reactions:
+            loaded_equation = loaded.reactions[entry.id].equation
+            self.assertEqual(loaded_equation, entry.equation)
+            self.assertEqual(loaded_equation.left, entry.equation.left)
+            self.assertEqual(loaded_equation.right, entry.equation.right)
+
+        decimal_left = loaded.reactions['R3'].equation.left
+        self.assertEqual(decimal_left[0][1], Decimal('0.5'))
+        self.assertIsInstance(decimal_left[0][1], Decimal)
+
+    def test_round_trip_imported_model(self):
+        write_ima945_source(self._dir, [
+            ('atp', 'ATP', 'C10H12N5O13P3', -4),
+            ('adp', 'ADP', 'C10H12N5O10P2', -3),
+            ('h2o', 'Water', 'H2O', 0)
+        ], [
+            ('ATPASE', 'ATPase', '[c] : atp + h2o --> adp + pi',
+             'STM0001 and STM0002'),
+            ('R2', '', '[c] : 2 adp <==> atp', '')
+        ])
+        model = excel.ImportiMA945().import_model(self._dir)
+        loaded = self.round_trip(model)
+        self.assertEqual(model_entries(loaded), model_entries(model))
+        self.assertEqual(loaded.biomass_reaction, model.biomass_reaction)
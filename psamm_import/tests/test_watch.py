@@ -0,0 +1,125 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+import threading
+import unittest
+
+from psamm.importers.cobrajson import Importer as JSONImporter
+
+from psamm_import import excel
+from psamm_import.watch import ModelWatcher, watched_files
+
+
+def _write_json_model(path, reaction_ids):
+    with open(path, 'w') as f:
+        json.dump({
+            'id': 'test',
+            'metabolites': [
+                {'id': 'a_c', 'name': 'A', 'compartment': 'c'},
+                {'id': 'b_c', 'name': 'B', 'compartment': 'c'}],
+            'reactions': [
+                {'id': reaction_id, 'metabolites': {'a_c': -1, 'b_c': 1},
+                 'lower_bound': 0, 'upper_bound': 1000,
+                 'gene_reaction_rule': ''}
+                for reaction_id in reaction_ids],
+            'genes': [],
+            'compartments': {'c': 'cytosol'}
+        }, f)
+
+
+class TestWatchedFiles(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def touch(self, *names):
+        path = os.path.join(self._dir, *names)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w'):
+            pass
+        return path
+
+    def test_importer_source_files(self):
+        importer = excel.ImportiMA945()
+        self.assertEqual(watched_files(importer, self._dir), [
+            os.path.join(self._dir, 'jbc.M109.005868-5.xls')])
+
+    def test_source_file_without_source_files(self):
+        path = self.touch('model.json')
+        self.assertEqual(watched_files(JSONImporter(), path), [path])
+
+    def test_source_directory_without_source_files(self):
+        model = self.touch('model.xml')
+        extra = self.touch('data', 'extra.tsv')
+        self.touch('.model.xml.swp')
+        self.touch('~$model.xlsx')
+        self.touch('.git', 'HEAD')
+        self.touch('dest', 'model.yaml')
+        self.assertEqual(
+            watched_files(JSONImporter(), self._dir,
+                          exclude=[os.path.join(self._dir, 'dest')]),
+            [extra, model])
+
+
+class TestModelWatcher(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, 'model.json')
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(self._dir)
+
+    def test_importer_without_source_files(self):
+        _write_json_model(self._path, ['R1'])
+        watcher = ModelWatcher(JSONImporter(), self._path, interval=0.01,
+                               debounce=0.01)
+        results = watcher.results()
+        result = next(results)
+        self.assertEqual([r.id for r in result.model.reactions], ['R1'])
+        self.assertIsNone(result.reactions)
+
+        _write_json_model(self._path, ['R1', 'R2'])
+        result = next(results)
+        self.assertEqual(result.reactions, (['R2'], [], []))
+
+    def test_first_import_fails(self):
+        with open(self._path, 'w') as f:
+            f.write('{')
+
+        watcher = ModelWatcher(JSONImporter(), self._path, interval=0.01,
+                               debounce=0.01)
+
+        def fix_source():
+            while watcher._fingerprints is None:
+                threading.Event().wait(0.01)
+            _write_json_model(self._path, ['R1'])
+
+        thread = threading.Thread(target=fix_source)
+        thread.start()
+        result = next(watcher.results())
+        thread.join()
+        self.assertEqual([r.id for r in result.model.reactions], ['R1'])
@@ -0,0 +1,107 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Small source files for the tests.
+
+The workbooks are written with xlwt which is only needed by the tests.
+"""
+
+import os
+
+from six import iteritems, text_type
+
+import xlwt
+
+
+def write_workbook(path, sheets):
+    """Write workbook with the sheets given as ``(name, rows)`` pairs."""
+    book = xlwt.Workbook()
+    for name, rows in sheets:
+        sheet = book.add_sheet(name)
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                sheet.write(i, j, value)
+    book.save(path)
+
+
+def write_ptt(path, genes):
+    """Write PTT file of the ``(start, stop, strand, gene_id)`` genes."""
+    with open(path, 'w') as f:
+        f.write('Genome\n{} proteins\n'.format(len(genes)))
+        f.write('Location\tStrand\tLength\tPID\tGene\tSynonym\n')
+        for start, stop, strand, gene_id in genes:
+            f.write('{}..{}\t{}\t100\t1\t-\t{}\n'.format(
+                start, stop, strand, gene_id))
+
+
+def write_ima945_source(dirpath, compounds, reactions):
+    """Write source of the iMA945 importer to directory.
+
+    The compounds are rows of ``(id, name, formula, charge)`` and the
+    reactions are rows of ``(id, name, equation, genes)``.
+    """
+    write_workbook(os.path.join(dirpath, 'jbc.M109.005868-5.xls'), [
+        ('compounds', [
+            ['id', 'name', 'formula', 'charge', 'cas', 'formula_neutral',
+             'kegg']] + [
+            [compound_id, name, formula, charge, '', formula, '']
+            for compound_id, name, formula, charge in compounds]),
+        ('reactions', [['id', 'name', 'equation', 'genes']] + [
+            list(row) for row in reactions])
+    ])
+
+
+def write_modelseed_source(dirpath, genes, compounds, reactions,
+                           ptt_genes):
+    """Write source of the ModelSEED importer to directory.
+
+    The genes are rows of ``(id, start, stop, direction)``, the compounds
+    are rows of ``(id, name, formula, charge)`` and the reactions are rows
+    of ``(id, name, equation, pegs)``. The PTT genes are
+    ``(start, stop, strand, gene_id)``.
+    """
+    write_workbook(os.path.join(dirpath, 'Seed1.xls'), [
+        ('Genes', [['id', 'type', 'x', 'start', 'stop', 'direction']] + [
+            [gene_id, 'peg', '', start, stop, direction]
+            for gene_id, start, stop, direction in genes]),
+        ('Compounds', [['id', 'name', 'alt', 'formula', 'charge', 'x']] + [
+            [compound_id, name, '', formula, charge, '']
+            for compound_id, name, formula, charge in compounds]),
+        ('Reactions', [['id', 'name', 'equation', 'x', 'ec', 'x', 'x',
+                        'pegs']] + [
+            [reaction_id, name, equation, '', '', '', '', pegs]
+            for reaction_id, name, equation, pegs in reactions])
+    ])
+    write_ptt(os.path.join(dirpath, 'NC_1.ptt'), ptt_genes)
+
+
+def model_entries(model):
+    """Return dict of the properties of the compounds and reactions.
+
+    The property values are converted to text so models can be compared.
+    """
+    def entries(entry_set):
+        return [(entry.id, sorted(
+            (key, text_type(value))
+            for key, value in iteritems(entry.properties)))
+            for entry in entry_set]
+
+    return {
+        'name': model.name,
+        'compounds': entries(model.compounds),
+        'reactions': entries(model.reactions)
+    }
@@ -0,0 +1,126 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Validation of the structure of source workbooks.
+
+Each importer describes the sheets it reads with :class:`SheetLayout`.
+``validate()`` of the importers checks the sheets of a source against the
+layouts without parsing any equations, formulas or gene associations, so a
+source can be checked in a fraction of the time of an import. The issues
+are returned in a :class:`psamm_import.report.ImportReport` with the
+following categories:
+
+- ``invalid_source``: The source files could not be opened.
+- ``missing_file``: A source file does not exist.
+- ``missing_sheet``: A sheet does not exist in the workbook.
+- ``missing_columns``: A sheet has fewer columns than are read.
+- ``extra_columns``: A sheet read as whole rows has more columns.
+- ``missing_rows``: A sheet has no rows after the header rows.
+- ``invalid_id``: An ID cell is not a text cell.
+- ``blank_id``: An ID cell is blank (the row is skipped on import).
+- ``duplicate_id``: An ID appears more than once in a sheet where the IDs
+  must be unique.
+"""
+
+from six import string_types
+
+
+class SheetLayout(object):
+    """Expected layout of a sheet read by an importer.
+
+    Args:
+        kind: Kind of the entries in the sheet (e.g. ``'reactions'``).
+        name: Name of the sheet.
+        start: Index of the first row after the header rows.
+        columns: Number of columns read from each row.
+        id_column: Index of the column with the entry IDs.
+        book: Attribute of the import state that holds the workbook.
+        unique: Whether the IDs must be unique in the sheet.
+        exact: Whether the sheet must have exactly ``columns`` columns
+            (for sheets where whole rows are read).
+    """
+
+    def __init__(self, kind, name, start, columns, id_column=0,
+                 book='book', unique=False, exact=False):
+        """Create layout of sheet."""
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.columns = columns
+        self.id_column = id_column
+        self.book = book
+        self.unique = unique
+        self.exact = exact
+
+    def __repr__(self):
+        """Return representation of the layout."""
+        return '{}({!r}, {!r})'.format(
+            self.__class__.__name__, self.kind, self.name)
+
+
+def check_sheet(book, layout, report, skip=None):
+    """Check sheet of workbook against layout and add issues to report.
+
+    The ID column is scanned for blank, non-text and duplicate IDs. IDs for
+    which ``skip`` returns True are ignored (e.g. note rows that the
+    importer leaves out). Returns the number of rows scanned.
+    """
+    if layout.name not in book.sheet_names():
+        report.add('missing_sheet', layout.name,
+                   'Expected sheet with {}'.format(layout.kind))
+        return 0
+
+    sheet = book.sheet_by_name(layout.name)
+    if sheet.ncols < layout.columns:
+        report.add('missing_columns', layout.name,
+                   'Expected {} columns, found {}'.format(
+                       layout.columns, sheet.ncols))
+        if sheet.ncols <= layout.id_column:
+            return 0
+    elif layout.exact and sheet.ncols > layout.columns:
+        report.add('extra_columns', layout.name,
+                   'Expected {} columns, found {}'.format(
+                       layout.columns, sheet.ncols))
+
+    if sheet.nrows <= layout.start:
+        report.add('missing_rows', layout.name,
+                   'No rows after the {} header rows'.format(layout.start))
+        return 0
+
+    seen = {}
+    ids = sheet.col_values(layout.id_column, start_rowx=layout.start)
+    for i, entry_id in enumerate(ids, start=layout.start):
+        row = '{}:{}'.format(layout.name, i + 1)
+        if not isinstance(entry_id, string_types):
+            report.add('invalid_id', row,
+                       'Expected text ID, found {!r}'.format(entry_id))
+            continue
+        entry_id = entry_id.strip()
+        if entry_id == '':
+            report.add('blank_id', row)
+            continue
+        if skip is not None and skip(entry_id):
+            continue
+        if layout.unique:
+            if entry_id in seen:
+                report.add('duplicate_id', entry_id,
+                           'Rows {} and {} of {}'.format(
+                               seen[entry_id] + 1, i + 1, layout.name))
+            else:
+                seen[entry_id] = i
+
+    return len(ids)
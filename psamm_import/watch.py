@@ -0,0 +1,284 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Watch model source files and re-import the model when they change.
+
+The files returned by the ``source_files()`` method of the importer are
+polled for changes. For importers without this method (e.g. the SBML
+importer of PSAMM), the source file or all files in the source directory are
+polled (see :func:`watched_files`). When a change is detected, the watcher
+waits until the files have not changed for a debounce period and then
+imports the model again. Workbooks that did not change are taken from the
+workbook cache (see :mod:`psamm_import.workbook`) so only the changed files
+are decoded again.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+from six import iteritems, text_type
+
+from .registry import load_importer
+from .workbook import file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprints(paths):
+    result = {}
+    for path in paths:
+        try:
+            result[path] = file_fingerprint(path)
+        except OSError:
+            result[path] = None
+    return result
+
+
+def watched_files(importer, source, exclude=()):
+    """Return sorted list of the files to watch for changes.
+
+    These are the files returned by ``importer.source_files(source)`` if the
+    importer has that method. Otherwise, the source file itself or all files
+    in the source directory are watched, except hidden and temporary files
+    (names starting with ``.`` or ``~``) and files in the directories given
+    in ``exclude`` (e.g. the destination of the model).
+    """
+    source_files = getattr(importer, 'source_files', None)
+    if source_files is not None:
+        return sorted(source_files(source))
+    if not os.path.isdir(source):
+        return [source]
+
+    exclude = set(os.path.abspath(path) for path in exclude)
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames[:] = sorted(
+            name for name in dirnames if not name.startswith(('.', '~')) and
+            os.path.abspath(os.path.join(dirpath, name)) not in exclude)
+        paths.extend(os.path.join(dirpath, name) for name in filenames
+                     if not name.startswith(('.', '~')))
+    return sorted(paths)
+
+
+def _entry_values(entry):
+    return dict((key, text_type(value))
+                for key, value in iteritems(entry.properties))
+
+
+def diff_entries(old_entries, new_entries):
+    """Compare two collections of model entries.
+
+    Returns a tuple of the lists of added, removed and changed entry IDs.
+    """
+    old = dict((entry.id, entry) for entry in old_entries)
+    new = dict((entry.id, entry) for entry in new_entries)
+
+    added = [entry_id for entry_id in new if entry_id not in old]
+    removed = [entry_id for entry_id in old if entry_id not in new]
+    changed = [entry_id for entry_id, entry in iteritems(new)
+               if entry_id in old and
+               _entry_values(entry) != _entry_values(old[entry_id])]
+    return added, removed, changed
+
+
+class ImportResult(object):
+    """Result of a (re-)import by :class:`ModelWatcher`.
+
+    The ``compounds`` and ``reactions`` attributes are tuples of the added,
+    removed and changed entry IDs compared to the previous import (or None
+    for the first import).
+    """
+
+    def __init__(self, model, elapsed, compounds=None, reactions=None):
+        """Create result of import."""
+        self.model = model
+        self.elapsed = elapsed
+        self.compounds = compounds
+        self.reactions = reactions
+
+
+class ModelWatcher(object):
+    """Re-import a model whenever its source files change.
+
+    Args:
+        importer: Importer instance.
+        source: Source directory or file.
+        interval: Seconds between polling the source files.
+        debounce: Seconds that the files must be unchanged before the model
+            is imported again.
+        exclude: Directories that are not watched (see
+            :func:`watched_files`).
+    """
+
+    def __init__(self, importer, source, interval=1.0, debounce=0.5,
+                 exclude=()):
+        """Create watcher of the model source."""
+        self._importer = importer
+        self._source = source
+        self._exclude = tuple(exclude)
+        self._interval = interval
+        self._debounce = debounce
+        self._fingerprints = None
+        self._model = None
+
+    @property
+    def model(self):
+        """Return the last imported model or None."""
+        return self._model
+
+    @property
+    def files(self):
+        """Return list of the watched files."""
+        return watched_files(self._importer, self._source, self._exclude)
+
+    def _current_fingerprints(self):
+        return _fingerprints(self.files)
+
+    def changed(self):
+        """Return True if the source files changed since the last import."""
+        return self._current_fingerprints() != self._fingerprints
+
+    def wait_until_stable(self):
+        """Wait until the source files are unchanged for the debounce time."""
+        fingerprints = self._current_fingerprints()
+        while True:
+            time.sleep(self._debounce)
+            current = self._current_fingerprints()
+            if current == fingerprints:
+                return
+            fingerprints = current
+
+    def reimport(self):
+        """Import the model and return :class:`ImportResult`."""
+        fingerprints = self._current_fingerprints()
+        start_time = time.time()
+        model = self._importer.import_model(self._source)
+        elapsed = time.time() - start_time
+
+        result = ImportResult(model, elapsed)
+        if self._model is not None:
+            result.compounds = diff_entries(
+                self._model.compounds, model.compounds)
+            result.reactions = diff_entries(
+                self._model.reactions, model.reactions)
+
+        self._fingerprints = fingerprints
+        self._model = model
+        return result
+
+    def _try_reimport(self):
+        """Import the model and return result (None if import failed)."""
+        try:
+            return self.reimport()
+        except Exception:
+            logger.error('Failed to import model', exc_info=True)
+            self._fingerprints = self._current_fingerprints()
+            return None
+
+    def results(self):
+        """Yield result of the first import and of each re-import.
+
+        This blocks while waiting for the source files to change. Imports
+        that fail (including the first import) are logged and the watcher
+        waits for the next change.
+        """
+        result = self._try_reimport()
+        if result is not None:
+            yield result
+        while True:
+            time.sleep(self._interval)
+            if self.changed():
+                self.wait_until_stable()
+                result = self._try_reimport()
+                if result is not None:
+                    yield result
+
+
+def _format_changes(kind, changes, limit=10):
+    added, removed, changed = changes
+    lines = ['- {}: {} added, {} removed, {} changed'.format(
+        kind, len(added), len(removed), len(changed))]
+    for prefix, ids in (('+', added), ('-', removed), ('~', changed)):
+        for entry_id in ids[:limit]:
+            lines.append('    {} {}'.format(prefix, entry_id))
+        if len(ids) > limit:
+            lines.append('    {} ... ({} more)'.format(
+                prefix, len(ids) - limit))
+    return lines
+
+
+def main(args=None):
+    """Entry point of the watch command."""
+    parser = argparse.ArgumentParser(
+        description='Re-import model whenever the source files change')
+    parser.add_argument('format', help='Format to import')
+    parser.add_argument('--source', metavar='path', default='.',
+                        help='Source directory or file')
+    parser.add_argument('--dest', metavar='path',
+                        help='Destination directory to write model to')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Seconds between checking the source files')
+    parser.add_argument('--debounce', type=float, default=0.5,
+                        help=('Seconds the source files must be unchanged'
+                              ' before importing'))
+    parser.add_argument('--no-exchange', action='store_true',
+                        help=('Disable importing exchange reactions as'
+                              ' exchange compound file.'))
+    parser.add_argument('--split-subsystem', action='store_true',
+                        help='Enable splitting reaction files by subsystem')
+    args = parser.parse_args(args)
+
+    logging.basicConfig(
+        level=logging.WARNING, format='%(levelname)s: %(message)s')
+
+    from psamm.importer import write_yaml_model
+
+    importer = load_importer(args.format)()
+    exclude = () if args.dest is None else (args.dest,)
+    watcher = ModelWatcher(importer, args.source, interval=args.interval,
+                           debounce=args.debounce, exclude=exclude)
+
+    # Flush the output after each import so that progress is shown when
+    # the output is piped.
+    print('Watching {}'.format(', '.join(watcher.files)))
+    sys.stdout.flush()
+    try:
+        for result in watcher.results():
+            model = result.model
+            print('Imported {} in {:.3f} s ({} compounds, {} reactions)'
+                  .format(model.name, result.elapsed, len(model.compounds),
+                          len(model.reactions)))
+            if result.compounds is not None:
+                for line in _format_changes('Compounds', result.compounds):
+                    print(line)
+                for line in _format_changes('Reactions', result.reactions):
+                    print(line)
+
+            if args.dest is not None:
+                if not os.path.isdir(args.dest):
+                    os.makedirs(args.dest)
+                write_yaml_model(model, args.dest,
+                                 convert_exchange=not args.no_exchange,
+                                 split_subsystem=args.split_subsystem)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,161 @@
+# This file is part of PSAMM.
+#
+# PSAMM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# PSAMM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with PSAMM.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2017  Jon Lund Steffensen <jon_steffensen@uri.edu>
+
+"""Process-wide cache of opened Excel workbooks.
+
+Decoding a workbook is usually the most expensive part of an import. The
+importers open their workbooks through :func:`open_workbook` which keeps the
+decoded workbooks in a shared LRU cache so that repeated imports from the same
+file (e.g. the four Shewanella models that share one workbook) only pay for
+the row parsing. Cache entries are invalidated when the modification time or
+the size of the file changes.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Default limits of the shared workbook cache
+DEFAULT_MAX_ENTRIES = 8
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def file_fingerprint(path):
+    """Return (mtime, size) fingerprint of the given file."""
+    st = os.stat(path)
+    return st.st_mtime, st.st_size
+
+
+class WorkbookCache(object):
+    """LRU cache of decoded workbooks keyed by file path.
+
+    The cache holds at most ``max_entries`` workbooks and at most
+    ``max_size`` bytes of workbook files. The file size is used as an
+    estimate of the memory used by the decoded workbook. A workbook that is
+    larger than ``max_size`` on its own is returned but not cached. The cache
+    can be shared between threads.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_size=DEFAULT_MAX_SIZE):
+        """Create cache with the given limits."""
+        self._max_entries = max_entries
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self):
+        """Maximum number of cached workbooks."""
+        return self._max_entries
+
+    @property
+    def max_size(self):
+        """Maximum total size in bytes of the cached workbook files."""
+        return self._max_size
+
+    @property
+    def size(self):
+        """Total size in bytes of the cached workbook files."""
+        return self._size
+
+    def __len__(self):
+        """Return number of cached workbooks."""
+        return len(self._entries)
+
+    def __contains__(self, path):
+        """Return True if the workbook at path is cached."""
+        return os.path.abspath(path) in self._entries
+
+    def _load(self, path):
+        import xlrd
+        return xlrd.open_workbook(path)
+
+    def open(self, path):
+        """Return the decoded workbook at path.
+
+        The workbook is decoded only if it is not in the cache or if the
+        file changed since it was cached.
+        """
+        key = os.path.abspath(path)
+        fingerprint = file_fingerprint(key)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                if entry[0] == fingerprint:
+                    self._entries[key] = entry
+                    return entry[1]
+                self._size -= entry[0][1]
+
+        logger.debug('Decoding workbook {}'.format(key))
+        book = self._load(key)
+
+        size = fingerprint[1]
+        if size > self._max_size or self._max_entries < 1:
+            return book
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[0][1]
+            self._entries[key] = fingerprint, book
+            self._size += size
+            self._evict()
+
+        return book
+
+    def _evict(self):
+        while (len(self._entries) > self._max_entries or
+               self._size > self._max_size):
+            _, (fingerprint, _) = self._entries.popitem(last=False)
+            self._size -= fingerprint[1]
+
+    def discard(self, path):
+        """Remove the workbook at path from the cache."""
+        with self._lock:
+            entry = self._entries.pop(os.path.abspath(path), None)
+            if entry is not None:
+                self._size -= entry[0][1]
+
+    def clear(self):
+        """Remove all workbooks from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def resize(self, max_entries=None, max_size=None):
+        """Change the limits of the cache, evicting workbooks if needed."""
+        with self._lock:
+            if max_entries is not None:
+                self._max_entries = max_entries
+            if max_size is not None:
+                self._max_size = max_size
+            self._evict()
+
+
+#: Workbook cache shared by all importers in the process
+workbook_cache = WorkbookCache()
+
+
+def open_workbook(path):
+    """Open workbook at path using the shared workbook cache."""
+    return workbook_cache.open(path)
@@ -33,26 +33,31 @@ setup(
 
     packages=find_packages(),
     entry_points={
+        'console_scripts': [
+            'psamm-import-batch = psamm_import.batch:main',
+            'psamm-import-daemon = psamm_import.daemon:main',
+            'psamm-import-watch = psamm_import.watch:main'
+        ],
         'psamm.importer': [
-            'iMA945 = psamm_import.excel:ImportiMA945',
-            'iRR1083 = psamm_import.excel:ImportiRR1083',
-            'iJO1366 = psamm_import.excel:ImportiJO1366',
+            'iMA945 = psamm_import.registry:ImportiMA945',
+            'iRR1083 = psamm_import.registry:ImportiRR1083',
+            'iJO1366 = psamm_import.registry:ImportiJO1366',
             'EColi_textbook ='
-            ' psamm_import.excel:EColiTextbookImport',
-            'STM_v1.0 = psamm_import.excel:ImportSTMv1_0',
-            'iJN746 = psamm_import.excel:ImportiJN746',
-            'iJP815 = psamm_import.excel:ImportiJP815',
-            'iSyn731 = psamm_import.excel:ImportiSyn731',
-            'iCce806 = psamm_import.excel:ImportiCce806',
-            'GSMN-TB = psamm_import.excel:ImportGSMN_TB',
-            'iNJ661 = psamm_import.excel:ImportiNJ661',
-            'iNJ661m = psamm_import.excel:ImportiNJ661m',
-            'iNJ661v = psamm_import.excel:ImportiNJ661v',
-            'iMR1_799 = psamm_import.excel:ImportiMR1_799',
-            'iMR4_812 = psamm_import.excel:ImportiMR4_812',
-            'iW3181_789 = psamm_import.excel:ImportiW3181_789',
-            'iOS217_672 = psamm_import.excel:ImportiOS217_672',
-            'ModelSEED = psamm_import.excel:ImportModelSEED',
+            ' psamm_import.registry:EColiTextbookImport',
+            'STM_v1.0 = psamm_import.registry:ImportSTMv1_0',
+            'iJN746 = psamm_import.registry:ImportiJN746',
+            'iJP815 = psamm_import.registry:ImportiJP815',
+            'iSyn731 = psamm_import.registry:ImportiSyn731',
+            'iCce806 = psamm_import.registry:ImportiCce806',
+            'GSMN-TB = psamm_import.registry:ImportGSMN_TB',
+            'iNJ661 = psamm_import.registry:ImportiNJ661',
+            'iNJ661m = psamm_import.registry:ImportiNJ661m',
+            'iNJ661v = psamm_import.registry:ImportiNJ661v',
+            'iMR1_799 = psamm_import.registry:ImportiMR1_799',
+            'iMR4_812 = psamm_import.registry:ImportiMR4_812',
+            'iW3181_789 = psamm_import.registry:ImportiW3181_789',
+            'iOS217_672 = psamm_import.registry:ImportiOS217_672',
+            'ModelSEED = psamm_import.registry:ImportModelSEED',
         ]
     },
 
@@ -60,4 +65,9 @@ setup(
         'xlrd',
         'psamm>=0.31',
         'six'
-    ])
+    ],
+    extras_require={
+        'matrix': ['numpy'],
+        'snapshot': ['numpy'],
+        'zstd': ['zstandard']
+    })